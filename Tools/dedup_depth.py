@@ -29,11 +29,16 @@
 
 import sys
 import pandas
-import numpy as np
 import argparse as arg
 
+from wibl.core.algorithm.deduplicate import non_duplicate_mask
+
 def main():
     parser = arg.ArgumentParser(description = 'Removed duplicated depths in a WIBL file (in CSV format)')
+    parser.add_argument('-t', '--tolerance', type = float, default = 0.0,
+                        help = 'Largest difference from the last depth kept for a depth to be a duplicate')
+    parser.add_argument('-g', '--time-gap', type = float,
+                        help = 'Largest interval (seconds) between consecutive depths for them to be duplicates')
     parser.add_argument('input', help = 'CSV format input file')
     parser.add_argument('output', help = 'CSV format output file')
     
@@ -51,15 +56,10 @@ def main():
         print('Error: must have an output file.');
         sys.exit(1)
         
-    current_depth = 0
-    d = np.ndarray(len(data), dtype=bool)
-    index = pandas.Series(dtype = bool, data = d)
-    for n in range(0, len(data)):
-        if data['Depth'][n] != current_depth:
-            index[n] = True
-            current_depth = data['Depth'][n]
-        else:
-            index[n] = False
+    # The same test as the 'deduplicate' algorithm used in processing WIBL files
+    times = data['Epoch'].to_numpy() if optargs.time_gap is not None else None
+    index = non_duplicate_mask(data['Depth'].to_numpy(), times,
+                               tolerance = optargs.tolerance, time_gap = optargs.time_gap)
 
     filtered = data[index]
     filtered.to_csv(out_file, index = False)
@@ -44,38 +44,36 @@ gyro_scale = 0
 temp_scale = 0
 temp_offset = 0
 
-while source.has_more():
-    pkt = source.next_packet()
-    if pkt is not None:
-        packet_count += 1
-        if isinstance(pkt, LoggerFile.Motion) or isinstance(pkt, LoggerFile.RawIMU):
-            if isinstance(pkt, LoggerFile.RawIMU):
-                if accel_scale == 0:
-                    print('ERR: scales not set; was there a scales metadata element?')
-                    sys.exit(1)
-                accel_pt = (pkt.accel[0] * accel_scale, pkt.accel[1] * accel_scale, pkt.accel[2] * accel_scale, np.sqrt(pkt.accel[0]**2 + pkt.accel[1]**2 + pkt.accel[2]**2) * accel_scale)
-                gyro_pt = (pkt.gyro[0] * gyro_scale, pkt.gyro[1] * gyro_scale, pkt.gyro[2] * gyro_scale)
-                temp_pt = (pkt.temp * temp_scale) + temp_offset
-            else:
-                accel_pt = (pkt.accel[0], pkt.accel[1], pkt.accel[2], np.sqrt(pkt.accel[0]**2 + pkt.accel[1]**2 + pkt.accel[2]**2))
-                gyro_pt = pkt.gyro
-                temp_pt = pkt.temp
-            motion_count += 1
-            times.append(pkt.elapsed / 1000)
-            acc.append(accel_pt)
-            gyro.append(gyro_pt)
-            temp.append(temp_pt)
-        elif isinstance(pkt, LoggerFile.SensorScales):
-            try:
-                accel_scale = 1.0 / pkt.config['imu']['recipAccelScale']
-                gyro_scale = 1.0 / pkt.config['imu']['recipGyroScale']
-                temp_scale = 1.0 / pkt.config['imu']['recipTempScale']
-                temp_offset = pkt.config['imu']['tempOffset']
-            except KeyError as e:
-                print('ERR: bad key error')
+for pkt in source.iter_packets(types={LoggerFile.Motion, LoggerFile.RawIMU, LoggerFile.SensorScales}):
+    packet_count += 1
+    if isinstance(pkt, LoggerFile.Motion) or isinstance(pkt, LoggerFile.RawIMU):
+        if isinstance(pkt, LoggerFile.RawIMU):
+            if accel_scale == 0:
+                print('ERR: scales not set; was there a scales metadata element?')
                 sys.exit(1)
+            accel_pt = (pkt.accel[0] * accel_scale, pkt.accel[1] * accel_scale, pkt.accel[2] * accel_scale, np.sqrt(pkt.accel[0]**2 + pkt.accel[1]**2 + pkt.accel[2]**2) * accel_scale)
+            gyro_pt = (pkt.gyro[0] * gyro_scale, pkt.gyro[1] * gyro_scale, pkt.gyro[2] * gyro_scale)
+            temp_pt = (pkt.temp * temp_scale) + temp_offset
+        else:
+            accel_pt = (pkt.accel[0], pkt.accel[1], pkt.accel[2], np.sqrt(pkt.accel[0]**2 + pkt.accel[1]**2 + pkt.accel[2]**2))
+            gyro_pt = pkt.gyro
+            temp_pt = pkt.temp
+        motion_count += 1
+        times.append(pkt.elapsed / 1000)
+        acc.append(accel_pt)
+        gyro.append(gyro_pt)
+        temp.append(temp_pt)
+    elif isinstance(pkt, LoggerFile.SensorScales):
+        try:
+            accel_scale = 1.0 / pkt.config['imu']['recipAccelScale']
+            gyro_scale = 1.0 / pkt.config['imu']['recipGyroScale']
+            temp_scale = 1.0 / pkt.config['imu']['recipTempScale']
+            temp_offset = pkt.config['imu']['tempOffset']
+        except KeyError as e:
+            print('ERR: bad key error')
+            sys.exit(1)
 
-print("Found " + str(packet_count) + " packets total")
+print("Found " + str(source.packets_read) + " packets total, decoded " + str(packet_count) + " motion and scales packets")
 print("Found " + str(motion_count) + " motion packets")
 
 plt.figure(figsize=(14,10))
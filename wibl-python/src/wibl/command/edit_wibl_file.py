@@ -33,6 +33,7 @@ import json
 from pathlib import Path
 
 import click
+import numpy as np
 
 from wibl.core import logger_file as lf
 from wibl.core.logger_file import PacketTranscriptionError
@@ -55,9 +56,20 @@ from wibl.core.logger_file import PacketTranscriptionError
               help='Specify a NMEA0183 sentence filter name')
 @click.option('--strict-mode', is_flag=True, default=False,
               help='Strict mode: fail if any packet is not successfully translated')
+@click.option('--start', type=int,
+              help='Only copy data packets with elapsed time (ms) at or after this')
+@click.option('--end', type=int,
+              help='Only copy data packets with elapsed time (ms) at or before this')
+@click.option('--save-index/--no-save-index', default=True,
+              help='Save the packet index for INPUT as a sidecar file (INPUT.idx) if one has to be built')
 def editwibl(input: Path, output: Path, uniqueid: str, shipname: str,
-             meta: Path, algo: tuple[str], version: str, filter: tuple[str], strict_mode: bool):
-    """Edit INPUT WIBL logger file, writing edited WIBL file to OUTPUT."""
+             meta: Path, algo: tuple[str], version: str, filter: tuple[str], strict_mode: bool,
+             start: int, end: int, save_index: bool):
+    """Edit INPUT WIBL logger file, writing edited WIBL file to OUTPUT.
+
+    The packet index for INPUT (from INPUT.idx if it is up to date, or built by walking the packet headers
+    otherwise) is used to find the packets to edit; everything else is copied verbatim.  Specifying --start
+    and/or --end extracts a window of data packets by elapsed time, keeping all of the metadata packets."""
 
     if uniqueid:
         logger_name = uniqueid
@@ -92,44 +104,57 @@ def editwibl(input: Path, output: Path, uniqueid: str, shipname: str,
         file_major = None
         file_minor = None
 
-    # Next step is to loop through the data file, copying packets by default
-    # unless there's something that we have to add.  Note that we edit the
-    # Metadata packet to change the logger name and/or unique ID, if it exists
-    # (it should on most systems), but add it later if there isn't one; with the
-    # JSON metadata, the same thing is true: if the packet exists, we replace it
+    # Next step is to copy the data file, verbatim by default, unless there's
+    # something that we have to edit or add.  Note that we edit the Metadata
+    # packet to change the logger name and/or unique ID, if it exists (it should
+    # on most systems), but add it later if there isn't one; with the JSON
+    # metadata, the same thing is true: if the packet exists, we replace it
     # at the same location in the file, but otherwise append it at the end.
+    # The packet index means that only the packets being edited need to be
+    # decoded, and runs of packets in between are copied as byte ranges.
+    edit_types = []
+    if logger_name or shipname:
+        edit_types.append(lf.Metadata)
+    if metadata:
+        edit_types.append(lf.JSONMetadata)
+    if file_major:
+        edit_types.append(lf.SerialiserVersion)
+
     op = open(output, 'wb')
     metadata_out = False
     json_metadata_out = False
-    packet_count: int = 0
-    with open(input, 'rb') as ip:
-        source = lf.PacketFactory(ip, strict_mode=strict_mode)
-        while source.has_more():
-            packet_count += 1
+    with lf.IndexedPacketReader(input, strict_mode=strict_mode, save_sidecar=save_index) as source:
+        positions = np.flatnonzero(source.mask(start=start, end=end, include_untimed=True))
+        edits = positions[np.isin(source.index['id'][positions], list(lf.packet_ids(edit_types)))]
+        copied_to = 0
+        for position in edits:
+            # Copy everything up to the packet to edit, then the edited packet
+            edit_at = int(np.searchsorted(positions, position))
+            source.copy_packets(positions[copied_to:edit_at], op)
+            copied_to = edit_at + 1
             try:
-                packet = source.next_packet()
+                packet = source.read_packet(int(source.index['offset'][position]))
             except PacketTranscriptionError as e:
-                raise PacketTranscriptionError(f'Error reading packet {packet_count}: {str(e)}') from e
-            if packet:
-                if isinstance(packet, lf.Metadata):
-                    if logger_name or shipname:
-                        out_name = packet.logger_name
-                        out_id = packet.ship_name
-                        if logger_name:
-                            out_name = logger_name
-                        if shipname:
-                            out_id = shipname
-                        packet = lf.Metadata(logger = out_name, shipname = out_id)
-                        metadata_out = True
-                elif isinstance(packet, lf.JSONMetadata):
-                    if metadata:
-                        packet = lf.JSONMetadata(meta = metadata)
-                        json_metadata_out = True
-                elif isinstance(packet, lf.SerialiserVersion):
-                    if file_major:
-                        packet = lf.SerialiserVersion(major=file_major, minor=file_minor,
-                                                      n2000=packet.nmea2000, n0183=packet.nmea0183, imu=packet.imu)
-                packet.serialise(op)
+                raise PacketTranscriptionError(f'Error reading packet {position + 1}: {str(e)}') from e
+            if packet is None:
+                continue
+            if isinstance(packet, lf.Metadata):
+                out_name = packet.logger_name
+                out_id = packet.ship_name
+                if logger_name:
+                    out_name = logger_name
+                if shipname:
+                    out_id = shipname
+                packet = lf.Metadata(logger = out_name, shipname = out_id)
+                metadata_out = True
+            elif isinstance(packet, lf.JSONMetadata):
+                packet = lf.JSONMetadata(meta = metadata)
+                json_metadata_out = True
+            elif isinstance(packet, lf.SerialiserVersion):
+                packet = lf.SerialiserVersion(major=file_major, minor=file_minor,
+                                              n2000=packet.nmea2000, n0183=packet.nmea0183, imu=packet.imu)
+            packet.serialise(op)
+        source.copy_packets(positions[copied_to:], op)
         # At the end of the file, if we haven't yet sent out any of the edited packets,
         # we just append.  Note that we don't do this for the SerialiserVersion packet,
         # since all versions of the file format have this, so we are certain that it
@@ -35,6 +35,12 @@ import click
 import wibl.core.logger_file as LoggerFile
 
 
+def _in_window(pkt: LoggerFile.DataPacket, start: int, end: int) -> bool:
+    if not LoggerFile.has_elapsed_time(pkt.id()):
+        return False
+    return (start is None or pkt.elapsed >= start) and (end is None or pkt.elapsed <= end)
+
+
 @click.command()
 @click.argument('input', type=str)
 @click.option('-s', '--stats', is_flag=True, default=False,
@@ -43,8 +49,25 @@ import wibl.core.logger_file as LoggerFile
               help='Dump ASCII representation of NMEA0183 data to file')
 @click.option('--strict-mode', is_flag=True, default=False,
               help='Strict mode: fail if any packet is not successfully translated')
-def parsewibl(input: str, stats: bool, dump: str, strict_mode: bool):
-    """Parse binary WIBL logger file INPUT and report contents in human-readable format to the console."""
+@click.option('-t', '--type', 'types', type=click.Choice([t.name for t in LoggerFile.PacketTypes]), multiple=True,
+              help='Only report packets of this type (may be repeated)')
+@click.option('--start', type=int,
+              help='Only report packets with elapsed time (ms) at or after this')
+@click.option('--end', type=int,
+              help='Only report packets with elapsed time (ms) at or before this')
+@click.option('--save-index/--no-save-index', default=True,
+              help='Save the packet index built for --start/--end as a sidecar file (INPUT.idx)')
+@click.option('--resync', is_flag=True, default=False,
+              help='Recover from corrupt data by skipping to the next plausible packet, and report the bytes skipped')
+def parsewibl(input: str, stats: bool, dump: str, strict_mode: bool, types: tuple,
+              start: int, end: int, save_index: bool, resync: bool):
+    """Parse binary WIBL logger file INPUT and report contents in human-readable format to the console.
+
+    Selecting packets by type skips the payloads of all other packets without decoding them.  Selecting packets by
+    elapsed time uses a packet index (read from INPUT.idx if it is up to date, or built by walking the packet headers
+    otherwise), so that only the packets selected are read.  INPUT may be compressed with gzip, xz, or zstd, in which
+    case it is decompressed as it is read (and selection by elapsed time reads the whole file), or a block-indexed
+    container from `wibl repack` (for which selection by elapsed time reads only the blocks required)."""
     filename = str(input)
     
     if dump:
@@ -52,28 +75,46 @@ def parsewibl(input: str, stats: bool, dump: str, strict_mode: bool):
     else:
         dump_file = None
 
-    file = open(filename, 'rb')
-
     packet_count: int = 0
     packet_stats: dict = {}
-    source = LoggerFile.PacketFactory(file, strict_mode=strict_mode)
-    while source.has_more():
-        try:
-            pkt = source.next_packet()
-            if pkt:
-                packet_count += 1
-                click.echo(pkt)
-                if dump_file:
-                    if pkt.name() == 'SerialString':
-                        dump_file.write(f'{pkt.elapsed} {pkt.data.decode("utf-8").strip()}\n')
-                if stats:
-                    if pkt.name() not in packet_stats:
-                        packet_stats[pkt.name()] = 0
-                    packet_stats[pkt.name()] += 1
-        except LoggerFile.PacketTranscriptionError as e:
-            sys.exit(f"Failed to translate packet {packet_count}: {str(e)}.")
+    selected = [LoggerFile.PacketTypes[t] for t in types] if types else None
+    windowed = start is not None or end is not None
+    with open(filename, 'rb') as f:
+        compression = LoggerFile.compression_format(f)
+    if windowed and compression is None and not resync:
+        reader = LoggerFile.IndexedPacketReader(filename, strict_mode=strict_mode, save_sidecar=save_index)
+        source = reader.packets(selected, start, end)
+    elif windowed and compression == 'block' and not resync:
+        reader = LoggerFile.BlockReader(filename, strict_mode=strict_mode)
+        source = reader.packets(selected, start, end)
+    else:
+        reader = LoggerFile.PacketFactory(open(filename, 'rb'), strict_mode=strict_mode, resync=resync)
+        source = reader.iter_packets(selected)
+        if windowed:
+            # Compressed streams (and corrupt files) can't be indexed, so the window has to be applied as the file
+            # is read
+            source = (pkt for pkt in source if _in_window(pkt, start, end))
+    try:
+        for pkt in source:
+            packet_count += 1
+            click.echo(pkt)
+            if dump_file:
+                if pkt.name() == 'SerialString':
+                    dump_file.write(f'{pkt.elapsed} {pkt.data.decode("utf-8").strip()}\n')
+            if stats:
+                if pkt.name() not in packet_stats:
+                    packet_stats[pkt.name()] = 0
+                packet_stats[pkt.name()] += 1
+    except (LoggerFile.PacketTranscriptionError, LoggerFile.ContainerFormatError) as e:
+        sys.exit(f"Failed to translate packet {packet_count}: {str(e)}.")
+    reader.close()
 
     click.echo(f"Found {packet_count} packets total")
+    if resync and reader.skipped:
+        click.echo(f"Skipped {sum(e - s for s, e in reader.skipped)} bytes of corrupt data in "
+                   f"{len(reader.skipped)} ranges:")
+        for skip_start, skip_end in reader.skipped:
+            click.echo(f"\t[{skip_start}, {skip_end})")
     if stats:
         click.echo("Packet statistics:")
         for name in packet_stats:
@@ -0,0 +1,61 @@
+##\file repack_wibl_file.py
+# \brief Convert WIBL files to and from the block-indexed, compressed archive container
+#
+# For archiving, WIBL files can be repacked into a container of independently compressed blocks of packets, with an
+# index of the blocks by elapsed time (see wibl.core.logger_file.BlockWriter).  The conversion is lossless, so that
+# the original file can be recovered exactly; the rest of the processing code can read the container directly.
+#
+# Copyright 2026 Center for Coastal and Ocean Mapping & NOAA-UNH Joint
+# Hydrographic Center, University of New Hampshire.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+
+import sys
+from pathlib import Path
+
+import click
+
+from wibl.core import logger_file as lf
+
+
+@click.command()
+@click.argument('input', type=click.Path(exists=True, file_okay=True, dir_okay=False, readable=True))
+@click.argument('output', type=click.Path())
+@click.option('-c', '--codec', type=click.Choice(list(lf.BLOCK_CODECS)), default='zlib',
+              help='Compression codec for the blocks of the container')
+@click.option('-b', '--block-size', type=click.IntRange(min=1), default=lf.DEFAULT_BLOCK_SIZE // 1024,
+              help='Target size (KiB, uncompressed) for the blocks of the container')
+@click.option('-u', '--unpack', is_flag=True, default=False,
+              help='Recover the original WIBL file from a container (or other compressed file) INPUT')
+def repack(input: Path, output: Path, codec: str, block_size: int, unpack: bool):
+    """Repack WIBL logger file INPUT into a block-indexed, compressed container OUTPUT (or the reverse with --unpack).
+
+    The conversion is lossless, and the container can be used anywhere a WIBL file can."""
+    if unpack:
+        try:
+            lf.unpack_file(input, output)
+        except lf.ContainerFormatError as e:
+            sys.exit(f'Error: failed to unpack {input}: {str(e)}.')
+        return
+    if lf.is_compressed(input):
+        sys.exit(f'Error: {input} is already compressed; unpack it first.')
+    index = lf.pack_file(input, output, codec=codec, block_size=block_size * 1024)
+    click.echo(f'Wrote {index["packets"].sum()} packets in {len(index)} blocks '
+               f'({index["raw_size"].sum()} bytes compressed to {index["size"].sum()} bytes).')
@@ -30,12 +30,14 @@
 
 import sys
 import os
+from contextlib import nullcontext
 
 from pathlib import Path
 
 import click
 
 import wibl.core.config as conf
+import wibl.core.instrumentation as instrumentation
 from wibl.processing.cloud.aws.lambda_function import process_item
 from wibl.core.datasource import LocalSource, LocalController
 from wibl.core.notification import LocalNotifier
@@ -46,7 +48,16 @@ from wibl.core.notification import LocalNotifier
 @click.option('-c', '--config',
               type=click.Path(exists=True), required=True,
               help='Specify configuration file for installation')
-def wibl_proc(input: Path, output: Path, config: Path=None):
+@click.option('--resync', is_flag=True, default=False,
+              help='Recover from corrupt data by skipping to the next plausible packet (overrides the configuration file)')
+@click.option('--streaming', is_flag=True, default=False,
+              help='Process the file in two streaming passes rather than loading it into memory (overrides the configuration file)')
+@click.option('--profile', is_flag=True, default=False,
+              help='Report the time used by each stage of processing (overrides the configuration file)')
+@click.option('--profile-memory', is_flag=True, default=False,
+              help='Report the time and peak memory used by each stage of processing; tracing memory slows processing, so the times are not representative (overrides the configuration file)')
+def wibl_proc(input: Path, output: Path, config: Path=None, resync: bool=False,
+              streaming: bool=False, profile: bool=False, profile_memory: bool=False):
     """Process a WIBL file INPUT into GeoJSON file OUTPUT locally."""
     infilename = str(input)
     outfilename = str(output)
@@ -60,6 +71,14 @@ def wibl_proc(input: Path, output: Path, config: Path=None):
 
     except conf.BadConfiguration:
         sys.exit('Error: bad configuration file.')
+    if resync:
+        cfg['resync'] = True
+    if streaming:
+        cfg['streaming'] = True
+    if profile or profile_memory:
+        cfg['profile'] = True
+    if profile_memory:
+        cfg['profile_memory'] = True
     
     # The cloud-based code uses environment variables to provide some of the configuration,
     # so we need to add this to the local environment to compensate.
@@ -72,5 +91,9 @@ def wibl_proc(input: Path, output: Path, config: Path=None):
     controller = LocalController(cfg)
     notifier = LocalNotifier(cfg['notification']['converted'])
 
-    if not process_item(data_item, controller, notifier, cfg):
+    with instrumentation.profile(trace_memory=cfg['profile_memory']) if cfg['profile'] else nullcontext() as stages:
+        processed = process_item(data_item, controller, notifier, cfg)
+    if stages is not None:
+        print(stages)
+    if not processed:
         sys.exit('Error: failed to process data (try with verbose option for more information).')
@@ -29,26 +29,71 @@
 # WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
 # OR OTHER DEALINGS IN THE SOFTWARE.
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 import numpy as np
 
+from wibl import get_logger
 from wibl.core.algorithm import SOURCE, AlgorithmPhase, WiblAlgorithm
 from wibl.core import Lineage
 
+logger = get_logger()
+
 __version__ = '1.0.0'
 
 ALG_NAME = 'deduplicate'
 
 
-def find_duplicates(source: Dict, verbose: bool) -> np.ndarray:
-    current_depth = 0
-    d = []
-    for n in range(len(source['depth']['z'])):
-        if source['depth']['z'][n] != current_depth:
-            d.append(n)
-            current_depth = source['depth']['z'][n]
-    rtn = np.array(d)
+def non_duplicate_mask(z: np.ndarray, t: Optional[np.ndarray] = None, *,
+                       tolerance: float = 0.0, time_gap: Optional[float] = None) -> np.ndarray:
+    """
+    Determine which depths are not duplicates of the last depth kept.  A depth is a duplicate if it is the same
+    as the last depth kept (to within ``tolerance``, if specified) and, if ``time_gap`` is specified, was observed
+    no more than ``time_gap`` seconds after the depth before it.  For compatibility with earlier versions, the
+    first depth is compared with a depth of zero (at no particular time), so a leading zero depth is dropped.
+
+    Exact repeats of the depth before are always duplicates of the last depth kept, and are found for all of the
+    depths at once.  With a tolerance, the remaining depths are compared in turn with the last depth kept, so that
+    a slowly changing depth is kept each time that it has moved more than ``tolerance`` from it; this is a loop in
+    Python over the depths that aren't exact repeats, and so is not vectorised.
+
+    :param z: Array of depths.
+    :param t: Array of times of the depths (seconds), required if ``time_gap`` is specified.
+    :param tolerance: Largest difference from the last depth kept for a depth to be considered the same.
+    :param time_gap: Largest interval between consecutive depths for them to be considered duplicates, or None
+        for any interval.
+    :return: Boolean array that is True for the depths to keep.
+    """
+    z = np.asarray(z)
+    previous = np.empty_like(z)
+    previous[:1] = 0
+    previous[1:] = z[:-1]
+    close = np.ones(len(z), dtype=bool)
+    if time_gap is not None:
+        close[1:] = np.diff(np.asarray(t)) <= time_gap
+    keep = ~((z == previous) & close)
+    if tolerance <= 0:
+        return keep
+
+    candidates = np.flatnonzero(keep)
+    kept = []
+    last = 0.0
+    for n, depth, near in zip(candidates.tolist(), z[candidates].tolist(), close[candidates].tolist()):
+        # Infinite depths are only the same if they're equal, since their difference is NaN
+        if near and (depth == last or abs(depth - last) <= tolerance):
+            continue
+        kept.append(n)
+        last = depth
+    keep = np.zeros(len(z), dtype=bool)
+    keep[kept] = True
+    return keep
+
+
+def find_duplicates(source: Dict, verbose: bool, *,
+                    tolerance: float = 0.0, time_gap: Optional[float] = None) -> np.ndarray:
+    # The times are only read if there's a time gap to check, since reading them can force interpolation
+    t = source['depth']['t'] if time_gap is not None else None
+    rtn = np.flatnonzero(non_duplicate_mask(source['depth']['z'], t, tolerance=tolerance, time_gap=time_gap))
     if verbose:
         n_ip_points = len(source['depth']['z'])
         n_op_points = len(rtn)
@@ -56,19 +101,55 @@ def find_duplicates(source: Dict, verbose: bool) -> np.ndarray:
     return rtn
 
 
+def parse_params(params: str, errors: Optional[List[str]] = None) -> Dict[str, float]:
+    """
+    Parse the parameters for the algorithm from the string of comma-separated key=value pairs in the
+    algorithm descriptor (e.g., 'tolerance=0.01,time_gap=2.0').
+
+    :param params: Parameter string for the algorithm (empty for the defaults).
+    :param errors: List to which to append a description of each parameter that can't be used (which is then
+        left out of the result), or None to raise an exception for the first.
+    :return: Dictionary of keyword arguments for ``non_duplicate_mask()``.
+    :raises:
+        ValueError: If a parameter is unknown, or its value is not a number, and ``errors`` is None.
+    """
+    rtn = {}
+    for kvp in filter(None, (p.strip() for p in params.split(','))):
+        key, _, value = kvp.partition('=')
+        key = key.strip()
+        if key not in ('tolerance', 'time_gap'):
+            error = f"Unknown parameter '{key}' for algorithm {ALG_NAME}."
+        else:
+            try:
+                rtn[key] = float(value)
+                continue
+            except ValueError:
+                error = f"Value '{value.strip()}' for parameter '{key}' of algorithm {ALG_NAME} is not a number."
+        if errors is None:
+            raise ValueError(error)
+        errors.append(error)
+    return rtn
+
+
 def deduplicate_depth(source: Dict[str,Any], params: str,  lineage: Lineage, verbose: bool) -> Dict[str,Any]:
     n_ip_points = len(source['depth']['z'])
-    index = find_duplicates(source, verbose)
-    source['depth']['t'] = source['depth']['t'][index]
-    source['depth']['lat'] = source['depth']['lat'][index]
-    source['depth']['lon'] = source['depth']['lon'][index]
-    source['depth']['z'] = source['depth']['z'][index]
+    # The parameters come from the data file, so any that can't be used are ignored (and noted in the lineage)
+    # rather than stopping the file from being processed
+    errors = []
+    index = find_duplicates(source, verbose, **parse_params(params, errors))
+    for error in errors:
+        logger.warning(f'{error} Ignoring it.')
+    for name in list(source['depth']):
+        source['depth'][name] = source['depth'][name][index]
     
     # To memorialise that we did something, we add an entry to the lineage segment of
     # the metadata headers in the data.
     n_op_points = len(source['depth']['z'])
+    comment = f'Selected {n_op_points} non-duplicate depths from {n_ip_points} in input.'
+    if errors:
+        comment += ' Ignored parameters: ' + ' '.join(errors)
     lineage.add_algorithm_element(name=ALG_NAME, parameters=params, source=SOURCE, version=__version__,
-                                  comment=f'Selected {n_op_points} non-duplicate depths from {n_ip_points} in input.')
+                                  comment=comment)
 
     return source
 
@@ -1,6 +1,7 @@
 from typing import Tuple, List, Dict, Generator, Callable, Union, Any
 
 from wibl.core import Lineage
+from wibl.core.instrumentation import stage
 from wibl.core.logger_file import DataPacket
 from wibl.core.algorithm import WiblAlgorithm, AlgorithmPhase, AlgorithmDescriptor, UnknownAlgorithm
 from wibl.core.algorithm.deduplicate import Deduplicate
@@ -84,8 +85,11 @@ def run_algorithms(data: Union[List[DataPacket], Dict[str, Any]],
     """
     if verbose:
         print(f"Applying requested algorithms for phase {phase} (if any) ...")
-    for algorithm, alg_name, params in iterate(algorithms, phase, filename):
-        if verbose:
-            print(f'Applying algorithm {alg_name}')
-        data = algorithm(data, params, lineage, verbose)
+    with stage(f'algorithms.{phase.name.lower()}') as algorithm_stage:
+        if isinstance(data, list):
+            algorithm_stage.count(len(data))
+        for algorithm, alg_name, params in iterate(algorithms, phase, filename):
+            if verbose:
+                print(f'Applying algorithm {alg_name}')
+            data = algorithm(data, params, lineage, verbose)
     return data
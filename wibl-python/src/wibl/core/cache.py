@@ -0,0 +1,250 @@
+## \file cache.py
+# \brief On-disk cache of time-interpolated WIBL data, keyed on the content of the file
+#
+# The same WIBL file is often processed more than once (e.g., when it is uploaded again, when the processing
+# is retried, or when the data are reprocessed after a change in configuration).  The cache here keeps the
+# output of time_interpolation() on disk, keyed on a hash of the content of the file and everything else that
+# determines the output, so that processing the file again can skip decoding and interpolation entirely.
+# The cache is limited in total size, and the least recently used entries are evicted to stay within it.
+#
+# Copyright 2026 Center for Coastal and Ocean Mapping & NOAA-UNH Joint
+# Hydrographic Center, University of New Hampshire.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from wibl import __version__ as wiblversion, get_logger
+from wibl.core import Lineage
+from wibl.core.algorithm import AlgorithmDescriptor
+from wibl.core.algorithm.runner import ALGORITHMS
+import wibl.core.timestamping as ts
+
+logger = get_logger()
+
+## Size of the blocks in which files are read to compute their hash
+_HASH_BLOCK_SIZE = 1 << 20
+
+## Keyword arguments to time_interpolation() that change its output, with their defaults
+#
+# The other arguments ('verbose', 'fault_limit', 'streaming') only change how the output is computed.
+_OUTPUT_KWARGS = {
+    'process_algorithms': True,
+    'strict_mode': False,
+    'resync': False,
+    'channels': None
+}
+
+## Suffix of the files holding the entries in the cache
+_ENTRY_SUFFIX = '.npz'
+
+## Encode the values in the output of time_interpolation() that JSON can't represent directly
+def _encode(obj: Any) -> Any:
+    if isinstance(obj, AlgorithmDescriptor):
+        return {'__algorithm__': [obj.name, obj.params]}
+    raise TypeError(f'{type(obj).__name__} cannot be cached')
+
+## Decode the values encoded by _encode()
+def _decode(obj: Dict[str, Any]) -> Any:
+    if '__algorithm__' in obj:
+        return AlgorithmDescriptor(*obj['__algorithm__'])
+    return obj
+
+## Content-addressed on-disk cache for the output of time_interpolation()
+#
+# Each entry is a NumPy .npz archive (uncompressed) holding the arrays of the output, along with a JSON header
+# with the rest of the output, and the lineage elements that processing the file added.  The key for an entry is a
+# SHA-256 hash of the content of the WIBL file (which includes any algorithm descriptors in the file), the names of
+# the algorithms known to the code, the elapsed time quantum, the keyword arguments that change the output, and the
+# version of the package.  Since entries are written to a temporary file and then renamed into place, the cache can
+# be shared between processes.
+#    The most recent use of each entry is recorded in its modification time, and when an entry is added, the least
+# recently used entries are removed until the total size of the entries is within the limit.  The number of hits,
+# misses, and evictions for this object are counted.
+class InterpolationCache:
+    ## Constructor, with the directory to hold the cache, and the limit on its size
+    #
+    # \param directory  Directory in which to keep the entries (created if it doesn't exist)
+    # \param max_bytes  Limit on the total size of the entries in the cache, in bytes
+    def __init__(self, directory: Union[str, Path], max_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        ## Number of calls satisfied from the cache
+        self.hits = 0
+        ## Number of calls that had to process the file
+        self.misses = 0
+        ## Number of entries removed to keep the cache within its size limit
+        self.evictions = 0
+
+    ## Compute the key for the output of time_interpolation() for a file
+    #
+    # \param filename               Local filename for the source WIBL file
+    # \param elapsed_time_quantum   Maximum value that can be represented by the elapsed times in the packets
+    # \param kwargs                 Keyword dictionary for time_interpolation()
+    # \return Hexadecimal string of the key
+    def key(self, filename: str, elapsed_time_quantum: int, **kwargs) -> str:
+        content = hashlib.sha256()
+        with open(filename, 'rb') as f:
+            while block := f.read(_HASH_BLOCK_SIZE):
+                content.update(block)
+        options = {name: kwargs.get(name, default) for name, default in _OUTPUT_KWARGS.items()}
+        if options['channels'] is not None:
+            options['channels'] = list(options['channels'])
+        description = json.dumps({
+            'content': content.hexdigest(),
+            'algorithms': sorted(ALGORITHMS),
+            'elapsed_time_quantum': elapsed_time_quantum,
+            'options': options,
+            'version': wiblversion
+        }, sort_keys=True)
+        return hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+    ## Construct the interpolated observation data for a WIBL file, from the cache if possible
+    #
+    # This has the same interface as time_interpolation(), and raises the same exceptions, except that each channel
+    # in the output is a plain dictionary of arrays (see timestamping.materialise()) whether or not the output came
+    # from the cache.  On a hit, the lineage elements recorded when the file was processed are added to \a lineage.
+    # Output that can't be represented in the cache, or can't be written to it (e.g., if the disk is full), is
+    # returned without being added.
+    #
+    # \param filename               Local filename for the source WIBL file
+    # \param lineage                `wibl.core.Lineage` instance used to track any processing done on the data
+    # \param elapsed_time_quantum   Maximum value that can be represented by the elapsed times in the packets
+    # \param kwargs                 Keyword dictionary for time_interpolation()
+    # \return Dictionary mapping identification names for the various datasets to the interpolated data arrays
+    def time_interpolation(self, filename: str, lineage: Lineage, elapsed_time_quantum: int,
+                           **kwargs) -> Dict[str, Any]:
+        entry = Path(self.directory, self.key(filename, elapsed_time_quantum, **kwargs) + _ENTRY_SUFFIX)
+        cached = self._load(entry)
+        if cached is not None:
+            self.hits += 1
+            source_data, elements = cached
+            for element in elements:
+                lineage.add_element(element)
+            return source_data
+
+        self.misses += 1
+        start = len(lineage.lineage)
+        source_data = ts.materialise(ts.time_interpolation(filename, lineage, elapsed_time_quantum, **kwargs))
+        self._store(entry, source_data, lineage.lineage[start:])
+        return source_data
+
+    ## Determine the total size of the entries in the cache
+    #
+    # \return Total size of the entries, in bytes
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    ## List the entries in the cache
+    #
+    # \return List of (path, size in bytes, time of last use) for each entry
+    def _entries(self) -> List[Tuple[Path, int, float]]:
+        rtn = []
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if item.name.endswith(_ENTRY_SUFFIX):
+                    try:
+                        info = item.stat()
+                    except FileNotFoundError:
+                        continue    # Removed by another process
+                    rtn.append((Path(item.path), info.st_size, info.st_mtime))
+        return rtn
+
+    ## Read an entry from the cache, and mark it as used
+    #
+    # An entry that can't be read (e.g., one that was truncated) is removed, so that it can be replaced.
+    #
+    # \param entry  Path of the entry
+    # \return Tuple of the output of time_interpolation() and the list of lineage elements for it, or None if there
+    #         is no (readable) entry
+    def _load(self, entry: Path) -> Optional[Tuple[Dict[str, Any], List[Dict]]]:
+        try:
+            with np.load(entry, allow_pickle=False) as archive:
+                header = json.loads(archive['header'].tobytes().decode('utf-8'), object_hook=_decode)
+                source_data = header['skeleton']
+                for n, (key, variable) in enumerate(header['layout']):
+                    source_data[key][variable] = archive[f'a{n}']
+            os.utime(entry)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            logger.warning(f'Interpolation cache entry {entry} is unreadable ({e}); removing it.')
+            try:
+                entry.unlink()
+            except OSError:
+                pass
+            return None
+        return source_data, header['lineage']
+
+    ## Write an entry to the cache, and evict the least recently used entries if the cache is too large
+    #
+    # Failing to write the entry (e.g., if the disk is full, or the directory is read-only) is logged, but otherwise
+    # ignored, since the output can still be used.
+    #
+    # \param entry          Path of the entry
+    # \param source_data    Output of time_interpolation()
+    # \param elements       List of lineage elements added by time_interpolation()
+    def _store(self, entry: Path, source_data: Dict[str, Any], elements: List[Dict]) -> None:
+        skeleton, arrays = ts.separate_arrays(source_data)
+        try:
+            header = json.dumps({
+                'skeleton': skeleton,
+                'layout': [[key, variable] for key, variable, _ in arrays],
+                'lineage': elements
+            }, default=_encode)
+        except (TypeError, ValueError):
+            return
+        contents = {f'a{n}': data for n, (_, _, data) in enumerate(arrays)}
+        contents['header'] = np.frombuffer(header.encode('utf-8'), dtype=np.uint8)
+        try:
+            fd, temporary = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez(f, **contents)
+                os.replace(temporary, entry)
+            except BaseException:
+                os.unlink(temporary)
+                raise
+            self._evict()
+        except OSError as e:
+            logger.warning(f'Failed to write interpolation cache entry {entry}: {e}')
+
+    ## Remove the least recently used entries until the cache is within its size limit
+    def _evict(self) -> None:
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in sorted(entries, key=lambda e: e[2]):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
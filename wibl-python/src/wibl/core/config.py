@@ -104,6 +104,19 @@ def read_config(config_file: Union[Path, str] = None) -> Dict[str, Any]:
             fault_limit             Limit on number of fault messages that are reported before starting to summarise
             strict_mode             Boolean for strict mode processing (default: False).  When False, processing of
                                         WIBL data packets will continue if a bad packet is encountered.
+            resync                  Boolean to recover from corrupt data in WIBL files by skipping to the next
+                                        plausible packet header (default: False)
+            streaming               Boolean to process WIBL files in two streaming passes, rather than loading all
+                                        of the packets into memory (default: False)
+            cache_dir               Directory for an on-disk cache of time-interpolated data, so that files that
+                                        are processed again don't have to be decoded (default: '', no cache)
+            cache_size_mb           Limit on the total size of the cache in MB, beyond which the least recently
+                                        used entries are removed (default: 1024)
+            profile                 Boolean to record the time used by each stage of processing, and attach it
+                                        to the record for the file (default: False)
+            profile_memory          Boolean to also record the peak memory used by each stage when profiling; this
+                                        slows processing considerably, so the times are then not representative
+                                        (default: False)
        
        This code reads the JSON file with these parameters, and does appropriate translations to them so
        that the rest of the code can just read from the resulting dictionary.
@@ -131,6 +144,18 @@ def read_config(config_file: Union[Path, str] = None) -> Dict[str, Any]:
             config['strict_mode'] = False
         if 'management_url' not in config:
             config['management_url'] = ''
+        if 'resync' not in config:
+            config['resync'] = False
+        if 'streaming' not in config:
+            config['streaming'] = False
+        if 'cache_dir' not in config:
+            config['cache_dir'] = ''
+        if 'cache_size_mb' not in config:
+            config['cache_size_mb'] = 1024
+        if 'profile' not in config:
+            config['profile'] = False
+        if 'profile_memory' not in config:
+            config['profile_memory'] = False
 
         return config
 
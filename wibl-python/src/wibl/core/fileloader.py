@@ -32,17 +32,21 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
 # OR OTHER DEALINGS IN THE SOFTWARE.
 
+from dataclasses import dataclass
 from enum import Enum
-from typing import List, Tuple
-import datetime as dt
+import io
+from typing import Iterable, Iterator, List, Optional, Tuple
 
+import numpy as np
 import pynmea2 as nmea
 
 from wibl.core import Lineage
+from wibl.core.instrumentation import split_stage, stage
 from wibl.core.statistics import PktStats, PktFaults
 import wibl.core.logger_file as LoggerFile
-from wibl.core.algorithm import AlgorithmPhase, AlgorithmDescriptor
-from wibl.core.algorithm.runner import run_algorithms
+import wibl.core.nmea0183 as nmea0183
+from wibl.core.algorithm import AlgorithmPhase, AlgorithmDescriptor, UnknownAlgorithm
+from wibl.core.algorithm.runner import iterate, run_algorithms
 
 
 ## Exception to report that no adequate source of real-world time information is available
@@ -103,24 +107,300 @@ def determine_time_source(stats: PktStats) -> TimeSource:
         raise NoTimeSource()
     return rtn
 
+## Results from reading a WIBL file
+@dataclass
+class _ReadResult:
+    ## Packets that passed tabulation
+    packets: List[LoggerFile.DataPacket]
+    ## Packets dropped during tabulation (NMEA0183 strings that can't be decoded), with their position in the file
+    dropped: List[Tuple[int, LoggerFile.DataPacket]]
+    ## Algorithm requests seen
+    algorithms: List[AlgorithmDescriptor]
+    ## Statistics on the packets seen while reading (i.e., algorithm requests, and corrupt data skipped)
+    read_stats: PktStats
+    ## Statistics on the packets seen during tabulation
+    stats: PktStats
+    ## Flag: True if any of the packets has no elapsed time
+    needs_elapsed_time_fixup: bool
+
+## Read and tabulate all of the packets from a WIBL file in a single pass
+#
+# Each packet is tabulated as it is read: algorithm requests are noted, statistics are recorded on the packets seen,
+# and NMEA0183 packets are tracked by their sentence name.  Packets that can't be used (NMEA0183 strings where the
+# name can't be decoded) are set aside with their position in the file, so that the original sequence of packets
+# can be reconstituted if there are algorithms to run on it (see _restore_dropped()).
+#
+# \param filename       Filename to load for WIBL data
+# \param verbose        Flag: set True to report progress
+# \param maxreports     Limit on how many errors should be reported before suppressing and summarising
+# \param strict_mode    If True, raise exception if an error is encountered loading a packet.
+# \param memory_map     Flag: set True to memory-map the file and decode packets only when they are used (ignored if
+#                       the file is compressed)
+# \param resync         If True, skip forward from corrupt packet headers to the next plausible one, noting the bytes
+#                       skipped in the statistics
+# \return _ReadResult for the packets read
+def _load_packets(filename: str, verbose: bool, maxreports: int, *,
+                  strict_mode: bool = False,
+                  memory_map: bool = False,
+                  resync: bool = False) -> _ReadResult:
+    read_stats = PktStats(maxreports)
+    stats = PktStats(maxreports)
+    packets: List[LoggerFile.DataPacket] = []
+    dropped: List[Tuple[int, LoggerFile.DataPacket]] = []
+    algorithms: List[AlgorithmDescriptor] = []
+    needs_elapsed_time_fixup = False
+    packet_count = 0
+    with open(filename, 'rb') as file:
+        if memory_map and LoggerFile.compression_format(file) is None:
+            # The memory map outlives the file object, and is released with the last packet view from it
+            source = LoggerFile.MappedPacketReader(file, strict_mode=strict_mode, resync=resync)
+        else:
+            source = LoggerFile.PacketFactory(file, strict_mode=strict_mode, resync=resync)
+        for raw_index, pkt in enumerate(source.iter_packets()):
+            if isinstance(pkt, LoggerFile.SerialString):
+                # We need to pull out the NMEA0183 recognition string
+                try:
+                    name = pkt.data[3:6].decode('UTF-8')
+                    stats.Observed(name)
+                except UnicodeDecodeError:
+                    stats.Fault(str(pkt), PktFaults.DecodeFault)
+                    dropped.append((raw_index, pkt))
+                    continue
+            else:
+                name = pkt.name()
+                stats.Observed(name)
+                # Check for algorithm packet
+                if isinstance(pkt, LoggerFile.AlgorithmRequest):
+                    read_stats.Observed(name)
+                    algorithms.append(AlgorithmDescriptor(name=pkt.algorithm.decode('UTF-8'),
+                                                          params=pkt.parameters.decode('UTF-8'))
+                    )
+            packet_count += 1
+            if pkt.elapsed == 0:
+                needs_elapsed_time_fixup = True
+            if verbose and packet_count % 50000 == 0:
+                print(f'Reading file: passing {packet_count} packets ...')
+            packets.append(pkt)
+        for skip_start, skip_end in source.skipped:
+            read_stats.Skipped(skip_start, skip_end)
+    return _ReadResult(packets, dropped, algorithms, read_stats, stats, needs_elapsed_time_fixup)
+
+## Reconstitute the sequence of packets read from a file, including those dropped during tabulation
+#
+# \param result (_ReadResult) Packets read from the file
+# \return List of all packets read, in the order in which they appeared in the file
+def _restore_dropped(result: _ReadResult) -> List[LoggerFile.DataPacket]:
+    if not result.dropped:
+        return list(result.packets)
+    packets_raw: List[LoggerFile.DataPacket] = []
+    used = 0
+    for raw_index, pkt in result.dropped:
+        count = raw_index - len(packets_raw)
+        packets_raw.extend(result.packets[used:used + count])
+        used += count
+        packets_raw.append(pkt)
+    packets_raw.extend(result.packets[used:])
+    return packets_raw
+
+## Record statistics on the packets read from a file, and filter out any that can't be used
+#
+# This is the second pass that is needed only if algorithms have been run on the packets after they were read,
+# since they might have changed the packets; otherwise the tabulation is done as the packets are read.
+# NMEA0183 packets are tracked by their sentence name, and are removed from the list if the name can't be decoded.
+#
+# \param packets_raw    List of packets read from the file
+# \param stats          (PktStats) Statistics object to record the packets seen
+# \param verbose        Flag: set True to report progress
+# \return Tuple of the list of usable packets, and a flag that is True if any of them has no elapsed time
+def _tabulate_packets(packets_raw: List[LoggerFile.DataPacket], stats: PktStats, verbose: bool) -> \
+        Tuple[List[LoggerFile.DataPacket], bool]:
+    packets: List[LoggerFile.DataPacket] = []
+    needs_elapsed_time_fixup = False
+    packet_count = 0
+    for pkt in packets_raw:
+        if isinstance(pkt, LoggerFile.SerialString):
+            # We need to pull out the NMEA0183 recognition string
+            try:
+                name = pkt.data[3:6].decode('UTF-8')
+                stats.Observed(name)
+            except UnicodeDecodeError:
+                stats.Fault(str(pkt), PktFaults.DecodeFault)
+                continue
+        else:
+            stats.Observed(pkt.name())
+        packet_count += 1
+        if pkt.elapsed == 0:
+            needs_elapsed_time_fixup = True
+        if verbose and packet_count % 50000 == 0:
+            print(f'Reading file: passing {packet_count} packets ...')
+        packets.append(pkt)
+    return packets, needs_elapsed_time_fixup
+
+## Determine whether there are algorithms to run on the packets as they are loaded
+#
+# \param alg_desc   List of AlgorithmDescriptor for the algorithms requested in the file
+# \param filename   Filename of the WIBL file (for reporting)
+# \return True if any of the algorithms applies in the AlgorithmPhase.ON_LOAD phase, or is not known (so that
+#         run_algorithms() can report it)
+def _has_load_algorithms(alg_desc: List[AlgorithmDescriptor], filename: str) -> bool:
+    try:
+        return any(True for _ in iterate(alg_desc, AlgorithmPhase.ON_LOAD, filename))
+    except UnknownAlgorithm:
+        return True
+
+## Assign an elapsed time to a NMEA0183 timing packet from its real-time timestamp
+#
+# The first timestamp decoded defines the zero point of elapsed time; subsequent packets have elapsed times in
+# milliseconds from this point.  Packets that can't be decoded are noted as faults in the statistics, and left as is.
+#
+# \param pkt                    (SerialString) Packet to update
+# \param msg_id                 NMEA0183 sentence name for the packet
+# \param stats                  (PktStats) Statistics object in which to note any faults
+# \param verbose                Flag: set True to report decoding errors
+# \param realtime_elapsed_zero  Real-time (seconds since the epoch) associated with zero elapsed time, or None if not
+#                               yet established
+# \return Tuple of the (possibly updated) real-time associated with zero elapsed time, and a flag that is True if the
+#         packet was processed without error
+def _assign_nmea_elapsed_time(pkt: LoggerFile.SerialString, msg_id: str, stats: PktStats, verbose: bool,
+                              realtime_elapsed_zero: Optional[float]) -> Tuple[Optional[float], bool]:
+    if len(pkt.data) < 11:
+        if verbose and stats.FaultCount(msg_id) < stats.fault_limit:
+            print(f'Error: short message {pkt.data}; ignoring.')
+        stats.Fault(msg_id, PktFaults.ShortMessage)
+        return realtime_elapsed_zero, True
+    try:
+        parsed = nmea0183.parse(pkt.data, (msg_id,))
+        if parsed is not None and parsed[1][0] is not None:
+            pkt_real_time = parsed[1][0]
+            if realtime_elapsed_zero is None:
+                realtime_elapsed_zero = pkt_real_time
+                pkt.elapsed = 0
+            else:
+                pkt.elapsed = 1000.0*(pkt_real_time - realtime_elapsed_zero)
+    except UnicodeDecodeError:
+        if verbose and stats.FaultCount(msg_id) < stats.fault_limit:
+            print(f'Error: unicode decode failure on NMEA string; ignoring.')
+        stats.Fault(msg_id, PktFaults.DecodeFault)
+        return realtime_elapsed_zero, False
+    except nmea.ParseError:
+        if verbose and stats.FaultCount(msg_id) < stats.fault_limit:
+            print(f'Error: parse error in NMEA string {pkt.data}; ignoring.')
+        stats.Fault(msg_id, PktFaults.ParseFault)
+        return realtime_elapsed_zero, False
+    except TypeError:
+        if verbose and stats.FaultCount(msg_id) < stats.fault_limit:
+            print(f'Error: type error unpacking NMEA string; ignoring.')
+        stats.Fault(msg_id, PktFaults.TypeFault)
+        return realtime_elapsed_zero, False
+    return realtime_elapsed_zero, True
+
+## Determine the NMEA0183 sentence that provides real-time timestamps for a time source
+#
+# \param timesource (TimeSource) Source of real-world time information for the file
+# \return Sentence name ('ZDA' or 'RMC'), or None if the time source isn't NMEA0183
+def _time_message_id(timesource: TimeSource) -> Optional[str]:
+    if timesource == TimeSource.Time_ZDA:
+        return 'ZDA'
+    if timesource == TimeSource.Time_RMC:
+        return 'RMC'
+    return None
+
+## Assign an elapsed time to a NMEA0183 packet with no elapsed time, if it is the sentence used for timing
+#
+# \param pkt                    (SerialString) Packet with no elapsed time
+# \param time_msg_id            Sentence name of the packets used for timing (see _time_message_id())
+# \param stats                  (PktStats) Statistics object in which to note any faults
+# \param verbose                Flag: set True to report decoding errors
+# \param realtime_elapsed_zero  Real-time (seconds since the epoch) associated with zero elapsed time, or None if not
+#                               yet established
+# \return Real-time associated with zero elapsed time (updated if this is the first timing packet decoded)
+def _fix_nmea_elapsed_time(pkt: LoggerFile.SerialString, time_msg_id: str, stats: PktStats, verbose: bool,
+                           realtime_elapsed_zero: Optional[float]) -> Optional[float]:
+    msg_id = pkt.data[3:6].decode('UTF-8')
+    processed = True
+    if msg_id == time_msg_id:
+        realtime_elapsed_zero, processed = _assign_nmea_elapsed_time(pkt, msg_id, stats, verbose,
+                                                                     realtime_elapsed_zero)
+    if processed and stats.FaultCount(msg_id) >= stats.fault_limit:
+        print(f'Warning: too many errors on NMEA0183 packet {msg_id}; suppressing further reporting.')
+    return realtime_elapsed_zero
+
+## Compute elapsed times for runs of packets that don't have them, from the packets that bracket each run
+#
+# Each run of zero elapsed times is assigned the mean of the elapsed times of the packets immediately before and
+# after it, so long as the one before is positive.  Runs that can't be bracketed like this (including those at the
+# start or end of the data), or where the mean is zero, have no elapsed time, which is reported as NaN.
+#
+# \param elapsed    (np.ndarray) Elapsed times of the packets, with zero for those that don't have them
+# \return Tuple of the indices of the packets with zero elapsed time, and the elapsed times (or NaN) to assign to them
+def _bracket_elapsed_times(elapsed: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    zero_index = np.flatnonzero(elapsed == 0)
+    if len(zero_index) == 0:
+        return zero_index, np.empty(0)
+    breaks = np.flatnonzero(np.diff(zero_index) > 1) + 1
+    run_starts = zero_index[np.concatenate(([0], breaks))]
+    run_ends = zero_index[np.concatenate((breaks - 1, [len(zero_index) - 1]))]
+    before = run_starts - 1
+    after = run_ends + 1
+    n_packets = len(elapsed)
+    predecessor = elapsed[np.maximum(before, 0)]
+    successor = elapsed[np.minimum(after, n_packets - 1)]
+    bracketed = (before >= 0) & (after < n_packets) & (predecessor > 0)
+    target = np.where(bracketed, (predecessor + successor)/2.0, np.nan)
+    target[target == 0] = np.nan
+    return zero_index, np.repeat(target, run_ends - run_starts + 1)
+
+## Fabricate elapsed times for packets that don't have them
+#
+# If NMEA0183 strings are being used for timing, packets with no elapsed time can be assigned one from their
+# real-time timestamp.  Any packets still without elapsed times are then assigned the mean of the elapsed times of
+# the nearest packets (ahead and behind) that have them, so long as the one behind is positive; packets that can't be
+# bracketed like this are left with an elapsed time of None to make sure that there's no question that they're not
+# valid.  The bracketing is done on an array of the elapsed times (see _bracket_elapsed_times()), so only the packets
+# with no elapsed time are visited after the array is constructed.
+#
+# \param packets    List of packets to update in place
+# \param timesource (TimeSource) Source of real-world time information for the file
+# \param stats      (PktStats) Statistics object in which to note any faults
+# \param verbose    Flag: set True to report decoding errors
+def _fix_elapsed_times(packets: List[LoggerFile.DataPacket], timesource: TimeSource, stats: PktStats,
+                       verbose: bool) -> None:
+    elapsed = np.fromiter((pkt.elapsed for pkt in packets), dtype=np.float64, count=len(packets))
+    time_msg_id = _time_message_id(timesource)
+    if time_msg_id is not None:
+        realtime_elapsed_zero = None
+        for n in np.flatnonzero(elapsed == 0).tolist():
+            pkt = packets[n]
+            if isinstance(pkt, LoggerFile.SerialString):
+                realtime_elapsed_zero = _fix_nmea_elapsed_time(pkt, time_msg_id, stats, verbose,
+                                                               realtime_elapsed_zero)
+                elapsed[n] = pkt.elapsed
+    zero_index, target = _bracket_elapsed_times(elapsed)
+    values = target.astype(object)
+    values[np.isnan(target)] = None
+    for n, value in zip(zero_index.tolist(), values.tolist()):
+        packets[n].elapsed = value
+
 ## Load the contents of a WIBL file and patch up any missing elapsed time entries
 #
-# We need to work over the data in a number of stages, so to avoid having to read the file
-# more than once, we load all of the packets into memory first.  This allows the code to
-# estimate statistics on how many packets have been read, and of what types (and if they have
-# faults in their interpretation), and also to patch up any missing elapsed time entries on
-# the packets (which can happen if another logger's data is translated into WIBL format for
-# processing).
+# The packets are read from the file and tabulated in a single pass, estimating statistics on how many packets have
+# been read, and of what types (and if they have faults in their interpretation).  If required, a second pass over the
+# packets patches up any missing elapsed time entries (which can happen if another logger's data is translated into
+# WIBL format for processing).
 #
 # \param filename       Filename to load for WIBL data
 # \param verbose        Flag: set True to report more information on parsing.
 # \param maxreports     Limit on how many errors should be reported before suppressing and summarising
 # \param process_algorithms Flag: set to True to enable execution of algorithms for phase `AlgorithmPhase.ON_LOAD`
 # \param strict_mode If True, raise exception if an error is encountered loading a packet. If False, print a warning message about the packet loading error.
+# \param memory_map Flag: set True to memory-map the file and decode packets only when they are used
+# \param resync     Flag: set True to skip forward from corrupt packet headers to the next plausible packet header
 # \return Tuple of PktStats, TimeSource, a list of DataPacket, and a list of AlgorithmDescriptor entries from the file
 def load_file(filename: str, lineage: Lineage, verbose: bool, maxreports: int, *,
               process_algorithms: bool = True,
-              strict_mode: bool = False) -> \
+              strict_mode: bool = False,
+              memory_map: bool = False,
+              resync: bool = False) -> \
         Tuple[PktStats, TimeSource, List[LoggerFile.DataPacket], List[AlgorithmDescriptor]]:
     """Load the entirety of a WIBL binary file into memory, in the process determining the type of time
        source that can be used to add timestamps to the data, and fixing up any messages that don't have
@@ -134,6 +414,12 @@ def load_file(filename: str, lineage: Lineage, verbose: bool, maxreports: int, *
             verbose         Flag: set True to extra information on the process
             maxreports      Maximum number of errors per packet to report before summarising
             process_algorithms Flag: set to True to enable execution of algorithms for phase `AlgorithmPhaseON_LOAD`
+            memory_map      Flag: set True to memory-map the file, so that packets are only decoded when used
+            resync          Flag: set True to recover from corrupt data by skipping forward to the next plausible
+                            packet header; the byte ranges skipped are reported in the statistics
+
+        The file may be compressed with gzip, xz, or zstd (detected automatically), in which case it is decompressed
+        as it is read; memory_map is ignored for compressed files, which can only be read sequentially.
 
         Outputs:
             stats           (PktStats) Statistics on which packets have been seen, and any problems
@@ -142,58 +428,39 @@ def load_file(filename: str, lineage: Lineage, verbose: bool, maxreports: int, *
             alg_desc        List[AlgorithmDescriptor] List of algorithms derived from the WIBL file
     """
     stats: PktStats = PktStats(maxreports)
-    packets: List[LoggerFile.DataPacket] = []
     alg_desc: List[AlgorithmDescriptor]
 
-    # First read all packets into packets_raw so that we can find algorithm packets
-    packets_raw: List[LoggerFile.DataPacket] = []
-    algorithms_raw = []
-    with open(filename, 'rb') as file:
-        source = LoggerFile.PacketFactory(file, strict_mode=strict_mode)
-        while source.has_more():
-            pkt = source.next_packet()
-            if pkt is not None:
-                packets_raw.append(pkt)
-                # Check for algorithm packet
-                if isinstance(pkt, LoggerFile.AlgorithmRequest):
-                    stats.Observed(pkt.name())
-                    algorithms_raw.append(AlgorithmDescriptor(name=pkt.algorithm.decode('UTF-8'),
-                                                              params=pkt.parameters.decode('UTF-8'))
-                    )
+    # Read and tabulate the packets in a single pass
+    with stage('read') as read_stage:
+        result = _load_packets(filename, verbose, maxreports, strict_mode=strict_mode, memory_map=memory_map,
+                               resync=resync)
+        read_stage.count(len(result.packets))
+    stats.merge(result.read_stats)
     # Store algorithm descriptors in a list using value-less dict, which are ordered by key,
     # to filter duplicates without using a set, which does not preserve order
-    alg_desc = list(dict.fromkeys(algorithms_raw))
-    del algorithms_raw
+    alg_desc = list(dict.fromkeys(result.algorithms))
 
-    if process_algorithms:
+    if process_algorithms and _has_load_algorithms(alg_desc, filename):
+        # The algorithms need to see all of the packets as read, and might change them, so the tabulation
+        # done while reading can't be used
+        packets_raw: List[LoggerFile.DataPacket] = _restore_dropped(result)
+        del result
         packets_raw = run_algorithms(packets_raw,
                                      alg_desc,
                                      AlgorithmPhase.ON_LOAD,
                                      filename,
                                      lineage,
                                      verbose)
-
-    # Now iterate over stored packets to record stats needed for timestamp interpolation
-    needs_elapsed_time_fixup = False
-    packet_count = 0
-    for pkt in packets_raw:
-        if isinstance(pkt, LoggerFile.SerialString):
-            # We need to pull out the NMEA0183 recognition string
-            try:
-                name = pkt.data[3:6].decode('UTF-8')
-                stats.Observed(name)
-            except UnicodeDecodeError:
-                stats.Fault(str(pkt), PktFaults.DecodeFault)
-                continue
-        else:
-            stats.Observed(pkt.name())
-        packet_count += 1
-        if pkt.elapsed == 0:
-            needs_elapsed_time_fixup = True
-        if verbose and packet_count % 50000 == 0:
-            print(f'Reading file: passing {packet_count} packets ...')
-        packets.append(pkt)
-    del packets_raw
+        packets, needs_elapsed_time_fixup = _tabulate_packets(packets_raw, stats, verbose)
+        del packets_raw
+    else:
+        if process_algorithms:
+            # Nothing to run, but this reports the phase as usual
+            run_algorithms([], alg_desc, AlgorithmPhase.ON_LOAD, filename, lineage, verbose)
+        packets = result.packets
+        stats.merge(result.stats)
+        needs_elapsed_time_fixup = result.needs_elapsed_time_fixup
+        del result
 
     # We need some form of connection from elapsed time stamps (i.e., when the packet is received
     # at the logger) and a real time, so that we can interpolate to real-time information for all
@@ -210,72 +477,278 @@ def load_file(filename: str, lineage: Lineage, verbose: bool, maxreports: int, *
     # some point between bordering timestamped data.  It's messy, but it's the best you're going
     # to get from loggers that don't record decent data ...
     if needs_elapsed_time_fixup:
-        if timesource == TimeSource.Time_ZDA or timesource == TimeSource.Time_RMC:
-            # If we're using NMEA0183 strings for timing, then we have the possibility of there being
-            # packets where there's no elapsed time stamp, and we need to unpack the NMEA string
-            # for its real-time stamp, and then assign an elapsed time based on this.  This sets us up for
-            # generating intermediate elapsed time estimates subsequently.
-            realtime_elapsed_zero = None
-            for n in range(len(packets)):
-                if isinstance(packets[n], LoggerFile.SerialString) and packets[n].elapsed == 0:
-                    # Decode the packet string to identify ZDA/RMC
-                    msg_id = packets[n].data[3:6].decode('UTF-8')
-                    if (msg_id == 'ZDA' and timesource == TimeSource.Time_ZDA) or (msg_id == 'RMC' and timesource == TimeSource.Time_RMC):
-                        if len(packets[n].data) < 11:
-                            if verbose and stats.FaultCount(msg_id) < stats.fault_limit:
-                                print(f'Error: short message {packets[n].data}; ignoring.')
-                            stats.Fault(msg_id, PktFaults.ShortMessage)
-                        else:
-                            try:
-                                msg = nmea.parse(packets[n].data.decode('UTF-8'))
-                                if msg.datestamp is not None and msg.timestamp is not None:
-                                    pkt_real_time = dt.datetime.combine(msg.datestamp, msg.timestamp)
-                                    if realtime_elapsed_zero is None:
-                                        realtime_elapsed_zero = pkt_real_time
-                                        packets[n].elapsed = 0
-                                    else:
-                                        packets[n].elapsed = 1000.0*(pkt_real_time.timestamp() - realtime_elapsed_zero.timestamp())
-                            except UnicodeDecodeError:
-                                if verbose and stats.FaultCount(msg_id) < stats.fault_limit:
-                                    print(f'Error: unicode decode failure on NMEA string; ignoring.')
-                                stats.Fault(msg_id, PktFaults.DecodeFault)
-                                continue
-                            except nmea.ParseError:
-                                if verbose and stats.FaultCount(msg_id) < stats.fault_limit:
-                                    print(f'Error: parse error in NMEA string {packets[n].data}; ignoring.')
-                                stats.Fault(msg_id, PktFaults.ParseFault)
-                                continue
-                            except TypeError:
-                                if verbose and stats.FaultCount(msg_id) < stats.fault_limit:
-                                    print(f'Error: type error unpacking NMEA string; ignoring.')
-                                stats.Fault(msg_id, PktFaults.TypeFault)
-                                continue
-                    if stats.FaultCount(msg_id) >= stats.fault_limit:
-                        print(f'Warning: too many errors on NMEA0183 packet {msg_id}; suppressing further reporting.')
-        
-        # We now need to patch up any packets that don't have an elapsed time using the mean of the
-        # two nearest (ahead and behind) packets with known elapsed times.  The algorithm here finds
-        # pairs of elapsed times, and then fills in all of the packets with no elapsed times between
-        # them.
-        oldest_position = None
-        for n in range(len(packets)):
-            if packets[n].elapsed == 0:
-                if n > 0 and packets[n-1].elapsed > 0:
-                    oldest_position = n - 1
-            else:
-                if oldest_position is not None:
-                    if n - oldest_position > 1:
-                        # This means we hit the end of a potential bracket, so we need to process the elapsed times
-                        target_elapsed_time = (packets[oldest_position].elapsed + packets[n].elapsed)/2.0
-                        for i in range(n - oldest_position - 1):
-                            packets[oldest_position + 1 + i].elapsed = target_elapsed_time
-                        oldest_position = None
-        
-        # Finally, we replace any timestamps that weren't interpolated to make sure that there's no question
-        # that they're not valid.
-        for n in range(len(packets)):
-            #print(f'{n}: {packets[n].elapsed}')
-            if packets[n].elapsed == 0:
-               packets[n].elapsed = None
+        with stage('elapsed_fixup') as fixup_stage:
+            _fix_elapsed_times(packets, timesource, stats, verbose)
+            fixup_stage.count(len(packets))
 
     return stats, timesource, packets, alg_desc
+
+## Exception to report that a file can't be processed in streaming mode, and has to be loaded with load_file()
+class StreamingUnavailable(Exception):
+    pass
+
+## Scan a WIBL file for the information needed before its packets can be streamed
+#
+# This is the first of the two passes over the file used in streaming mode (see stream_packets() for the second).
+# It uses the packet index (see LoggerFile.load_index()), which only requires a walk over the packet headers, to
+# count the packets of each type and to check for packets without elapsed times; the only payload data read are the
+# names of the NMEA0183 sentences, and the algorithm requests.  The statistics are the same as load_file() would
+# report before any elapsed-time fixup.
+#
+# Files that are compressed can't be indexed, and files that request algorithms in phase AlgorithmPhase.ON_LOAD need
+# all of the packets in memory, so StreamingUnavailable is raised for these.
+#
+# \param filename       Filename to scan for WIBL data
+# \param lineage        `wibl.core.Lineage` instance used to track any processing done on data from `filename`
+# \param verbose        Flag: set True to report more information on parsing
+# \param maxreports     Limit on how many errors should be reported before suppressing and summarising
+# \param process_algorithms Flag: set to True to enable execution of algorithms for phase `AlgorithmPhase.ON_LOAD`
+# \param strict_mode    If True, raise exception if an error is encountered loading a packet
+# \return Tuple of PktStats, TimeSource, a list of AlgorithmDescriptor entries from the file, and a flag that is True
+#         if any of the packets has no elapsed time
+@stage('scan')
+def scan_file(filename: str, lineage: Lineage, verbose: bool, maxreports: int, *,
+              process_algorithms: bool = True,
+              strict_mode: bool = False) -> Tuple[PktStats, TimeSource, List[AlgorithmDescriptor], bool]:
+    if LoggerFile.is_compressed(filename):
+        raise StreamingUnavailable('compressed files cannot be indexed')
+    # Entries for the statistics are (position of first packet, name, count), with a count of zero for NMEA0183
+    # strings where the name can't be decoded, so that they can be added in the order seen in the file
+    entries: List[Tuple[int, str, int]] = []
+    algorithms_raw: List[AlgorithmDescriptor] = []
+    with LoggerFile.IndexedPacketReader(filename, strict_mode=strict_mode, save_sidecar=False) as reader:
+        ids = reader.index['id']
+        usable = np.isin(ids, list(LoggerFile.PACKET_REGISTRY))
+        serial = np.flatnonzero(ids == LoggerFile.PacketTypes.SerialString.value)
+        names, inverse = reader.sentence_names(serial)
+        for n, name_bytes in enumerate(names):
+            members = serial[inverse == n]
+            try:
+                entries.append((int(members[0]), name_bytes.decode('UTF-8'), len(members)))
+            except UnicodeDecodeError:
+                usable[members] = False
+                for position in members.tolist():
+                    entries.append((position, str(reader.read_packet(int(reader.index['offset'][position]))), 0))
+        others = np.flatnonzero(usable & (ids != LoggerFile.PacketTypes.SerialString.value))
+        other_ids, first, counts = np.unique(ids[others], return_index=True, return_counts=True)
+        for pkt_id, position, count in zip(other_ids.tolist(), others[first].tolist(), counts.tolist()):
+            entries.append((position, LoggerFile.PACKET_REGISTRY[pkt_id].name(None), count))
+        for pkt in reader.packets(types=(LoggerFile.AlgorithmRequest,)):
+            algorithms_raw.append(AlgorithmDescriptor(name=pkt.algorithm.decode('UTF-8'),
+                                                      params=pkt.parameters.decode('UTF-8')))
+        needs_elapsed_time_fixup = bool(np.any(reader.index['elapsed'][usable] == 0))
+
+    # Algorithm requests are noted once as they are read, and again when tabulated (as in load_file())
+    stats = PktStats(maxreports)
+    if len(algorithms_raw) > 0:
+        stats.Observed(LoggerFile.AlgorithmRequest.name(None), len(algorithms_raw))
+    for _, name, count in sorted(entries):
+        if count == 0:
+            stats.Fault(name, PktFaults.DecodeFault)
+        else:
+            stats.Observed(name, count)
+
+    alg_desc = list(dict.fromkeys(algorithms_raw))
+    if process_algorithms:
+        if _has_load_algorithms(alg_desc, filename):
+            raise StreamingUnavailable('algorithms have to be run on the packets as they are loaded')
+        run_algorithms([], alg_desc, AlgorithmPhase.ON_LOAD, filename, lineage, verbose)
+
+    return stats, determine_time_source(stats), alg_desc, needs_elapsed_time_fixup
+
+## Filter out packets that load_file() would not return (NMEA0183 strings where the name can't be decoded)
+#
+# \param packets    Iterable of packets read from the file
+# \return Generator of the usable packets
+def _usable_packets(packets: Iterable[LoggerFile.DataPacket]) -> Iterator[LoggerFile.DataPacket]:
+    for pkt in packets:
+        if isinstance(pkt, LoggerFile.SerialString):
+            try:
+                pkt.data[3:6].decode('UTF-8')
+            except UnicodeDecodeError:
+                continue
+        yield pkt
+
+## Fabricate elapsed times for packets that don't have them, as the packets are read
+#
+# This gives the same results as _fix_elapsed_times(), but only holds back the packets in each run of packets with
+# no elapsed time until the packet that closes the run is seen, so the memory required is bounded by the longest run.
+# Packets are added one at a time, in file order, and are released as their elapsed times are settled.
+class _ElapsedFixup:
+    ## Constructor, with the time source for the file
+    #
+    # \param timesource (TimeSource) Source of real-world time information for the file
+    # \param stats      (PktStats) Statistics object in which to note any faults
+    # \param verbose    Flag: set True to report decoding errors
+    def __init__(self, timesource: TimeSource, stats: PktStats, verbose: bool) -> None:
+        self.time_msg_id = _time_message_id(timesource)
+        self.stats = stats
+        self.verbose = verbose
+        self.realtime_elapsed_zero = None
+        self.run: List[LoggerFile.DataPacket] = []
+        self.bracket_elapsed = None
+        self.previous_elapsed = None
+
+    ## Add the next packet from the file
+    #
+    # \param pkt    Packet to add
+    # \return List of the packets (in file order) for which the elapsed times are now settled
+    def add(self, pkt: LoggerFile.DataPacket) -> List[LoggerFile.DataPacket]:
+        if self.time_msg_id is not None and pkt.elapsed == 0 and isinstance(pkt, LoggerFile.SerialString):
+            self.realtime_elapsed_zero = _fix_nmea_elapsed_time(pkt, self.time_msg_id, self.stats, self.verbose,
+                                                                self.realtime_elapsed_zero)
+        elapsed = pkt.elapsed
+        rtn = []
+        if elapsed == 0:
+            if len(self.run) == 0:
+                if self.previous_elapsed is not None and self.previous_elapsed > 0:
+                    self.bracket_elapsed = self.previous_elapsed
+                else:
+                    self.bracket_elapsed = None
+            self.run.append(pkt)
+        else:
+            if len(self.run) > 0:
+                if self.bracket_elapsed is None:
+                    target_elapsed_time = None
+                else:
+                    target_elapsed_time = (self.bracket_elapsed + elapsed)/2.0
+                    if target_elapsed_time == 0:
+                        target_elapsed_time = None
+                for held in self.run:
+                    held.elapsed = target_elapsed_time
+                rtn = self.run
+                self.run = []
+            rtn.append(pkt)
+        self.previous_elapsed = elapsed
+        return rtn
+
+    ## Release any packets still held at the end of the file, which can't be given elapsed times
+    #
+    # \return List of the packets held, in file order
+    def finish(self) -> List[LoggerFile.DataPacket]:
+        for held in self.run:
+            held.elapsed = None
+        rtn = self.run
+        self.run = []
+        return rtn
+
+## Fabricate elapsed times for packets that don't have them, as the packets are streamed
+#
+# \param packets    Iterable of packets, in file order
+# \param timesource (TimeSource) Source of real-world time information for the file
+# \param stats      (PktStats) Statistics object in which to note any faults
+# \param verbose    Flag: set True to report decoding errors
+# \return Generator of the packets, in file order, with elapsed times fixed up (see _ElapsedFixup)
+def _stream_elapsed_fixup(packets: Iterable[LoggerFile.DataPacket], timesource: TimeSource, stats: PktStats,
+                          verbose: bool) -> Iterator[LoggerFile.DataPacket]:
+    fixup = _ElapsedFixup(timesource, stats, verbose)
+    # The caller's stages run while the generator is suspended, so the time for each packet is accumulated and
+    # recorded as a single run of the stage, as for load_file()
+    fixup_stage = split_stage('elapsed_fixup')
+    try:
+        for pkt in packets:
+            with fixup_stage:
+                settled = fixup.add(pkt)
+            fixup_stage.count(1)
+            yield from settled
+        with fixup_stage:
+            settled = fixup.finish()
+        yield from settled
+    finally:
+        fixup_stage.finish()
+
+## Stream the packets from a WIBL file, without holding them in memory
+#
+# This is the second of the two passes over the file used in streaming mode, after scan_file() has determined the
+# time source and whether the elapsed times need to be fixed up.  The packets generated are the same as those that
+# load_file() would return, but each is only held until the caller moves on to the next (except for runs of packets
+# without elapsed times, which are held until the end of the run).
+#
+# \param filename       Filename to read for WIBL data
+# \param timesource     (TimeSource) Source of real-world time information for the file, from scan_file()
+# \param stats          (PktStats) Statistics object, from scan_file(), in which to note any faults in fixing up the
+#                       elapsed times
+# \param verbose        Flag: set True to report more information on parsing
+# \param strict_mode    If True, raise exception if an error is encountered loading a packet
+# \param fixup          Flag: set True if the elapsed times need to be fixed up (from scan_file())
+# \return Generator of DataPacket-derived objects, in file order
+def stream_packets(filename: str, timesource: TimeSource, stats: PktStats, verbose: bool, *,
+                   strict_mode: bool = False,
+                   fixup: bool = True) -> Iterator[LoggerFile.DataPacket]:
+    with open(filename, 'rb') as file:
+        packets = _usable_packets(LoggerFile.PacketFactory(file, strict_mode=strict_mode).iter_packets())
+        if fixup:
+            packets = _stream_elapsed_fixup(packets, timesource, stats, verbose)
+        yield from packets
+
+## Read the packets from a WIBL file that is still being written, as data are added to it
+#
+# Each call to read() decodes only the complete packets added to the file since the last call, starting from the byte
+# offset in \a offset (a packet that has only been partially written is left for the next call).  The packets are
+# tabulated in the statistics, and have their elapsed times fixed up, as load_file() would do; packets are held back
+# until the time source can be determined, and while they are in a run of packets without elapsed times.  The packets
+# returned from all of the calls to read(), followed by finish() at the end of the file, are the same as those that
+# load_file() returns for the file (without running any algorithms).
+#
+# The reader holds no open files, and can be saved with pickle between calls in order to resume later.  The time
+# source is determined from the packets in the first call that has any, which assumes that the logger records all of
+# its sources of time from the start of the file.  Compressed files can't be read incrementally, and raise
+# StreamingUnavailable.
+class IncrementalReader:
+    ## Constructor, with the configuration for reading
+    #
+    # \param verbose        Flag: set True to report more information on parsing
+    # \param maxreports     Limit on how many errors should be reported before suppressing and summarising
+    # \param strict_mode    If True, raise exception if an error is encountered loading a packet
+    def __init__(self, verbose: bool, maxreports: int, *, strict_mode: bool = False) -> None:
+        self.verbose = verbose
+        self.strict_mode = strict_mode
+        ## Byte offset in the file of the first packet that has not yet been read
+        self.offset = 0
+        ## Statistics on the packets read, as load_file() would report for the file so far
+        self.stats = PktStats(maxreports)
+        ## Source of real-world time for the file (None until it can be determined)
+        self.timesource: Optional[TimeSource] = None
+        self._held: List[LoggerFile.DataPacket] = []
+        self._fixup: Optional[_ElapsedFixup] = None
+
+    ## Read the complete packets that have been added to the file since the last call
+    #
+    # \param filename   Name of the WIBL file being written
+    # \return List of the packets for which the elapsed times are settled, in file order
+    def read(self, filename: str) -> List[LoggerFile.DataPacket]:
+        with open(filename, 'rb') as file:
+            if self.offset == 0 and LoggerFile.compression_format(file) is not None:
+                raise StreamingUnavailable('compressed files cannot be read incrementally')
+            file.seek(self.offset)
+            data = file.read()
+        end = 0
+        while end + LoggerFile.packet_header.size <= len(data):
+            _, length = LoggerFile.packet_header.unpack_from(data, end)
+            if end + LoggerFile.packet_header.size + length > len(data):
+                break
+            end += LoggerFile.packet_header.size + length
+        self.offset += end
+        factory = LoggerFile.PacketFactory(io.BytesIO(data[:end]), strict_mode=self.strict_mode)
+        packets, _ = _tabulate_packets(list(factory.iter_packets()), self.stats, self.verbose)
+
+        if self._fixup is None:
+            self._held += packets
+            try:
+                self.timesource = determine_time_source(self.stats)
+            except NoTimeSource:
+                return []
+            self._fixup = _ElapsedFixup(self.timesource, self.stats, self.verbose)
+            packets, self._held = self._held, []
+        rtn = []
+        for pkt in packets:
+            rtn += self._fixup.add(pkt)
+        return rtn
+
+    ## Release any packets still held at the end of the file
+    #
+    # \return List of the packets held (with no elapsed time if they were waiting for one), in file order
+    def finish(self) -> List[LoggerFile.DataPacket]:
+        if self._fixup is None:
+            return []
+        return self._fixup.finish()
@@ -40,11 +40,13 @@ import deepmerge
 from wibl.core import getenv, Lineage
 from wibl.core.algorithm import AlgorithmPhase
 from wibl.core.algorithm.runner import run_algorithms
+from wibl.core.instrumentation import stage
 
 
 FMT_OBS_TIME='%Y-%m-%dT%H:%M:%S.%fZ'
 
 
+@stage('geojson_translate')
 def translate(data: Dict[str,Any], lineage: Lineage, filename: str, config: Dict[str,Any], *,
               process_algorithms: bool = False) -> Dict[str,Any]:
     """
@@ -0,0 +1,225 @@
+## \file instrumentation.py
+# \brief Opt-in timing and memory instrumentation for the stages of processing a WIBL file
+#
+# When a file is slow to process, it's useful to know which stage of the processing is responsible.  The
+# stages of the processing chain (reading the file, running algorithms, fixing up elapsed times, building
+# the interpolation tables, interpolating, converting to GeoJSON, and encoding) are marked with stage(),
+# which can be used either as a context manager or as a decorator.  Nothing is recorded unless a profile
+# is active (see profile()); while it is, the wall-clock time, CPU time, number of items processed, and
+# (optionally) the peak memory allocated are accumulated for each stage, and can be reported as a
+# dictionary for logging.
+#
+# Copyright 2026 Center for Coastal and Ocean Mapping & NOAA-UNH Joint
+# Hydrographic Center, University of New Hampshire.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+
+from contextlib import ContextDecorator, contextmanager
+from dataclasses import asdict, dataclass
+import time
+import tracemalloc
+from typing import Any, Dict, Iterator, List, Optional
+
+## Statistics accumulated for one stage of processing over all of the times it was run
+@dataclass
+class StageStats:
+    ## Number of times the stage was run
+    calls: int = 0
+    ## Total wall-clock time in the stage (seconds)
+    wall_time: float = 0.0
+    ## Total CPU time used by this process in the stage (seconds)
+    cpu_time: float = 0.0
+    ## Number of items (packets, or observations) processed in the stage, where the stage reports them
+    items: int = 0
+    ## Peak memory allocated in the stage beyond what was allocated when it started (bytes), if traced
+    peak_memory: Optional[int] = None
+
+## Record of the stages run while a profile is active
+#
+# The stages are listed in the order in which they were first run.  Stages can be nested (e.g., interpolation is
+# done when the GeoJSON conversion first uses the times of the observations), in which case the time and memory
+# for the inner stage are also included in those for the outer stage.  Work done in other processes is included in
+# the wall-clock time only.
+class Profile:
+    ## Constructor
+    #
+    # \param trace_memory   Flag: set True to record the peak memory allocated in each stage (with tracemalloc)
+    def __init__(self, trace_memory: bool) -> None:
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, StageStats] = {}
+
+    ## Generate a dictionary of the statistics for each stage, suitable for encoding as JSON
+    #
+    # \return Dictionary mapping the name of each stage to a dictionary of its statistics
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {name: asdict(stats) for name, stats in self.stages.items()}
+
+    def __str__(self) -> str:
+        lines = [f'{"stage":<32} {"calls":>6} {"wall s":>9} {"cpu s":>9} {"items":>10} {"peak MiB":>9}']
+        for name, stats in self.stages.items():
+            peak = '-' if stats.peak_memory is None else f'{stats.peak_memory / (1024 * 1024):.1f}'
+            lines.append(f'{name:<32} {stats.calls:>6} {stats.wall_time:>9.3f} {stats.cpu_time:>9.3f} '
+                         f'{stats.items:>10} {peak:>9}')
+        return '\n'.join(lines)
+
+## State of a stage while it is running
+class _Frame:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.items = 0
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        self.memory_start = 0
+        self.memory_peak = 0
+
+    ## Note items processed in the stage
+    #
+    # \param n  Number of items to add to the count
+    def count(self, n: int) -> None:
+        self.items += n
+
+## Stand-in for a running stage when there is no profile active, which ignores the items counted
+class _NullFrame:
+    def count(self, n: int) -> None:
+        pass
+
+_NULL_FRAME = _NullFrame()
+
+## Profile currently active (None if instrumentation is off)
+_active: Optional[Profile] = None
+## Stages currently running, innermost last
+_running: List[_Frame] = []
+
+## Mark a stage of processing, for use as a context manager or a decorator
+#
+# When used as a context manager, the object returned has a count() method to note the number of items that the
+# stage processed.  If there is no profile active, this does nothing.
+class stage(ContextDecorator):
+    ## Constructor
+    #
+    # \param name   Name of the stage, as reported in the profile
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self):
+        if _active is None:
+            return _NULL_FRAME
+        frame = _Frame(self.name)
+        if _active.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if _running:
+                _running[-1].memory_peak = max(_running[-1].memory_peak, peak)
+            tracemalloc.reset_peak()
+            frame.memory_start = frame.memory_peak = current
+        _running.append(frame)
+        return frame
+
+    def __exit__(self, *exc) -> bool:
+        if _active is None or not _running or _running[-1].name != self.name:
+            return False
+        frame = _running.pop()
+        stats = _active.stages.setdefault(frame.name, StageStats())
+        stats.calls += 1
+        stats.wall_time += time.perf_counter() - frame.wall_start
+        stats.cpu_time += time.process_time() - frame.cpu_start
+        stats.items += frame.items
+        if _active.trace_memory:
+            peak = max(frame.memory_peak, tracemalloc.get_traced_memory()[1])
+            stats.peak_memory = max(stats.peak_memory or 0, peak - frame.memory_start)
+            if _running:
+                _running[-1].memory_peak = max(_running[-1].memory_peak, peak)
+            tracemalloc.reset_peak()
+        return False
+
+## Mark a stage of processing that is run in pieces, between which other stages can run, as a single run of the stage
+#
+# This is for work done in a generator, where the caller's stages run while the generator is suspended, and so can't
+# be nested in a stage around the generator.  Each piece of the work is done with the object as a context manager,
+# and the time for all of the pieces is recorded (as one call of the stage) by finish().  The memory allocated is not
+# traced.  If there is no profile active, this does nothing.
+class split_stage:
+    ## Constructor
+    #
+    # \param name   Name of the stage, as reported in the profile
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.profile = _active
+        self.items = 0
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.wall_start = 0.0
+        self.cpu_start = 0.0
+
+    ## Note items processed in the stage
+    #
+    # \param n  Number of items to add to the count
+    def count(self, n: int) -> None:
+        self.items += n
+
+    def __enter__(self):
+        if self.profile is not None:
+            self.wall_start = time.perf_counter()
+            self.cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        if self.profile is not None:
+            self.wall_time += time.perf_counter() - self.wall_start
+            self.cpu_time += time.process_time() - self.cpu_start
+        return False
+
+    ## Record the pieces of the stage run so far in the profile, as a single run of the stage
+    def finish(self) -> None:
+        if self.profile is None:
+            return
+        stats = self.profile.stages.setdefault(self.name, StageStats())
+        stats.calls += 1
+        stats.wall_time += self.wall_time
+        stats.cpu_time += self.cpu_time
+        stats.items += self.items
+        self.profile = None
+
+## Activate instrumentation of the processing stages for the duration of a context
+#
+# Tracing memory with tracemalloc slows processing considerably, so the times reported are only representative
+# with \a trace_memory off.  If tracemalloc isn't already running, it is started and then stopped at the end.
+#
+# \param trace_memory   Flag: set True to record the peak memory allocated in each stage
+# \return Profile in which the stages are recorded (as the context value)
+@contextmanager
+def profile(trace_memory: bool = True) -> Iterator[Profile]:
+    global _active
+    previous = _active
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _active = Profile(trace_memory)
+    try:
+        yield _active
+    finally:
+        _active = previous
+        if started_tracing:
+            tracemalloc.stop()
+
+## Provide the profile currently active
+#
+# \return Profile in which the stages are being recorded, or None if instrumentation is off
+def active_profile() -> Optional[Profile]:
+    return _active
@@ -32,7 +32,8 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
 # OR OTHER DEALINGS IN THE SOFTWARE.
 
-from typing import List
+import array
+from typing import Dict, List
 
 import numpy as np
 
@@ -52,6 +53,10 @@ class NotEnoughValues(Exception):
 # dependent variables (and automatically adds an independent variable), which can be added
 # to as data becomes available.  Interpolation can then be done at given time points against
 # one or more of the dependent variables, returned as a list of NumPy arrays.
+#    The values are held in typed arrays (array.array of doubles), which grow in place with amortised
+# constant-time appends, and whole arrays of points can be added at once with extend().  The NumPy arrays
+# provided by ind() and var() are read-only, and are cached until more points are added, so that
+# repeated access doesn't construct the arrays again.
 
 class InterpTable:
     ## Constructor, specifying the names of the dependent variables to be interpolated
@@ -62,11 +67,11 @@ class InterpTable:
     # \param vars   (List[str]) List of the names of the dependent variables to manage
     def __init__(self, vars: List[str]) -> None:
         # Add an independent variable tag implicitly to the lookup table
-        self.vars = {}
-        self.vars['ind'] = []
+        self._buffers: Dict[str, array.array] = {'ind': array.array('d')}
         for v in vars:
-            self.vars[v] = []
-    
+            self._buffers[v] = array.array('d')
+        self._arrays: Dict[str, np.ndarray] = {}
+
     ## Add a data point to a single dependent variable
     #
     # Add a single data point to a single dependent variable.  Note that if the object is
@@ -80,10 +85,12 @@ class InterpTable:
     # \param var    Name of the dependent variable to update
     # \param value  Value to add to the dependent variable array
     def add_point(self, ind: float, var: str, value: float) -> None:
-        if var not in self.vars:
+        if var not in self._buffers:
             raise NoSuchVariable()
-        self.vars['ind'].append(ind)
-        self.vars[var].append(value)
+        self._buffers['ind'].append(ind)
+        self._buffers[var].append(value)
+        if self._arrays:
+            self._arrays = {}
     
     ## Add a data point to multiple dependent variables simultaneously
     #
@@ -98,13 +105,48 @@ class InterpTable:
     # \param values List of values to update for the named dependent variables, in the same order
     def add_points(self, ind: float, vars: List[str], values: List[float]) -> None:
         for var in vars:
-            if var not in self.vars:
+            if var not in self._buffers:
                 raise NoSuchVariable()
         if len(vars) != len(values):
             raise NotEnoughValues()
-        self.vars['ind'].append(ind)
-        for n in range(len(vars)):
-            self.vars[vars[n]].append(values[n])
+        self._buffers['ind'].append(ind)
+        for var, value in zip(vars, values):
+            self._buffers[var].append(value)
+        if self._arrays:
+            self._arrays = {}
+
+    ## Add arrays of data points to one or more dependent variables simultaneously
+    #
+    # This is the bulk equivalent of add_points(), appending all of the points in one operation (e.g., when the
+    # data have been decoded from the file as arrays).  As for add_points(), this is only really useful if you're
+    # updating all of the variables.
+    #
+    # \param ind    Array of independent variable values to add
+    # \param values Dictionary mapping the names of the dependent variables to update to arrays of values, of the
+    #               same length as the independent variable array
+    def extend(self, ind: np.ndarray, values: Dict[str, np.ndarray]) -> None:
+        for var in values:
+            if var not in self._buffers:
+                raise NoSuchVariable()
+        for var in values:
+            if len(values[var]) != len(ind):
+                raise NotEnoughValues()
+        for var, points in [('ind', ind)] + list(values.items()):
+            self._buffers[var].frombytes(np.ascontiguousarray(points, dtype=np.float64).tobytes())
+        self._arrays = {}
+
+    ## Remove the oldest points from the table
+    #
+    # This drops the first \a count points from the independent variable and all of the dependent variables (e.g.,
+    # once they are no longer needed to interpolate new observations), so that a table that is being added to
+    # indefinitely doesn't grow without bound.
+    #
+    # \param count  Number of points to remove from the start of the table
+    def discard(self, count: int) -> None:
+        if count > 0:
+            for buffer in self._buffers.values():
+                del buffer[:count]
+            self._arrays = {}
 
     ## Interpolate one or more dependent variables at an array of independent variable values
     #
@@ -116,13 +158,41 @@ class InterpTable:
     # \return List of NumPy arrays for the named dependent variables, in the same order
     def interpolate(self, yvars: List[str], x: np.ndarray) -> List[np.ndarray]:
         for yvar in yvars:
-            if yvar not in self.vars:
+            if yvar not in self._buffers:
                 raise NoSuchVariable()
         rtn = []
         for yvar in yvars:
-            rtn.append(np.interp(x, self.vars['ind'], self.vars[yvar]))
+            rtn.append(np.interp(x, self.ind(), self._array(yvar)))
         return rtn
-    
+
+    ## Interpolate one or more dependent variables at several arrays of independent variable values
+    #
+    # This is equivalent to calling interpolate() for each of the arrays of independent variable values in turn
+    # (and gives identical results), but interpolates the union of all of the points with one pass for each of
+    # the dependent variables, and skips empty arrays entirely.  Where the independent variable array isn't sorted
+    # or has fewer than two points, or any of the points requested are NaN, the results of np.interp() depend on
+    # the order of the points, and each array is then interpolated separately.
+    #
+    # \param yvars  List of names of the dependent variables to interpolate
+    # \param xs     List of NumPy arrays of independent variable points at which to interpolate
+    # \return List (one per array in \a xs) of lists of NumPy arrays for the named dependent variables, in order
+    def interpolate_many(self, yvars: List[str], xs: List[np.ndarray]) -> List[List[np.ndarray]]:
+        for yvar in yvars:
+            if yvar not in self._buffers:
+                raise NoSuchVariable()
+        xs = [np.asarray(x, dtype=np.float64) for x in xs]
+        lengths = [len(x) for x in xs]
+        if sum(lengths) == 0:
+            return [[np.empty(0, dtype=np.float64) for _ in yvars] for _ in xs]
+        xp = self.ind()
+        fps = [self._array(yvar) for yvar in yvars]
+        if len(xp) < 2 or not np.all(xp[1:] >= xp[:-1]) or any(np.isnan(x).any() for x in xs):
+            return [[np.interp(x, xp, fp) for fp in fps] for x in xs]
+        x = np.concatenate(xs)
+        splits = np.cumsum(lengths)[:-1]
+        per_variable = [np.split(np.interp(x, xp, fp), splits) for fp in fps]
+        return [[values[n] for values in per_variable] for n in range(len(xs))]
+
     ## Determine the number of points in the independent variable array
     #
     # This provides the count of points that have been added to the table for interpolation.  Since
@@ -131,25 +201,38 @@ class InterpTable:
     #
     # \return Number of points in the interpolation table
     def n_points(self) -> int:
-        return len(self.vars['ind'])
+        return len(self._buffers['ind'])
+
+    ## Provide a read-only NumPy array of the points held for a variable, cached until more points are added
+    #
+    # \param var    Name of the variable
+    # \return Read-only NumPy array of the points for the variable
+    def _array(self, var: str) -> np.ndarray:
+        rtn = self._arrays.get(var)
+        if rtn is None:
+            rtn = np.array(self._buffers[var], dtype=np.float64)
+            rtn.flags.writeable = False
+            self._arrays[var] = rtn
+        return rtn
     
     ## Accessor for the array of points for a named variable
     #
     # This provides checked access to one of the dependent variables stored in the array.  This returns
-    # all of the points stored for that variable as a NumPy array.
+    # all of the points stored for that variable as a read-only NumPy array (take a copy if you need to
+    # modify it).
     #
     # \param name   Name of the dependent variable to extract
     # \return NumPy array for the dependent variable named
     def var(self, name: str) -> np.ndarray:
-        if name not in self.vars:
+        if name not in self._buffers:
             raise NoSuchVariable()
-        return np.array(self.vars[name])
+        return self._array(name)
     
     ## Accessor for the array of points for the independent variable
     #
     # This provides access to the independent variable array, without exposing the specifics
     # of how this is stored.
     #
-    # \return NumPy array for the independent variable
+    # \return Read-only NumPy array for the independent variable
     def ind(self) -> np.ndarray:
-        return np.array(self.vars['ind'])
+        return self._array('ind')
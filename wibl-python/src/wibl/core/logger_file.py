@@ -28,10 +28,26 @@
 # OR OTHER DEALINGS IN THE SOFTWARE.
 
 import struct
+import copy
+import mmap
+import os
 from abc import ABC, abstractmethod
 import io
+import gzip
+import lzma
+import zlib
+import shutil
 from enum import Enum
 import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Type
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 
 ## Exception used to report bad keyword parameters when setting up a packet from scratch in code
@@ -127,11 +143,37 @@ def pressure_to_mbar(pressure):
 def angle_to_degs(rads):
     return rads*180.0/3.1415926535897932384626433832795
 
+## Precompiled layout of the packet header in the binary file: U32 (ID) U32 (length in bytes)
+packet_header = struct.Struct('<II')
+
+## Precompiled layout of the u32 words used for lengths (and elapsed times) in variable-length packets
+_length_word = struct.Struct('<I')
+
+## Extract a length-prefixed byte string from a packet buffer
+#
+# Variable-length packets store strings as a u32 length followed by the bytes of the string.  Slicing the
+# buffer directly avoids compiling a new struct format for each distinct string length, but a buffer that is
+# too short still raises struct.error so that truncated packets are reported in the same way as before.
+#
+# \param buffer Bytes buffer from which to unpack the string
+# \param base   Offset in the buffer of the length word for the string
+# \return Tuple of the string (as bytes) and the offset in the buffer immediately after it
+def _unpack_string(buffer, base: int):
+    str_len, = _length_word.unpack_from(buffer, base)
+    base += 4
+    if base + str_len > len(buffer):
+        raise struct.error(f'unpack requires a buffer of at least {base + str_len} bytes')
+    return bytes(buffer[base:base + str_len]), base + str_len
+
 ## Base class for all data packets that can be read from the binary file
 #
 # This provides a common base class for all of the data packets, and stores the information on the date and time at
 # which the packet was received.
 class DataPacket(ABC):
+    ## Common attributes of all packets.  The packet hierarchy uses slots rather than per-object dictionaries, since
+    # files are loaded into memory in their entirety; sub-classes must list any attributes that they add.
+    __slots__ = ('date', 'timestamp', 'elapsed')
+
     ## Initialise the base packet with date and timestamp for the packet reception time
     #
     # This simply stores the date and time for the packet reception
@@ -202,6 +244,14 @@ class DataPacket(ABC):
 # This retrieves the timestamp, logger elapsed time, and time source for a SystemTime packet serialised into the file.
 #
 class SystemTime(DataPacket):
+    ## Packet attributes (held in slots; see DataPacket)
+    __slots__ = ('data_source',)
+
+    ## Precompiled binary layout of the packet payload (u16, double, u32, u8)
+    layout = struct.Struct('<HdIB')
+    ## Names of the fields in the layout, in order (used for columnar decoding)
+    layout_fields = ('date', 'timestamp', 'elapsed', 'data_source')
+
     ## Initialise the object using the supplied buffer of data, or keywords if appropriate
     #
     # If the keywords include "buffer", the code assumes that the contents of the buffer are a serialised
@@ -224,7 +274,7 @@ class SystemTime(DataPacket):
     # \param self   Pointer to the object
     # \param buffer Bytes buffer from which to unpack binary data
     def buffer_constructor(self, buffer: bytes) -> None:
-        (date, timestamp, elapsed_time, data_source) = struct.unpack('<HdIB', buffer)
+        (date, timestamp, elapsed_time, data_source) = self.layout.unpack(buffer)
         ## Source of the timestamp (see documentation for decoding, but at least GNSS)
         self.data_source = data_source
         DataPacket.__init__(self, date, timestamp, elapsed_time)
@@ -244,7 +294,7 @@ class SystemTime(DataPacket):
             raise SpecificationError('Bad packet parameters') from e
     
     def payload(self) -> bytes:
-        buffer = struct.pack('<HdIB', self.date, self.timestamp, self.elapsed, self.data_source)
+        buffer = self.layout.pack(self.date, self.timestamp, self.elapsed, self.data_source)
         return buffer
     
     def id(self) -> int:
@@ -274,6 +324,14 @@ class SystemTime(DataPacket):
 # The attitude message contains estimates of roll, pitch, and yaw of the ship, without any indication of where the data
 # is coming from.  Consequently, the data is just reported directly.
 class Attitude(DataPacket):
+    ## Packet attributes (held in slots; see DataPacket)
+    __slots__ = ('yaw', 'pitch', 'roll')
+
+    ## Precompiled binary layout of the packet payload (u16, double, u32, double, double, double)
+    layout = struct.Struct('<HdIddd')
+    ## Names of the fields in the layout, in order (used for columnar decoding)
+    layout_fields = ('date', 'timestamp', 'elapsed', 'yaw', 'pitch', 'roll')
+
     ## Initialise the object using the supplied buffer of data, or keywords if appropriate
     #
     # If the keywords include "buffer", the code assumes that the contents of the buffer are a serialised
@@ -296,7 +354,7 @@ class Attitude(DataPacket):
     # \param self   Pointer to the object
     # \param buffer Bytes byffer from which to unpack binary data
     def buffer_constructor(self, buffer: bytes) -> None:
-        (date, timestamp, elapsed_time, yaw, pitch, roll) = struct.unpack("<HdIddd", buffer)
+        (date, timestamp, elapsed_time, yaw, pitch, roll) = self.layout.unpack(buffer)
         ## Yaw angle of the ship, radians (+ve clockwise from north)
         self.yaw = yaw
         ## Pitch angle of the ship, radians (+ve bow up)
@@ -306,7 +364,7 @@ class Attitude(DataPacket):
         DataPacket.__init__(self, date, timestamp, elapsed_time)
 
     def payload(self) -> bytes:
-        buffer = struct.pack('<HdIddd', self.date, self.timestamp, self.elapsed, self.yaw, self.pitch, self.roll)
+        buffer = self.layout.pack(self.date, self.timestamp, self.elapsed, self.yaw, self.pitch, self.roll)
         return buffer
     
     ## Generate a synthetic packet based on keywords
@@ -354,6 +412,14 @@ class Attitude(DataPacket):
 # The depth message includes the observed depth, the offset that needs to be applied to it either for rise from the keel
 # or waterline, and the maximum depth that can be observed (allowing for some filtering).
 class Depth(DataPacket):
+    ## Packet attributes (held in slots; see DataPacket)
+    __slots__ = ('depth', 'offset', 'range')
+
+    ## Precompiled binary layout of the packet payload (u16, double, u32, double, double, double)
+    layout = struct.Struct('<HdIddd')
+    ## Names of the fields in the layout, in order (used for columnar decoding)
+    layout_fields = ('date', 'timestamp', 'elapsed', 'depth', 'offset', 'range')
+
     ## Initialise the object using the supplied buffer of data, or keywords if appropriate
     #
     # If the keywords include "buffer", the code assumes that the contents of the buffer are a serialised
@@ -376,7 +442,7 @@ class Depth(DataPacket):
     # \param self   Pointer to the object
     # \param buffer Bytes buffer from which to unpack binary data
     def buffer_constructor(self, buffer: bytes) -> None:
-        (date, timestamp, elapsed_time, depth, offset, range) = struct.unpack('<HdIddd', buffer)
+        (date, timestamp, elapsed_time, depth, offset, range) = self.layout.unpack(buffer)
         ## Observed depth below transducer, metres
         self.depth = depth
         ## Offset for depth, metres.
@@ -388,7 +454,7 @@ class Depth(DataPacket):
         super().__init__(date, timestamp, elapsed_time)
 
     def payload(self) -> bytes:
-        buffer = struct.pack('<HdIddd', self.date, self.timestamp, self.elapsed, self.depth, self.offset, self.range)
+        buffer = self.layout.pack(self.date, self.timestamp, self.elapsed, self.depth, self.offset, self.range)
         return buffer
     
     def id(self) -> int:
@@ -436,6 +502,14 @@ class Depth(DataPacket):
 # The Course-over-ground/Speed-over-ground message is sent more frequently that most, and contains estimates of the
 # current course and speed.
 class COG(DataPacket):
+    ## Packet attributes (held in slots; see DataPacket)
+    __slots__ = ('courseOverGround', 'speedOverGround')
+
+    ## Precompiled binary layout of the packet payload (u16, double, u32, double, double)
+    layout = struct.Struct('<HdIdd')
+    ## Names of the fields in the layout, in order (used for columnar decoding)
+    layout_fields = ('date', 'timestamp', 'elapsed', 'courseOverGround', 'speedOverGround')
+
     ## Initialise the object using the supplied buffer of data, or keywords if appropriate
     #
     # If the keywords include "buffer", the code assumes that the contents of the buffer are a serialised
@@ -458,7 +532,7 @@ class COG(DataPacket):
     # \param self   Pointer to the objet
     # \param buffer Bytes buffer from which to unpack binary data
     def buffer_constructor(self, buffer: bytes) -> None:
-        (date, timestamp, elapsed_time, courseOverGround, speedOverGround) = struct.unpack('<HdIdd', buffer)
+        (date, timestamp, elapsed_time, courseOverGround, speedOverGround) = self.layout.unpack(buffer)
         ## Course over ground (radians)
         self.courseOverGround = courseOverGround
         ## Speed over ground (m/s)
@@ -466,7 +540,7 @@ class COG(DataPacket):
         super().__init__(date, timestamp, elapsed_time)
     
     def payload(self) -> bytes:
-        buffer = struct.pack('<HdIdd', self.date, self.timestamp, self.elapsed, self.courseOverGround, self.speedOverGround)
+        buffer = self.layout.pack(self.date, self.timestamp, self.elapsed, self.courseOverGround, self.speedOverGround)
         return buffer
 
     def id(self) -> int:
@@ -513,6 +587,18 @@ class COG(DataPacket):
 # possible, of course).  This contains all of the usual suspects that would come from a GPGGA message in NMEA0183, but
 # has better information on correctors, and methods of correction, which are preserved here.
 class GNSS(DataPacket):
+    ## Packet attributes (held in slots; see DataPacket)
+    __slots__ = ('msg_date', 'msg_timestamp', 'latitude', 'longitude', 'altitude', 'receiverType', 'receiverMethod',
+                 'numSVs', 'horizontalDOP', 'positionDOP', 'separation', 'numRefStations', 'refStationType',
+                 'refStationID', 'correctionAge')
+
+    ## Precompiled binary layout of the packet payload (u16, double, u32, u16, double x 4, u8 x 3, double x 3, u8 x 2, u16, double)
+    layout = struct.Struct('<HdIHddddBBBdddBBHd')
+    ## Names of the fields in the layout, in order (used for columnar decoding)
+    layout_fields = ('date', 'timestamp', 'elapsed', 'msg_date', 'msg_timestamp', 'latitude', 'longitude', 'altitude',
+                     'receiverType', 'receiverMethod', 'numSVs', 'horizontalDOP', 'positionDOP', 'separation',
+                     'numRefStations', 'refStationType', 'refStationID', 'correctionAge')
+
     ## Initialise the object using the supplied buffer of data, or keywords if appropriate
     #
     # If the keywords include "buffer", the code assumes that the contents of the buffer are a serialised
@@ -541,7 +627,7 @@ class GNSS(DataPacket):
     def buffer_constructor(self, buffer: bytes) -> None:
         (sys_date, sys_timestamp, sys_elapsed, date, timestamp, latitude, longitude, altitude,
          receiverType, receiverMethod, numSVs, horizontalDOP, positionDOP, separation, numRefStations, refStationType,
-         refStationID, correctionAge) = struct.unpack('<HdIHddddBBBdddBBHd', buffer)
+         refStationID, correctionAge) = self.layout.unpack(buffer)
         ## In-message date (days since epoch)
         self.msg_date = date
         ## In-message timestamp (seconds since midnight)
@@ -575,7 +661,7 @@ class GNSS(DataPacket):
         super().__init__(sys_date, sys_timestamp, sys_elapsed)
     
     def payload(self) -> bytes:
-        buffer = struct.pack('<HdIHddddBBBdddBBHd', self.date, self.timestamp, self.elapsed, self.msg_date, self.msg_timestamp,
+        buffer = self.layout.pack(self.date, self.timestamp, self.elapsed, self.msg_date, self.msg_timestamp,
                                                     self.latitude, self.longitude, self.altitude, self.receiverType, self.receiverMethod,
                                                     self.numSVs, self.horizontalDOP, self.positionDOP, self.separation,
                                                     self.numRefStations, self.refStationType, self.refStationID, self.correctionAge)
@@ -664,6 +750,15 @@ class GNSS(DataPacket):
 # since been deprecated in favour of individual messages (which also have the benefit of preserving the source information
 # for the pressure data).  These are also supported, but this is provided for backwards compatibility.
 class Environment(DataPacket):
+    ## Packet attributes (held in slots; see DataPacket)
+    __slots__ = ('tempSource', 'temperature', 'humiditySource', 'humidity', 'pressure')
+
+    ## Precompiled binary layout of the packet payload (u16, double, u32, u8, double, u8, double, double)
+    layout = struct.Struct('<HdIBdBdd')
+    ## Names of the fields in the layout, in order (used for columnar decoding)
+    layout_fields = ('date', 'timestamp', 'elapsed', 'tempSource', 'temperature', 'humiditySource', 'humidity',
+                     'pressure')
+
     ## Initialise the object using the supplied buffer of data, or keywords if appropriate
     #
     # If the keywords include "buffer", the code assumes that the contents of the buffer are a serialised
@@ -690,7 +785,7 @@ class Environment(DataPacket):
     # \param buffer Bytes buffer from which to unpack binary data
     def buffer_constructor(self, buffer: bytes) -> None:
         (date, timestamp, elapsed_time, tempSource, temperature, humiditySource, humidity, pressure) = \
-            struct.unpack('<HdIBdBdd', buffer)
+            self.layout.unpack(buffer)
         ## Source of temperature information (e.g., inside, outside)
         self.tempSource = tempSource
         ## Current temperature, Kelvin
@@ -706,7 +801,7 @@ class Environment(DataPacket):
         super().__init__(date, timestamp, elapsed_time)
 
     def payload(self) -> bytes:
-        buffer = struct.pack('<HdIBdBdd', self.date, self.timestamp, self.elapsed, self.tempSource, self.temperature, self.humiditySource, self.humidity, self.pressure)
+        buffer = self.layout.pack(self.date, self.timestamp, self.elapsed, self.tempSource, self.temperature, self.humiditySource, self.humidity, self.pressure)
         return buffer
 
     def id(self) -> int:
@@ -760,6 +855,14 @@ class Environment(DataPacket):
 # with a source designator.  Some filtering of messages might happen at the logger, however, which means that not all
 # temperature messages make it to here.
 class Temperature(DataPacket):
+    ## Packet attributes (held in slots; see DataPacket)
+    __slots__ = ('tempSource', 'temperature')
+
+    ## Precompiled binary layout of the packet payload (u16, double, u32, u8, double)
+    layout = struct.Struct('<HdIBd')
+    ## Names of the fields in the layout, in order (used for columnar decoding)
+    layout_fields = ('date', 'timestamp', 'elapsed', 'tempSource', 'temperature')
+
     ## Initialise the object using the supplied buffer of data, or keywords if appropriate
     #
     # If the keywords include "buffer", the code assumes that the contents of the buffer are a serialised
@@ -783,7 +886,7 @@ class Temperature(DataPacket):
     # \param self   Pointer to the object
     # \param buffer Bytes object from which to unpack binary data
     def buffer_constructor(self, buffer: bytes) -> None:
-        (date, timestamp, elapsed_time, tempSource, temperature) = struct.unpack('<HdIBd', buffer)
+        (date, timestamp, elapsed_time, tempSource, temperature) = self.layout.unpack(buffer)
         ## Source of temperature information (e.g., water, air, cabin)
         self.tempSource = tempSource
         ## Temperature of source, Kelvin
@@ -791,7 +894,7 @@ class Temperature(DataPacket):
         super().__init__(date, timestamp, elapsed_time)
 
     def payload(self) -> bytes:
-        buffer = struct.pack('<HdIBd', self.date, self.timestamp, self.elapsed, self.tempSource, self.tempSource)
+        buffer = self.layout.pack(self.date, self.timestamp, self.elapsed, self.tempSource, self.tempSource)
         return buffer
 
     def id(self) -> int:
@@ -839,6 +942,14 @@ class Temperature(DataPacket):
 # Some filtering of messages might happen at the logger, however, which means that not all humidity messages make it
 # to here.
 class Humidity(DataPacket):
+    ## Packet attributes (held in slots; see DataPacket)
+    __slots__ = ('humiditySource', 'humidity')
+
+    ## Precompiled binary layout of the packet payload (u16, double, u32, u8, double)
+    layout = struct.Struct('<HdIBd')
+    ## Names of the fields in the layout, in order (used for columnar decoding)
+    layout_fields = ('date', 'timestamp', 'elapsed', 'humiditySource', 'humidity')
+
     ## Initialise the object using the supplied buffer of data, or keywords if appropriate
     #
     # If the keywords include "buffer", the code assumes that the contents of the buffer are a serialised
@@ -862,7 +973,7 @@ class Humidity(DataPacket):
     # \param self   Pointer to the object
     # \param buffer Bytes object from which to unpack the binary data
     def buffer_constructor(self, buffer: bytes) -> None:
-        (date, timestamp, elapsed_time, humiditySource, humidity) = struct.unpack('<HdIBd', buffer)
+        (date, timestamp, elapsed_time, humiditySource, humidity) = self.layout.unpack(buffer)
         ## Source of humidity (e.g., inside, outside)
         self.humiditySource = humiditySource
         ## Humidity observation, percent
@@ -870,7 +981,7 @@ class Humidity(DataPacket):
         super().__init__(date, timestamp, elapsed_time)
     
     def payload(self) -> bytes:
-        buffer = struct.pack('<HdIBd', self.date, self.timestamp, self.elapsed, self.humiditySource, self.humidity)
+        buffer = self.layout.pack(self.date, self.timestamp, self.elapsed, self.humiditySource, self.humidity)
         return buffer
     
     def id(self) -> int:
@@ -918,6 +1029,14 @@ class Humidity(DataPacket):
 # source designator.  Some filtering of messages might happen at the logger, however, which means that not all pressure
 # messages make it to here.
 class Pressure(DataPacket):
+    ## Packet attributes (held in slots; see DataPacket)
+    __slots__ = ('pressureSource', 'pressure')
+
+    ## Precompiled binary layout of the packet payload (u16, double, u32, u8, double)
+    layout = struct.Struct('<HdIBd')
+    ## Names of the fields in the layout, in order (used for columnar decoding)
+    layout_fields = ('date', 'timestamp', 'elapsed', 'pressureSource', 'pressure')
+
     ## Initialise the object using the supplied buffer of data, or keywords if appropriate
     #
     # If the keywords include "buffer", the code assumes that the contents of the buffer are a serialised
@@ -941,7 +1060,7 @@ class Pressure(DataPacket):
     # \param self   Pointer to the object
     # \param buffer Bytes object from which to unpack the information
     def buffer_constructor(self, buffer: bytes) -> None:
-        (date, timestamp, elapsed_time, pressureSource, pressure) = struct.unpack('<HdIBd', buffer)
+        (date, timestamp, elapsed_time, pressureSource, pressure) = self.layout.unpack(buffer)
         ## Source of pressure measurement (e.g., atmospheric, compressed air)
         self.pressureSource = pressureSource
         ## Pressure, Pascals
@@ -949,7 +1068,7 @@ class Pressure(DataPacket):
         super().__init__(date, timestamp, elapsed_time)
     
     def payload(self) -> bytes:
-        buffer = struct.pack('<HdIBd', self.date, self.timestamp, self.elapsed, self.pressureSource, self.pressure)
+        buffer = self.layout.pack(self.date, self.timestamp, self.elapsed, self.pressureSource, self.pressure)
         return buffer
     
     def id(self) -> int:
@@ -996,6 +1115,9 @@ class Pressure(DataPacket):
 # data streams, and timestamp in the same manner as the rest of the data.  The code encapsulates the entire message
 # in this packet, rather than trying to have a separate packet for each data string type (at least for now).
 class SerialString(DataPacket):
+    ## Packet attributes (held in slots; see DataPacket)
+    __slots__ = ('data',)
+
     ## Initialise the object using the supplied buffer of data, or keywords if appropriate
     #
     # If the keywords include "buffer", the code assumes that the contents of the buffer are a serialised
@@ -1011,10 +1133,9 @@ class SerialString(DataPacket):
             self.data_constructor(**kwargs)
 
     def buffer_constructor(self, buffer: bytes) -> None:
-        string_length = len(buffer) - 4
-        (elapsed_time, data) = struct.unpack(f'<I{string_length}s', buffer)
+        elapsed_time, = _length_word.unpack_from(buffer, 0)
         ## Serial data encapsulated in the packet
-        self.data = data
+        self.data = bytes(buffer[4:])
         super().__init__(0, 0, elapsed_time)
 
     def payload(self) -> bytes:
@@ -1063,6 +1184,16 @@ class SerialString(DataPacket):
 # always be the first packet in the file, and allows the code to adjust readers if necessary in order to read what's
 # coming next.
 class SerialiserVersion(DataPacket):
+    ## Packet attributes (held in slots; see DataPacket)
+    __slots__ = ('major', 'minor', 'nmea2000', 'nmea0183', 'imu', 'nmea2000_version', 'nmea0183_version', 'imu_version')
+
+    ## Precompiled binary layout of the payload for the current file format (u16 x 11)
+    layout = struct.Struct('<HHHHHHHHHHH')
+    ## Precompiled binary layout of the (major, minor) version prefix of the payload (u16 x 2)
+    version_layout = struct.Struct('<HH')
+    ## Precompiled binary layout of the payload for file formats before the IMU version was added (u16 x 8)
+    legacy_layout = struct.Struct('<HHHHHHHH')
+
     ## Initialise the object using the supplied buffer of data, or keywords if appropriate
     #
     # If the keywords include "buffer", the code assumes that the contents of the buffer are a serialised
@@ -1078,20 +1209,18 @@ class SerialiserVersion(DataPacket):
             self.data_constructor(**kwargs)
 
     def buffer_constructor(self, buffer: bytes) -> None:
-        base = 0
-        (major, minor) = struct.unpack_from('<HH', buffer, base)
-        base += 4
+        (major, minor) = self.version_layout.unpack_from(buffer, 0)
         if numeric_file_version(major, minor) < numeric_file_version(wibl_file_version_major, wibl_file_version_minor):
             # Dealing with an older version of the file format, which means that we have slight
             # differences in the rest of the buffer, and have to fake some of the data.
-            (n2000_major, n2000_minor, n2000_patch, n0183_major, n0183_minor, n0183_patch) = \
-                struct.unpack_from('<HHHHHH', buffer, base)
+            (_, _, n2000_major, n2000_minor, n2000_patch, n0183_major, n0183_minor, n0183_patch) = \
+                self.legacy_layout.unpack_from(buffer, 0)
             imu_major = 0
             imu_minor = 0
             imu_patch = 0
         else:
-            (n2000_major, n2000_minor, n2000_patch, n0183_major, n0183_minor, n0183_patch, imu_major, imu_minor, imu_patch) = \
-                struct.unpack_from('<HHHHHHHHH', buffer, base)
+            (_, _, n2000_major, n2000_minor, n2000_patch, n0183_major, n0183_minor, n0183_patch, imu_major, imu_minor, imu_patch) = \
+                self.layout.unpack_from(buffer, 0)
         ## Major software version for the serialiser code
         self.major = major
         ## Minor software version for the serialiser code
@@ -1112,7 +1241,7 @@ class SerialiserVersion(DataPacket):
         super().__init__(0, 0.0, 0)
 
     def payload(self) -> bytes:
-        buffer = struct.pack('<HHHHHHHHHHH', self.major, self.minor, self.nmea2000[0], self.nmea2000[1], self.nmea2000[2],
+        buffer = self.layout.pack(self.major, self.minor, self.nmea2000[0], self.nmea2000[1], self.nmea2000[2],
                             self.nmea0183[0], self.nmea0183[1], self.nmea0183[2],
                             self.imu[0], self.imu[1], self.imu[2])
         return buffer
@@ -1166,6 +1295,14 @@ class SerialiserVersion(DataPacket):
 # This picks out the information from the on-board motion sensor (if available).  This data is not processed
 # (e.g., with a Kalman filter) and may need further work before being useful.
 class Motion(DataPacket):
+    ## Packet attributes (held in slots; see DataPacket)
+    __slots__ = ('accel', 'gyro', 'temp')
+
+    ## Precompiled binary layout of the packet payload (u32, float x 7)
+    layout = struct.Struct('<Ifffffff')
+    ## Names of the fields in the layout, in order (used for columnar decoding)
+    layout_fields = ('elapsed', 'ax', 'ay', 'az', 'gx', 'gy', 'gz', 'temp')
+
     ## Initialise the object using the supplied buffer of data, or keywords if appropriate
     #
     # If the keywords include "buffer", the code assumes that the contents of the buffer are a serialised
@@ -1187,7 +1324,7 @@ class Motion(DataPacket):
     # \param self   Reference for the object
     # \param buffer A bytes object for the previously serialised packet
     def buffer_constructor(self, buffer: bytes) -> None:
-        (elapsed, ax, ay, az, gx, gy, gz, temp) = struct.unpack('<Ifffffff', buffer)
+        (elapsed, ax, ay, az, gx, gy, gz, temp) = self.layout.unpack(buffer)
         ## The acceleration vector, 3D
         self.accel = (ax, ay, az)
         ## The gyroscope rate vector, 3D
@@ -1197,7 +1334,7 @@ class Motion(DataPacket):
         super().__init__(0, 0.0, elapsed)
 
     def payload(self) -> bytes:
-        buffer = struct.pack('<Ifffffff', self.elapsed, self.accel[0], self.accel[1], self.accel[2], self.gyro[0], self.gyro[1], self.gyro[2], self.temp)
+        buffer = self.layout.pack(self.elapsed, self.accel[0], self.accel[1], self.accel[2], self.gyro[0], self.gyro[1], self.gyro[2], self.temp)
         return buffer
     
     def id(self) -> int:
@@ -1245,6 +1382,9 @@ class Motion(DataPacket):
 # JSONMetadata packet, which provides more detailled information for the post-processing code
 # to generate/modify IHO B.12 style GeoJSON metadata.
 class Metadata(DataPacket):
+    ## Packet attributes (held in slots; see DataPacket)
+    __slots__ = ('logger_name', 'ship_name')
+
     ## Initialise the object using the supplied buffer of data, or keywords if appropriate
     #
     # If the keywords include "buffer", the code assumes that the contents of the buffer are a serialised
@@ -1260,14 +1400,8 @@ class Metadata(DataPacket):
             self.data_constructor(**kwargs)
 
     def buffer_constructor(self, buffer: bytes) -> None:
-        base = 0
-        id_len, = struct.unpack_from('<I', buffer, base)
-        base += 4
-        unique_id, = struct.unpack_from(f'<{id_len}s', buffer, base)
-        base += id_len
-        name_len, = struct.unpack_from('<I', buffer, base)
-        base += 4
-        name, = struct.unpack_from(f'<{name_len}s', buffer, base)
+        unique_id, base = _unpack_string(buffer, 0)
+        name, base = _unpack_string(buffer, base)
         self.logger_name = unique_id.decode('UTF-8')
         self.ship_name = name.decode('UTF-8')
         super().__init__(0, 0.0, 0)
@@ -1319,6 +1453,9 @@ class Metadata(DataPacket):
 # This picks out the information from the algorithm request packet, which provides an algorithm name
 # and parameter set that the logger would recommend running on the data in the cloud, if available
 class AlgorithmRequest(DataPacket):
+    ## Packet attributes (held in slots; see DataPacket)
+    __slots__ = ('algorithm', 'parameters')
+
     ## Initialise the object using the supplied buffer of data, or keywords if appropriate
     #
     # If the keywords include "buffer", the code assumes that the contents of the buffer are a serialised
@@ -1334,14 +1471,8 @@ class AlgorithmRequest(DataPacket):
             self.data_constructor(**kwargs)
 
     def buffer_constructor(self, buffer: bytes) -> None:
-        base = 0
-        algname_len, = struct.unpack_from('<I', buffer, base)
-        base += 4
-        algname, = struct.unpack_from(f'<{algname_len}s', buffer, base)
-        base += algname_len
-        param_len, = struct.unpack_from('<I', buffer, base)
-        base += 4
-        algparams, = struct.unpack_from(f'<{param_len}s', buffer, base)
+        algname, base = _unpack_string(buffer, 0)
+        algparams, base = _unpack_string(buffer, base)
         self.algorithm = algname
         self.parameters = algparams
         super().__init__(0, 0.0, 0)
@@ -1388,6 +1519,9 @@ class AlgorithmRequest(DataPacket):
 # file being constructed for each data file being transmitted to the database.  This is provided by
 # the user and cached on the logger, and then transmitted as is, without interpretation.
 class JSONMetadata(DataPacket):
+    ## Packet attributes (held in slots; see DataPacket)
+    __slots__ = ('metadata_element',)
+
     ## Initialise the object using the supplied buffer of data, or keywords if appropriate
     #
     # If the keywords include "buffer", the code assumes that the contents of the buffer are a serialised
@@ -1403,10 +1537,7 @@ class JSONMetadata(DataPacket):
             self.data_constructor(**kwargs)
 
     def buffer_constructor(self, buffer: bytes) -> None:
-        base = 0
-        meta_len, = struct.unpack_from('<I', buffer, base)
-        base += 4
-        meta, = struct.unpack_from(f'<{meta_len}s', buffer, base)
+        meta, _ = _unpack_string(buffer, 0)
         self.metadata_element = meta
         super().__init__(0, 0.0, 0)
 
@@ -1457,6 +1588,9 @@ class JSONMetadata(DataPacket):
 # SD card those that are of interest.  Getting the filtering right can be important to let the capture run
 # for as long as possible. 
 class NMEA0183Filter(DataPacket):
+    ## Packet attributes (held in slots; see DataPacket)
+    __slots__ = ('recog_string',)
+
     ## Initialise the object using the supplied buffer of data, or keywords if appropriate
     #
     # If the keywords include "buffer", the code assumes that the contents of the buffer are a serialised
@@ -1478,10 +1612,7 @@ class NMEA0183Filter(DataPacket):
     # \param self   Reference for the object
     # \param buffer Binary buffer with serialised information for the packet
     def buffer_constructor(self, buffer: bytes) -> None:
-        base = 0
-        id_len, = struct.unpack_from('<I', buffer, base)
-        base += 4
-        recog_string, = struct.unpack_from(f'<{id_len}s', buffer, base)
+        recog_string, _ = _unpack_string(buffer, 0)
         self.recog_string = recog_string
         super().__init__(0, 0.0, 0)
     
@@ -1551,6 +1682,9 @@ class NMEA0183Filter(DataPacket):
 # these scales.  Of course, since it's just a JSON string, it can also be readily extended for other
 # sensors that might be embedded in other implementations.
 class SensorScales(DataPacket):
+    ## Packet attributes (held in slots; see DataPacket)
+    __slots__ = ('config',)
+
     ## Initialise the packet using either a bytes buffer from a file, or keywords ab initio
     #
     # If the keywords include "buffer", the code assumes that the contents of the buffer are a serialised
@@ -1574,11 +1708,7 @@ class SensorScales(DataPacket):
     # \param self   Reference for the object
     # \param buffer Binary buffer with serialised information for the packet
     def buffer_constructor(self, buffer: bytes) -> None:
-        base = 0
-        config_len, = struct.unpack_from('<I', buffer, base)
-        base += 4
-        convert_string = f'<{config_len}s'
-        config, = struct.unpack_from(convert_string, buffer, base)
+        config, _ = _unpack_string(buffer, 0)
         self.config = json.loads(config)
         super().__init__(0, 0.0, 0)
 
@@ -1651,6 +1781,14 @@ class SensorScales(DataPacket):
 # gyro rate estimate.  The particular device used also provides a die temperature estimate (needed to calibrate
 # internally) which is also serialised.
 class RawIMU(DataPacket):
+    ## Packet attributes (held in slots; see DataPacket)
+    __slots__ = ('accel', 'gyro', 'temp')
+
+    ## Precompiled binary layout of the packet payload (u32, i16 x 7)
+    layout = struct.Struct('<Ihhhhhhh')
+    ## Names of the fields in the layout, in order (used for columnar decoding)
+    layout_fields = ('elapsed', 'temp', 'gx', 'gy', 'gz', 'ax', 'ay', 'az')
+
     ## Initialise the packet using either a bytes buffer from a file, or keywords ab initio
     #
     # If the keywords include "buffer", the code assumes that the contents of the buffer are a serialised
@@ -1674,7 +1812,7 @@ class RawIMU(DataPacket):
     # \param self   Reference for the object
     # \param buffer Binary buffer with serialised information for the packet
     def buffer_constructor(self, buffer: bytes) -> None:
-        (elapsed, t, gx, gy, gz, ax, ay, az) = struct.unpack('<Ihhhhhhh', buffer)
+        (elapsed, t, gx, gy, gz, ax, ay, az) = self.layout.unpack(buffer)
         self.accel = (ax, ay, az)
         self.gyro = (gx, gy, gz)
         self.temp = t
@@ -1709,7 +1847,7 @@ class RawIMU(DataPacket):
     # \param self   Reference for the object
     # \return Bytes array with the binary representation of the packet-specific parameters
     def payload(self) -> bytes:
-        buffer = struct.pack('<Ihhhhhhh', self.elapsed, self.temp, self.gyro[0], self.gyro[1], self.gyro[2], self.accel[0], self.accel[1], self.accel[2])
+        buffer = self.layout.pack(self.elapsed, self.temp, self.gyro[0], self.gyro[1], self.gyro[2], self.accel[0], self.accel[1], self.accel[2])
         return buffer
 
     ## Provide the recognition ID for the packet, as used in the binary file
@@ -1746,6 +1884,9 @@ class RawIMU(DataPacket):
 # the current setup of the logger.  This packet encapsulates that string so that it can be used to determine the
 # configuration during processing, if required (or for general monitoring, etc.)
 class Setup(DataPacket):
+    ## Packet attributes (held in slots; see DataPacket)
+    __slots__ = ('setup',)
+
     ## Initialise the packet using either a bytes buffer from a file, or keywords ab initio
     #
     # If the keywords include "buffer", the code assumes that the contents of the buffer are a serialised
@@ -1769,11 +1910,7 @@ class Setup(DataPacket):
     # \param self   Reference for the object
     # \param buffer Binary buffer with serialised information for the packet
     def buffer_constructor(self, buffer: bytes) -> None:
-        base = 0
-        setup_len, = struct.unpack_from('<I', buffer, base)
-        base += 4
-        convert_string = f'<{setup_len}s'
-        setup, = struct.unpack_from(convert_string, buffer, base)
+        setup, _ = _unpack_string(buffer, 0)
         self.setup = json.loads(setup)
         super().__init__(0, 0.0, 0)
 
@@ -1844,6 +1981,183 @@ class Setup(DataPacket):
         rtn = super().__str__() + f' {self.name()}: json = |{self.setup}|'
         return rtn
 
+## Registry of the packet classes that can be read from the binary file, indexed by packet ID number
+#
+# The PacketFactory uses this to go from the ID in the packet header to the class used to decode the payload
+# with a single lookup.  Classes with a fixed-size payload also carry a precompiled struct.Struct for their
+# layout (as the class attribute "layout") so that the format does not have to be parsed for each packet.
+PACKET_REGISTRY: Dict[int, Type[DataPacket]] = {
+    PacketTypes.SerialiserVersion.value: SerialiserVersion,
+    PacketTypes.SystemTime.value: SystemTime,
+    PacketTypes.Attitude.value: Attitude,
+    PacketTypes.Depth.value: Depth,
+    PacketTypes.COG.value: COG,
+    PacketTypes.GNSS.value: GNSS,
+    PacketTypes.Environment.value: Environment,
+    PacketTypes.Temperature.value: Temperature,
+    PacketTypes.Humidity.value: Humidity,
+    PacketTypes.Pressure.value: Pressure,
+    PacketTypes.SerialString.value: SerialString,
+    PacketTypes.Motion.value: Motion,
+    PacketTypes.Metadata.value: Metadata,
+    PacketTypes.AlgorithmRequest.value: AlgorithmRequest,
+    PacketTypes.JSONMetadata.value: JSONMetadata,
+    PacketTypes.NMEA0183Filter.value: NMEA0183Filter,
+    PacketTypes.SensorScales.value: SensorScales,
+    PacketTypes.RawIMU.value: RawIMU,
+    PacketTypes.Setup.value: Setup
+}
+
+## Largest payload (bytes) considered plausible for a SerialString packet
+MAX_SERIAL_LENGTH = 4096
+## Largest payload (bytes) considered plausible for the metadata-style packets with variable length
+MAX_METADATA_LENGTH = 1024*1024
+
+## Range of plausible payload lengths (bytes, inclusive) for each packet type, indexed by packet ID number
+#
+# Packets with a fixed layout must have exactly that length (the SerialiserVersion packet has a shorter legacy
+# layout); packets with variable-length strings must at least have the length word(s) for the strings.  These are
+# used to check whether a packet header is plausible when resynchronising after corrupt data (see
+# find_packet_header()).
+PACKET_LENGTH_BOUNDS: Dict[int, Tuple[int, int]] = {
+    PacketTypes.SerialiserVersion.value: (SerialiserVersion.legacy_layout.size, SerialiserVersion.layout.size),
+    PacketTypes.SystemTime.value: (SystemTime.layout.size, SystemTime.layout.size),
+    PacketTypes.Attitude.value: (Attitude.layout.size, Attitude.layout.size),
+    PacketTypes.Depth.value: (Depth.layout.size, Depth.layout.size),
+    PacketTypes.COG.value: (COG.layout.size, COG.layout.size),
+    PacketTypes.GNSS.value: (GNSS.layout.size, GNSS.layout.size),
+    PacketTypes.Environment.value: (Environment.layout.size, Environment.layout.size),
+    PacketTypes.Temperature.value: (Temperature.layout.size, Temperature.layout.size),
+    PacketTypes.Humidity.value: (Humidity.layout.size, Humidity.layout.size),
+    PacketTypes.Pressure.value: (Pressure.layout.size, Pressure.layout.size),
+    PacketTypes.SerialString.value: (_length_word.size, MAX_SERIAL_LENGTH),
+    PacketTypes.Motion.value: (Motion.layout.size, Motion.layout.size),
+    PacketTypes.Metadata.value: (2*_length_word.size, MAX_METADATA_LENGTH),
+    PacketTypes.AlgorithmRequest.value: (2*_length_word.size, MAX_METADATA_LENGTH),
+    PacketTypes.JSONMetadata.value: (_length_word.size, MAX_METADATA_LENGTH),
+    PacketTypes.NMEA0183Filter.value: (_length_word.size, MAX_METADATA_LENGTH),
+    PacketTypes.SensorScales.value: (_length_word.size, MAX_METADATA_LENGTH),
+    PacketTypes.RawIMU.value: (RawIMU.layout.size, RawIMU.layout.size),
+    PacketTypes.Setup.value: (_length_word.size, MAX_METADATA_LENGTH)
+}
+
+# Bounds as arrays indexed by packet ID, for vectorised checks (IDs not in use have an empty range)
+_MIN_LENGTH = np.ones(max(PACKET_LENGTH_BOUNDS) + 1, dtype=np.int64)
+_MAX_LENGTH = np.zeros(max(PACKET_LENGTH_BOUNDS) + 1, dtype=np.int64)
+for _pkt_id, (_min_length, _max_length) in PACKET_LENGTH_BOUNDS.items():
+    _MIN_LENGTH[_pkt_id] = _min_length
+    _MAX_LENGTH[_pkt_id] = _max_length
+
+## Size (bytes) of the window of data searched at a time for a plausible packet header when resynchronising
+RESYNC_WINDOW = 64*1024
+
+## Check whether a packet header is plausible
+#
+# \param pkt_id     Packet ID from the header
+# \param pkt_len    Payload length from the header
+# \return True if the ID is known and the length is within the bounds for the packet type
+def plausible_header(pkt_id: int, pkt_len: int) -> bool:
+    bounds = PACKET_LENGTH_BOUNDS.get(pkt_id)
+    return bounds is not None and bounds[0] <= pkt_len <= bounds[1]
+
+## Find the first plausible packet header in a buffer
+#
+# This is used to resynchronise with the packet stream after corrupt data.  Candidate positions are found with a
+# vectorised search over the whole buffer for a known packet ID (the IDs are small, so the upper three bytes of the
+# little-endian ID must be zero) followed by a payload length within the bounds for that packet type (see
+# PACKET_LENGTH_BOUNDS).  To reduce false positives, a candidate is only accepted if the header that would follow
+# the packet is also plausible (or lies beyond the end of the buffer).
+#
+# \param buffer Bytes-like object to search
+# \return Offset of the first plausible header in the buffer, or None if there is none
+def find_packet_header(buffer) -> Optional[int]:
+    raw = np.frombuffer(buffer, dtype=np.uint8)
+    n = len(raw) - packet_header.size + 1
+    if n <= 0:
+        return None
+    candidate = (raw[:n] < len(_MIN_LENGTH)) & (raw[1:n + 1] == 0) & (raw[2:n + 2] == 0) & (raw[3:n + 3] == 0)
+    positions = np.flatnonzero(candidate)
+    if len(positions) == 0:
+        return None
+    ids = raw[positions]
+    lengths = raw[positions + 4].astype(np.int64) | (raw[positions + 5].astype(np.int64) << 8) | \
+        (raw[positions + 6].astype(np.int64) << 16) | (raw[positions + 7].astype(np.int64) << 24)
+    plausible = (lengths >= _MIN_LENGTH[ids]) & (lengths <= _MAX_LENGTH[ids])
+    for position, length in zip(positions[plausible], lengths[plausible]):
+        following = int(position) + packet_header.size + int(length)
+        if following + packet_header.size <= len(raw):
+            if not plausible_header(*packet_header.unpack_from(buffer, following)):
+                continue
+        return int(position)
+    return None
+
+## Exception used to report a compressed stream that can't be read because the decompressor is not installed
+class CompressionUnavailable(Exception):
+    pass
+
+## Magic bytes at the start of each compressed stream format supported for WIBL files
+COMPRESSION_MAGIC: Dict[str, bytes] = {
+    'gzip': b'\x1f\x8b',
+    'xz': b'\xfd7zXZ\x00',
+    'zstd': b'\x28\xb5\x2f\xfd',
+    'block': b'WIBLBLK1'    # Block-indexed container (see BlockWriter)
+}
+
+## Determine whether a binary file is compressed, and if so in which format
+#
+# This looks at the first few bytes of the file for the magic bytes of one of the supported compression formats (see
+# COMPRESSION_MAGIC).  The file position is not changed; for streams that can't seek, the bytes are peeked from the
+# stream's buffer, so the stream must support peek() (e.g., sys.stdin.buffer).  WIBL files always start with a
+# SerialiserVersion packet (ID 0), so there's no risk of confusing an uncompressed file with a compressed one.
+#
+# \param file   Open file object, which must be opened for binary reads
+# \return Name of the compression format (a key in COMPRESSION_MAGIC), or None if the file is not compressed
+def compression_format(file) -> Optional[str]:
+    n_magic = max(len(magic) for magic in COMPRESSION_MAGIC.values())
+    if file.seekable():
+        position = file.tell()
+        head = file.read(n_magic)
+        file.seek(position)
+    elif hasattr(file, 'peek'):
+        head = file.peek(n_magic)[:n_magic]
+    else:
+        return None
+    for name, magic in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+## Wrap a binary file so that reads return the decompressed contents if the file is compressed
+#
+# Decompression is streamed as the data is read, so the uncompressed file is never held in memory (or written to
+# disc) in its entirety.  The decompressed stream supports tell() in uncompressed bytes, and forward seek() for
+# gzip and xz (by decompressing and discarding); zstd streams and block-indexed containers can't seek.  Note that
+# closing the decompressed stream does not close the underlying file.
+#
+# \param file   Open file object, which must be opened for binary reads
+# \return File object from which to read the uncompressed data (the input file if it isn't compressed)
+def decompressed_stream(file):
+    fmt = compression_format(file)
+    if fmt is None:
+        return file
+    if fmt == 'gzip':
+        return gzip.GzipFile(fileobj=file, mode='rb')
+    if fmt == 'xz':
+        return lzma.LZMAFile(file, mode='rb')
+    if fmt == 'block':
+        return io.BufferedReader(_BlockStream(file))
+    if zstandard is None:
+        raise CompressionUnavailable('zstd-compressed WIBL files require the zstandard package')
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(file, closefd=False))
+
+## Determine whether the named WIBL file is compressed
+#
+# \param filename   Name of the file to check
+# \return True if the file starts with the magic bytes of one of the supported compression formats
+def is_compressed(filename) -> bool:
+    with open(filename, 'rb') as f:
+        return compression_format(f) is not None
+
 ## Translate packets out of the binary file, reconstituing as an appropriate class
 #
 # This provides the primary interface for the user to the binary data generated by the logger.  Calling the next_packet
@@ -1855,16 +2169,24 @@ class PacketFactory:
     # This simple copies the file reference information for the binary data, and resets EOF indicator.
     #
     # \param self   Pointer to the object
-    # \param file   Open file object, which must be opened for binary reads
+    # \param file   Open file object, which must be opened for binary reads (and may be compressed; see decompressed_stream())
     # \param strict_mode If True, raise exception if an error is encountered loading a packet. If False, print a warning message about the packet loading error.
+    # \param resync      If True, check that each packet header is plausible, and if not skip forward to the next plausible header (see _resynchronise())
     def __init__(self, file, *,
-                 strict_mode: bool = False):
-        ## File reference from which to read packets
-        self.file = file
+                 strict_mode: bool = False,
+                 resync: bool = False):
+        ## File object as provided by the caller
+        self.source = file
+        ## File reference from which to read packets (decompressing the source if required)
+        self.file = decompressed_stream(file)
         ## Flag for end-of-file detection
         self.end_of_file = False
         self.strict_mode = strict_mode
         self.packets_read: int = 0
+        ## Flag: resynchronise after implausible packet headers (only possible if the stream can seek)
+        self.resync = resync and self.file.seekable()
+        ## List of (start, end) byte ranges skipped while resynchronising
+        self.skipped: List[Tuple[int, int]] = []
 
     ## Extract the next packet from the binary data file
     #
@@ -1874,6 +2196,30 @@ class PacketFactory:
     # \param self   Pointer to the object
     # \return DataPacket-derived object corresponding to the packet, or None if end-of-file or error
     def next_packet(self):
+        return self._next_packet(None)
+
+    ## Iterate over the packets in the binary data file, optionally only those of specified types
+    #
+    # Packets of types that are not requested are skipped by seeking past their payloads (or reading and discarding
+    # them if the file can't seek), without constructing a packet object.  Packets that can't be decoded are
+    # skipped (or raise PacketTranscriptionError in strict mode) as for next_packet().
+    #
+    # \param self   Pointer to the object
+    # \param types  Iterable of packet types (DataPacket-derived classes, PacketTypes, or integer IDs), or None for all
+    # \return Generator of DataPacket-derived objects, in file order
+    def iter_packets(self, types=None):
+        ids = packet_ids(types) if types is not None else None
+        while not self.end_of_file:
+            pkt = self._next_packet(ids)
+            if pkt is not None:
+                yield pkt
+
+    ## Read the next packet from the file, if it is of one of the types requested
+    #
+    # \param self   Pointer to the object
+    # \param ids    Set of packet IDs to decode, or None to decode all packets
+    # \return DataPacket-derived object corresponding to the packet, or None if end-of-file, error, or not requested
+    def _next_packet(self, ids):
         if self.end_of_file:
             return None
 
@@ -1883,60 +2229,32 @@ class PacketFactory:
             self.end_of_file = True
             return None
 
-        (pkt_id, pkt_len) = struct.unpack('<II', buffer)
+        (pkt_id, pkt_len) = packet_header.unpack(buffer)
+        if self.resync and not plausible_header(pkt_id, pkt_len):
+            self._resynchronise()
+            return None
+        self.packets_read += 1
+        if ids is not None and pkt_id not in ids:
+            if self.file.seekable():
+                self.file.seek(pkt_len, io.SEEK_CUR)
+            else:
+                self.file.read(pkt_len)
+            return None
         last_pos: int = self.file.tell()
         buffer = self.file.read(pkt_len)
-        self.packets_read += 1
+        packet_class = PACKET_REGISTRY.get(pkt_id)
+        if packet_class is None:
+            print(f"Unknown packet number {self.packets_read} with ID {pkt_id} in input stream; ignored.")
+            return None
         rtn = None
         try:
-            if pkt_id == PacketTypes.SerialiserVersion.value:
-                rtn = SerialiserVersion(buffer=buffer)
-            elif pkt_id == PacketTypes.SystemTime.value:
-                rtn = SystemTime(buffer=buffer)
-            elif pkt_id == PacketTypes.Attitude.value:
-                rtn = Attitude(buffer=buffer)
-            elif pkt_id == PacketTypes.Depth.value:
-                rtn = Depth(buffer=buffer)
-            elif pkt_id == PacketTypes.COG.value:
-                rtn = COG(buffer=buffer)
-            elif pkt_id == PacketTypes.GNSS.value:
-                rtn = GNSS(buffer=buffer)
-            elif pkt_id == PacketTypes.Environment.value:
-                rtn = Environment(buffer=buffer)
-            elif pkt_id == PacketTypes.Temperature.value:
-                rtn = Temperature(buffer=buffer)
-            elif pkt_id == PacketTypes.Humidity.value:
-                rtn = Humidity(buffer=buffer)
-            elif pkt_id == PacketTypes.Pressure.value:
-                rtn = Pressure(buffer=buffer)
-            elif pkt_id == PacketTypes.SerialString.value:
-                rtn = SerialString(buffer=buffer)
-            elif pkt_id == PacketTypes.Motion.value:
-                rtn = Motion(buffer=buffer)
-            elif pkt_id == PacketTypes.Metadata.value:
-                rtn = Metadata(buffer=buffer)
-            elif pkt_id == PacketTypes.AlgorithmRequest.value:
-                rtn = AlgorithmRequest(buffer=buffer)
-            elif pkt_id == PacketTypes.JSONMetadata.value:
-                rtn = JSONMetadata(buffer=buffer)
-            elif pkt_id == PacketTypes.NMEA0183Filter.value:
-                rtn = NMEA0183Filter(buffer=buffer)
-            elif pkt_id == PacketTypes.SensorScales.value:
-                rtn = SensorScales(buffer=buffer)
-            elif pkt_id == PacketTypes.RawIMU.value:
-                rtn = RawIMU(buffer=buffer)
-            elif pkt_id == PacketTypes.Setup.value:
-                rtn = Setup(buffer=buffer)
-            else:
-                print(f"Unknown packet number {self.packets_read} with ID {pkt_id} and name "
-                      f"'{PacketTypes(pkt_id).name}' in input stream; ignored.")
-                rtn = None
+            rtn = packet_class(buffer=buffer)
         except struct.error as e:
             if self.strict_mode:
                 raise PacketTranscriptionError(str(e))
             else:
                 print(f"WARNING: Unable to read packet number {self.packets_read} with ID {pkt_id} and name "
-                      f"'{PacketTypes(pkt_id).name}' at byte offset {last_pos} of file '{self.file.name}' "
+                      f"'{PacketTypes(pkt_id).name}' at byte offset {last_pos} of file '{getattr(self.source, 'name', '<stream>')}' "
                       f"due to error: '{str(e)}'. Ignoring as strict_mode is False.")
 
         return rtn
@@ -1949,3 +2267,1185 @@ class PacketFactory:
     # \return True if there is more data to read, otherwise False
     def has_more(self):
         return not self.end_of_file
+
+    ## Skip forward from an implausible packet header to the next plausible one
+    #
+    # Corrupt data (e.g., from a damaged SD card) can leave the reader at a position that isn't the start of a packet,
+    # so that following the length in the header would just read more garbage.  Instead, this searches forward from
+    # the byte after the start of the implausible header, a window of data at a time, for the next plausible header
+    # (see find_packet_header()), and leaves the file positioned there.  The byte range skipped is recorded.  Windows
+    # are taken from the stream's buffer with peek() where possible, so that decompressing streams don't have to seek
+    # backwards.
+    #
+    # \param self   Pointer to the object
+    def _resynchronise(self) -> None:
+        self.file.seek(1 - packet_header.size, io.SEEK_CUR)
+        start = self.file.tell() - 1
+        while True:
+            window = self._look_ahead()
+            position = find_packet_header(window)
+            if position is not None:
+                self.file.seek(position, io.SEEK_CUR)
+                break
+            if len(window) < packet_header.size:
+                self.file.seek(len(window), io.SEEK_CUR)
+                self.end_of_file = True
+                break
+            self.file.seek(len(window) - packet_header.size + 1, io.SEEK_CUR)
+        self.skipped.append((start, self.file.tell()))
+
+    def _look_ahead(self) -> bytes:
+        if hasattr(self.file, 'peek'):
+            window = self.file.peek(RESYNC_WINDOW)[:RESYNC_WINDOW]
+            if len(window) >= packet_header.size:
+                return window
+        position = self.file.tell()
+        window = self.file.read(RESYNC_WINDOW)
+        self.file.seek(position)
+        return window
+
+    ## Close the file being read, and the decompressor stream if there is one
+    #
+    # \param self   Pointer to the object
+    def close(self):
+        if self.file is not self.source:
+            self.file.close()
+        self.source.close()
+
+## Offset of the u32 elapsed time in the payload of each packet type that carries one
+#
+# The NMEA2000-derived packets start with date (u16) and timestamp (double) before the elapsed time, while the
+# serial and motion packets start with it.  Packet types that are not listed here (the metadata-style packets)
+# always report an elapsed time of zero.  PacketView uses this to provide the elapsed time without decoding the
+# rest of the packet.
+_ELAPSED_OFFSETS: Dict[int, int] = {
+    PacketTypes.SystemTime.value: 10,
+    PacketTypes.Attitude.value: 10,
+    PacketTypes.Depth.value: 10,
+    PacketTypes.COG.value: 10,
+    PacketTypes.GNSS.value: 10,
+    PacketTypes.Environment.value: 10,
+    PacketTypes.Temperature.value: 10,
+    PacketTypes.Humidity.value: 10,
+    PacketTypes.Pressure.value: 10,
+    PacketTypes.SerialString.value: 0,
+    PacketTypes.Motion.value: 0,
+    PacketTypes.RawIMU.value: 0
+}
+
+## Determine whether packets with a given ID carry an elapsed time
+#
+# \param pkt_id Packet ID (see PacketTypes)
+# \return True if packets of this type have an elapsed time, False if it is always zero
+def has_elapsed_time(pkt_id: int) -> bool:
+    return pkt_id in _ELAPSED_OFFSETS
+
+## Lightweight, lazily-decoded view of a packet in a memory-mapped WIBL file
+#
+# The view holds only the packet ID, its byte offset in the file, and a memoryview of the payload; the full
+# DataPacket-derived object is constructed the first time that an attribute of the packet is used, and the view
+# then forwards everything to it.  The elapsed time is read directly from the payload until the packet is decoded,
+# so that code that only needs elapsed times (or the packet type) never pays for the full decode.  The view reports
+# the packet class as its __class__, so that isinstance() checks against the DataPacket hierarchy work as they
+# would for a packet from the PacketFactory.  Attributes are read-only through the view, except for the elapsed time
+# (which is often patched up after loading); use decode() to get the packet itself in order to modify anything else.
+# Copying or pickling a view gives a copy of the decoded packet.
+class PacketView:
+    __slots__ = ('offset', '_id', '_packet_class', '_buffer', '_packet')
+
+    ## Initialise the view onto the packet payload
+    #
+    # \param self           Pointer to the object
+    # \param pkt_id         ID number of the packet, from the packet header
+    # \param packet_class   DataPacket-derived class used to decode the payload
+    # \param buffer         memoryview of the payload of the packet (not including the header)
+    # \param offset         Byte offset of the packet header in the file
+    def __init__(self, pkt_id: int, packet_class: Type[DataPacket], buffer: memoryview, offset: int):
+        ## Byte offset of the packet header in the file
+        self.offset = offset
+        self._id = pkt_id
+        self._packet_class = packet_class
+        self._buffer = buffer
+        self._packet = None
+
+    ## Report the class of the packet being viewed, so that isinstance() works without decoding
+    @property
+    def __class__(self):
+        return self._packet_class
+
+    ## Decode the packet (if not already done), and return the DataPacket-derived object
+    #
+    # Since decoding happens on demand, errors in the payload are reported here rather than when the packet is read
+    # from the file, and are always raised since there is no sensible value to return for the attribute being
+    # accessed.  Once decoded, the view releases its reference to the memory-mapped file.
+    #
+    # \param self   Pointer to the object
+    # \return DataPacket-derived object for the packet
+    def decode(self) -> DataPacket:
+        if self._packet is None:
+            try:
+                packet = self._packet_class(buffer=self._buffer)
+            except struct.error as e:
+                raise PacketTranscriptionError(f'packet with ID {self._id} at byte offset {self.offset}: {str(e)}') from e
+            self._packet = packet
+            self._buffer.release()
+            self._buffer = None
+        return self._packet
+
+    ## Determine whether the packet has been decoded yet
+    def is_decoded(self) -> bool:
+        return self._packet is not None
+
+    ## Provide the ID number of the packet, without decoding
+    def id(self) -> int:
+        return self._id
+
+    ## Provide the human-readable name of the packet, without decoding
+    #
+    # The name() methods of the packet classes report a fixed string and don't use the object's data, so the view
+    # can be passed in place of a decoded packet.
+    def name(self) -> str:
+        return self._packet_class.name(self)
+
+    ## Provide the elapsed time of the packet, reading directly from the payload if the packet is not yet decoded
+    @property
+    def elapsed(self):
+        if self._packet is not None:
+            return self._packet.elapsed
+        offset = _ELAPSED_OFFSETS.get(self._id)
+        if offset is None:
+            return 0
+        try:
+            elapsed, = _length_word.unpack_from(self._buffer, offset)
+        except struct.error as e:
+            raise PacketTranscriptionError(f'packet with ID {self._id} at byte offset {self.offset}: {str(e)}') from e
+        return elapsed
+
+    @elapsed.setter
+    def elapsed(self, value) -> None:
+        self.decode().elapsed = value
+
+    ## Provide a copy of the serialised payload of the packet, without decoding
+    #
+    # \param self   Pointer to the object
+    # \return Bytes of the payload, as stored in the file
+    def raw_payload(self) -> bytes:
+        if self._packet is not None:
+            return self._packet.payload()
+        return bytes(self._buffer)
+
+    def __getattr__(self, name):
+        return getattr(self.decode(), name)
+
+    def __str__(self):
+        return str(self.decode())
+
+    # Copying or pickling a view gives the decoded packet, since the memory map can't go with it (and the class
+    # reported by the view would otherwise be used to reconstruct it)
+    def __copy__(self):
+        return copy.copy(self.decode())
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(self.decode(), memo)
+
+    def __reduce_ex__(self, protocol):
+        return self.decode().__reduce_ex__(protocol)
+
+## Translate packets out of a memory-mapped binary file, without copying or decoding the payloads
+#
+# This provides the same interface as the PacketFactory (next_packet() and has_more()), but maps the file into memory
+# rather than reading it, and returns a PacketView for each packet, holding a slice of the mapped file.  The packets
+# are only decoded when their attributes are used, which avoids most of the cost of reading packets that the caller
+# never looks at (e.g., motion data when only depths are required).  The reader can also be used as an iterator and a
+# context manager.  Note that the memory map stays alive while any undecoded PacketView from it exists, even after
+# close() is called.
+class MappedPacketReader:
+    ## Initialise the reader by mapping the file into memory
+    #
+    # \param self           Pointer to the object
+    # \param file           Open file object, which must be opened for binary reads and support fileno()
+    # \param strict_mode    If True, raise exception if a packet is truncated. If False, print a warning message.
+    # \param resync         If True, skip forward from implausible packet headers to the next plausible one
+    def __init__(self, file, *,
+                 strict_mode: bool = False,
+                 resync: bool = False):
+        ## File reference from which the packets are mapped
+        self.file = file
+        self.strict_mode = strict_mode
+        self.resync = resync
+        ## List of (start, end) byte ranges skipped while resynchronising
+        self.skipped: List[Tuple[int, int]] = []
+        self.packets_read: int = 0
+        ## Byte offset of the next packet header in the file
+        self.offset: int = 0
+        if os.fstat(file.fileno()).st_size == 0:
+            # Empty files can't be mapped, but there's also nothing to read
+            self._map = None
+            self._view = memoryview(b'')
+        else:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._map)
+        ## Flag for end-of-file detection
+        self.end_of_file = len(self._view) < packet_header.size
+
+    ## Extract a view of the next packet from the memory-mapped file
+    #
+    # \param self   Pointer to the object
+    # \return PacketView for the packet, or None if end-of-file or error
+    def next_packet(self):
+        if self.end_of_file:
+            return None
+        file_size = len(self._view)
+        if self.offset + packet_header.size > file_size:
+            self.end_of_file = True
+            return None
+
+        pkt_offset = self.offset
+        (pkt_id, pkt_len) = packet_header.unpack_from(self._view, pkt_offset)
+        if self.resync and not plausible_header(pkt_id, pkt_len):
+            self._resynchronise(pkt_offset)
+            return None
+        start = pkt_offset + packet_header.size
+        self.offset = start + pkt_len
+        self.packets_read += 1
+        if self.offset > file_size:
+            self.end_of_file = True
+            message = f'packet number {self.packets_read} with ID {pkt_id} at byte offset {pkt_offset} needs ' \
+                      f'{pkt_len} bytes, but only {file_size - start} remain in the file'
+            if self.strict_mode:
+                raise PacketTranscriptionError(message)
+            print(f"WARNING: Unable to read {message}. Ignoring as strict_mode is False.")
+            return None
+        packet_class = PACKET_REGISTRY.get(pkt_id)
+        if packet_class is None:
+            print(f"Unknown packet number {self.packets_read} with ID {pkt_id} in input stream; ignored.")
+            return None
+        return PacketView(pkt_id, packet_class, self._view[start:self.offset], pkt_offset)
+
+    ## Skip forward from an implausible packet header to the next plausible one
+    #
+    # See PacketFactory._resynchronise(); here the windows are searched directly in the memory map.
+    #
+    # \param self   Pointer to the object
+    # \param start  Byte offset of the implausible header
+    def _resynchronise(self, start: int) -> None:
+        position = start + 1
+        file_size = len(self._view)
+        self.offset = file_size
+        while position + packet_header.size <= file_size:
+            found = find_packet_header(self._view[position:position + RESYNC_WINDOW])
+            if found is not None:
+                self.offset = position + found
+                break
+            position += RESYNC_WINDOW - packet_header.size + 1
+        self.end_of_file = self.offset + packet_header.size > file_size
+        self.skipped.append((start, self.offset))
+
+    ## Check for more data being available
+    #
+    # \param self   Pointer to the object
+    # \return True if there is more data to read, otherwise False
+    def has_more(self):
+        return not self.end_of_file
+
+    ## Release the memory map
+    #
+    # The map can only be closed once no PacketView is holding a slice of it; if any are still alive, the map is left
+    # for the garbage collector to close when they are released.
+    def close(self) -> None:
+        self._view.release()
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass
+            self._map = None
+
+    ## Iterate over the packets in the file, optionally only those of specified types
+    #
+    # Packets of types that are not requested are skipped without creating a view for them.
+    #
+    # \param self   Pointer to the object
+    # \param types  Iterable of packet types (DataPacket-derived classes, PacketTypes, or integer IDs), or None for all
+    # \return Generator of PacketView objects, in file order
+    def iter_packets(self, types=None):
+        ids = packet_ids(types) if types is not None else None
+        while self.has_more():
+            if ids is not None and self.offset + packet_header.size <= len(self._view):
+                (pkt_id, pkt_len) = packet_header.unpack_from(self._view, self.offset)
+                if pkt_id not in ids and (not self.resync or plausible_header(pkt_id, pkt_len)):
+                    self.offset += packet_header.size + pkt_len
+                    self.packets_read += 1
+                    continue
+            pkt = self.next_packet()
+            if pkt is not None:
+                yield pkt
+
+    def __iter__(self):
+        return self.iter_packets()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+## Mapping from struct format codes to the equivalent (little-endian) NumPy type strings
+_NUMPY_TYPES: Dict[str, str] = {
+    'B': 'u1',
+    'h': '<i2',
+    'H': '<u2',
+    'I': '<u4',
+    'f': '<f4',
+    'd': '<f8'
+}
+
+## Structured dtype for an index of the packets in a file: byte offset of the header, packet ID, and elapsed time
+PACKET_INDEX_DTYPE = np.dtype([('offset', '<u8'), ('id', '<u4'), ('elapsed', '<u4')])
+
+## Compute the offsets to add to elapsed times to account for laps of the logger's elapsed-time counter
+#
+# The logger's elapsed-time counter has a limited range, and wraps around to zero when it reaches the maximum value
+# (the elapsed time quantum).  Assuming that the elapsed times are recorded in order, each decrease in the elapsed time
+# from one packet to the next is a lap of the counter, and therefore all of the subsequent elapsed times have to have
+# another quantum added to them.  This can be applied to blocks of a longer sequence of elapsed times in turn, by
+# passing in the last elapsed time (as recorded) of the previous block, and the offset computed for it.
+#
+# \param elapsed    NumPy array of elapsed times, as recorded, in file order
+# \param quantum    Maximum value that can be represented by the elapsed times in the packets
+# \param previous   Elapsed time (as recorded) of the packet before the first in the array (default: no packet)
+# \param offset     Offset for the packet before the first in the array (default: none)
+# \return NumPy int64 array of the offsets to add to the elapsed times
+def lap_offsets(elapsed: np.ndarray, quantum: int, previous: float = 0, offset: int = 0) -> np.ndarray:
+    laps = np.empty(len(elapsed), dtype=np.int64)
+    if len(elapsed) > 0:
+        laps[0] = elapsed[0] < previous
+        np.less(elapsed[1:], elapsed[:-1], out=laps[1:], casting='unsafe')
+    return offset + quantum * np.cumsum(laps)
+
+## Unwrap elapsed times for laps of the logger's elapsed-time counter
+#
+# This adds the offsets from lap_offsets() to the elapsed times, giving a monotonic sequence if the elapsed times are
+# sequential and monotonic (modulo the quantum) in the file.
+#
+# \param elapsed    NumPy array of elapsed times, as recorded, in file order
+# \param quantum    Maximum value that can be represented by the elapsed times in the packets
+# \param previous   Elapsed time (as recorded) of the packet before the first in the array (default: no packet)
+# \param offset     Offset for the packet before the first in the array (default: none)
+# \return NumPy array of unwrapped elapsed times, as int64 for integer elapsed times or float64 otherwise
+def unwrap_elapsed(elapsed: np.ndarray, quantum: int, previous: float = 0, offset: int = 0) -> np.ndarray:
+    elapsed = np.asarray(elapsed)
+    dtype = np.int64 if np.issubdtype(elapsed.dtype, np.integer) else np.float64
+    return elapsed.astype(dtype) + lap_offsets(elapsed, quantum, previous, offset).astype(dtype)
+
+## Construct a NumPy structured dtype equivalent to the fixed binary layout of a packet class
+#
+# The dtype is packed (as is the struct layout) so that it can be used directly on the bytes of the payload, and
+# uses the names in the class's "layout_fields" for the fields.
+#
+# \param packet_class   DataPacket-derived class with "layout" and "layout_fields" class attributes
+# \return NumPy dtype matching the payload of the packet
+def layout_dtype(packet_class: Type[DataPacket]) -> np.dtype:
+    formats = [_NUMPY_TYPES[code] for code in packet_class.layout.format.lstrip('<')]
+    return np.dtype({'names': list(packet_class.layout_fields), 'formats': formats})
+
+## Copy fixed-size rows out of a byte array into a structured array
+#
+# The rows are gathered with fancy indexing in blocks, which keeps the temporary index array bounded for large files.
+#
+# \param raw        NumPy uint8 array with the contents of the file
+# \param starts     NumPy array of the byte offsets of the first byte of each row
+# \param dtype      Structured dtype for the rows
+# \param block      Number of rows to gather at a time
+# \return NumPy structured array with one element per row
+def _gather_rows(raw: np.ndarray, starts: np.ndarray, dtype: np.dtype, block: int = 65536) -> np.ndarray:
+    rtn = np.empty(len(starts), dtype=dtype)
+    rows = rtn.view(np.uint8).reshape(len(starts), dtype.itemsize)
+    columns = np.arange(dtype.itemsize, dtype=np.int64)
+    for base in range(0, len(starts), block):
+        rows[base:base + block] = raw[starts[base:base + block, None] + columns]
+    return rtn
+
+## Walk the packet headers in a buffer holding a WIBL file
+#
+# Only the headers are read, skipping over the payloads.  The tail of a truncated packet at the end of the buffer is
+# ignored.
+#
+# \param buffer Bytes-like object (including a memory map) with the contents of the file
+# \return Tuple of NumPy arrays for the byte offset of each header, the packet ID, and the payload length
+def _walk_headers(buffer):
+    offsets = []
+    ids = []
+    lengths = []
+    pos = 0
+    file_size = len(buffer)
+    while pos + packet_header.size <= file_size:
+        (pkt_id, pkt_len) = packet_header.unpack_from(buffer, pos)
+        if pos + packet_header.size + pkt_len > file_size:
+            break
+        offsets.append(pos)
+        ids.append(pkt_id)
+        lengths.append(pkt_len)
+        pos += packet_header.size + pkt_len
+    return np.array(offsets, dtype=np.int64), np.array(ids, dtype=np.uint32), np.array(lengths, dtype=np.uint32)
+
+## Construct the packet index for a file from the results of a header walk
+#
+# The elapsed times are read directly from the payloads of the packets that carry one (packets that don't, or that
+# are too short to hold one, are given zero).
+#
+# \param raw        NumPy uint8 array with the contents of the file
+# \param offsets    NumPy array of packet header byte offsets
+# \param ids        NumPy array of packet IDs
+# \param lengths    NumPy array of packet payload lengths
+# \return NumPy array of PACKET_INDEX_DTYPE, one element per packet
+def _make_index(raw: np.ndarray, offsets: np.ndarray, ids: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    index = np.zeros(len(offsets), dtype=PACKET_INDEX_DTYPE)
+    index['offset'] = offsets
+    index['id'] = ids
+    for pkt_id, elapsed_offset in _ELAPSED_OFFSETS.items():
+        has_elapsed = (ids == pkt_id) & (lengths >= elapsed_offset + _length_word.size)
+        if np.any(has_elapsed):
+            starts = offsets[has_elapsed] + packet_header.size + elapsed_offset
+            index['elapsed'][has_elapsed] = _gather_rows(raw, starts, np.dtype('<u4'))
+    return index
+
+## Determine which packets in a header walk have an elapsed time recorded in their payload
+#
+# \param ids        NumPy array of packet IDs
+# \param lengths    NumPy array of packet payload lengths
+# \return NumPy boolean array, True for packets that have an elapsed time
+def _has_elapsed(ids: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    rtn = np.zeros(len(ids), dtype=bool)
+    for pkt_id, elapsed_offset in _ELAPSED_OFFSETS.items():
+        rtn |= (ids == pkt_id) & (lengths >= elapsed_offset + _length_word.size)
+    return rtn
+
+## Replace the elapsed time field of a structured dtype with a 64-bit integer (for unwrapped elapsed times)
+#
+# \param dtype  NumPy structured dtype with an "elapsed" field
+# \return NumPy structured dtype with the same fields, but "elapsed" as int64
+def _unwrapped_dtype(dtype: np.dtype) -> np.dtype:
+    return np.dtype([(name, '<i8' if name == 'elapsed' else dtype.fields[name][0]) for name in dtype.names])
+
+## Copy a structured array into a new dtype with the same field names
+#
+# \param array  NumPy structured array to copy
+# \param dtype  NumPy structured dtype with the same field names as the array
+# \return NumPy structured array of the given dtype
+def _convert_fields(array: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    rtn = np.empty(len(array), dtype=dtype)
+    for name in dtype.names:
+        rtn[name] = array[name]
+    return rtn
+
+## Decode a whole WIBL file into per-packet-type NumPy structured arrays
+#
+# Rather than constructing an object for each packet, this walks the packet headers of the file once, grouping the
+# payloads by packet type, and then decodes all of the packets of each fixed-layout type (those classes that have
+# "layout_fields") in one operation into a structured array with fields named as for the class attributes (the
+# elapsed time is always "elapsed").  The dictionary returned is keyed by the PacketTypes name of each type seen,
+# and also has an "index" entry (as for build_index()) with the byte offset, ID, and elapsed time of every packet in
+# the file, in file order.  Variable-length packets (e.g., SerialString, Metadata) only appear in the index, and
+# should be read with a PacketFactory if required.  Packets of a fixed-layout type that have the
+# wrong payload length are reported and left out of the array for their type.
+#    If the elapsed time quantum is given, the elapsed times of all of the packets that have one are unwrapped for
+# laps of the logger's counter (see unwrap_elapsed()), and the "elapsed" fields of the index and the arrays are
+# int64 with the unwrapped times (packets with no elapsed time still have zero in the index).
+#
+# \param path                   Filename of the WIBL file to decode
+# \param elapsed_time_quantum   Maximum value that can be represented by the elapsed times, or None to leave the elapsed
+#                               times as recorded
+# \return Dictionary of NumPy structured arrays, keyed by packet type name, plus "index"
+def load_columnar(path, elapsed_time_quantum: Optional[int] = None) -> Dict[str, np.ndarray]:
+    with open(path, 'rb') as f:
+        data = f.read()
+    raw = np.frombuffer(data, dtype=np.uint8)
+
+    offsets, ids, lengths = _walk_headers(data)
+    index = _make_index(raw, offsets, ids, lengths)
+    unwrapped = None
+    if elapsed_time_quantum is not None:
+        has_elapsed = _has_elapsed(ids, lengths)
+        index = _convert_fields(index, _unwrapped_dtype(PACKET_INDEX_DTYPE))
+        index['elapsed'][has_elapsed] = unwrap_elapsed(index['elapsed'][has_elapsed], elapsed_time_quantum)
+        unwrapped = index['elapsed']
+    rtn: Dict[str, np.ndarray] = {}
+    for pkt_id in np.unique(ids):
+        pkt_id = int(pkt_id)
+        packet_class = PACKET_REGISTRY.get(pkt_id)
+        if packet_class is None or getattr(packet_class, 'layout_fields', None) is None:
+            continue
+        name = PacketTypes(pkt_id).name
+        selected = ids == pkt_id
+        well_formed = selected & (lengths == packet_class.layout.size)
+        n_bad = np.count_nonzero(selected) - np.count_nonzero(well_formed)
+        if n_bad > 0:
+            print(f'WARNING: {n_bad} {name} packets in file \'{path}\' have the wrong length; ignored.')
+        starts = offsets[well_formed] + packet_header.size
+        rtn[name] = _gather_rows(raw, starts, layout_dtype(packet_class))
+        if unwrapped is not None:
+            rtn[name] = _convert_fields(rtn[name], _unwrapped_dtype(rtn[name].dtype))
+            rtn[name]['elapsed'] = unwrapped[well_formed]
+    rtn['index'] = index
+    return rtn
+
+## Exception used to report a packet index sidecar file that cannot be interpreted
+class IndexFormatError(Exception):
+    pass
+
+## Suffix added to the name of a WIBL file to make the name of its packet index sidecar file
+INDEX_SUFFIX = '.idx'
+
+## Magic number at the start of a packet index sidecar file (includes the format version)
+_INDEX_MAGIC = b'WIBLIDX1'
+
+## Header of the packet index sidecar: magic, size of the WIBL file (bytes), modification time of the WIBL file (ns),
+# and number of packets in the index
+_index_header = struct.Struct('<8sQQQ')
+
+## Generate the name of the packet index sidecar file for a WIBL file
+#
+# \param path   Filename of the WIBL file
+# \return Filename of the corresponding index file
+def index_filename(path) -> str:
+    return str(path) + INDEX_SUFFIX
+
+## Build the packet index for a WIBL file
+#
+# This walks the packet headers of the file (through a memory map, so that the payloads are not read), recording the
+# byte offset of each packet, its ID, and its elapsed time (zero for packets that don't carry one).  The elapsed times
+# are as recorded in the file, i.e., they are not adjusted for wrap-around of the logger's counter.
+#
+# \param path   Filename of the WIBL file to index
+# \return NumPy array of PACKET_INDEX_DTYPE, one element per packet in file order
+def build_index(path) -> np.ndarray:
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return np.zeros(0, dtype=PACKET_INDEX_DTYPE)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            raw = np.frombuffer(mapped, dtype=np.uint8)
+            index = _make_index(raw, *_walk_headers(mapped))
+            del raw
+    return index
+
+## Write a packet index into a sidecar file next to the WIBL file
+#
+# The sidecar records the size and modification time of the WIBL file so that read_index() can detect that it is
+# out of date.
+#
+# \param path   Filename of the WIBL file that was indexed
+# \param index  NumPy array of PACKET_INDEX_DTYPE from build_index()
+# \return Filename of the index file written
+def write_index(path, index: np.ndarray) -> str:
+    status = os.stat(path)
+    filename = index_filename(path)
+    with open(filename, 'wb') as f:
+        f.write(_index_header.pack(_INDEX_MAGIC, status.st_size, status.st_mtime_ns, len(index)))
+        f.write(np.ascontiguousarray(index, dtype=PACKET_INDEX_DTYPE).tobytes())
+    return filename
+
+## Read the packet index for a WIBL file from its sidecar file, if it exists and is up to date
+#
+# \param path   Filename of the WIBL file (not the index)
+# \return NumPy array of PACKET_INDEX_DTYPE, or None if there is no sidecar or it does not match the WIBL file
+def read_index(path):
+    filename = index_filename(path)
+    if not os.path.exists(filename):
+        return None
+    with open(filename, 'rb') as f:
+        header = f.read(_index_header.size)
+        if len(header) < _index_header.size:
+            raise IndexFormatError(f'index file {filename} is truncated')
+        (magic, file_size, file_mtime, n_packets) = _index_header.unpack(header)
+        if magic != _INDEX_MAGIC:
+            raise IndexFormatError(f'index file {filename} does not start with the expected magic number')
+        status = os.stat(path)
+        if status.st_size != file_size or status.st_mtime_ns != file_mtime:
+            return None
+        index = np.fromfile(f, dtype=PACKET_INDEX_DTYPE, count=n_packets)
+    if len(index) != n_packets:
+        raise IndexFormatError(f'index file {filename} is truncated')
+    return index
+
+## Read the packet index for a WIBL file, building (and optionally saving) it if required
+#
+# \param path           Filename of the WIBL file
+# \param save_sidecar   Flag: set True to write a sidecar file if the index had to be built (failures to write the
+#                       file, e.g., in a read-only directory, are ignored)
+# \return NumPy array of PACKET_INDEX_DTYPE, one element per packet in file order
+def load_index(path, *, save_sidecar: bool = True) -> np.ndarray:
+    index = read_index(path)
+    if index is None:
+        index = build_index(path)
+        if save_sidecar:
+            try:
+                write_index(path, index)
+            except OSError:
+                pass
+    return index
+
+## Convert a collection of packet types into the set of packet IDs that they represent
+#
+# Packet types can be specified as DataPacket-derived classes, PacketTypes enum values, or integer IDs.
+#
+# \param types  Iterable of packet types
+# \return Set of integer packet IDs
+def packet_ids(types) -> set:
+    ids = set()
+    for t in types:
+        if isinstance(t, PacketTypes):
+            ids.add(t.value)
+        elif isinstance(t, type):
+            ids.update(pkt_id for pkt_id, packet_class in PACKET_REGISTRY.items() if packet_class is t)
+        else:
+            ids.add(int(t))
+    return ids
+
+## Random-access reader for WIBL files, using a packet index
+#
+# This uses the packet index (from the sidecar file if there is an up-to-date one, or otherwise by walking the packet
+# headers) to select packets by type and/or elapsed time range, and then reads only the packets selected.  Since the
+# index records the byte offset of each packet, extracting metadata packets or a window of data from a large file
+# does not require decoding (or reading) the rest of the file.
+class IndexedPacketReader:
+    ## Initialise the reader by opening the file and loading its index
+    #
+    # \param self           Pointer to the object
+    # \param path           Filename of the WIBL file
+    # \param strict_mode    If True, raise exception if a packet can't be decoded. If False, print a warning message.
+    # \param save_sidecar   Flag: set True to save the index as a sidecar file if it had to be built
+    def __init__(self, path, *,
+                 strict_mode: bool = False,
+                 save_sidecar: bool = True):
+        ## Filename of the WIBL file
+        self.path = str(path)
+        self.strict_mode = strict_mode
+        ## Index of all packets in the file (NumPy array of PACKET_INDEX_DTYPE)
+        self.index = load_index(path, save_sidecar=save_sidecar)
+        self.file = open(path, 'rb')
+
+    ## Determine which packets in the index are selected by type and/or elapsed time
+    #
+    # Packets are selected if they are of one of the types specified, and (if either limit on elapsed time is given)
+    # have an elapsed time in the closed interval given.  Packets that don't carry an elapsed time (e.g., metadata)
+    # can't be selected by time, and are therefore only included with time limits if include_untimed is set.
+    #
+    # \param self            Pointer to the object
+    # \param types           Iterable of packet types (see packet_ids()), or None for all types
+    # \param start           Earliest elapsed time (ms) to select, or None for no limit
+    # \param end             Latest elapsed time (ms) to select, or None for no limit
+    # \param include_untimed Flag: set True to include packets without elapsed times when limits are given
+    # \return NumPy boolean array, True for each entry in the index that is selected
+    def mask(self, types=None, start=None, end=None, *, include_untimed: bool = False) -> np.ndarray:
+        rtn = np.ones(len(self.index), dtype=bool)
+        if types is not None:
+            rtn &= np.isin(self.index['id'], list(packet_ids(types)))
+        if start is not None or end is not None:
+            timed = np.isin(self.index['id'], list(_ELAPSED_OFFSETS))
+            in_window = timed.copy()
+            if start is not None:
+                in_window &= self.index['elapsed'] >= start
+            if end is not None:
+                in_window &= self.index['elapsed'] <= end
+            if include_untimed:
+                in_window |= ~timed
+            rtn &= in_window
+        return rtn
+
+    ## Select the index entries for packets by type and/or elapsed time
+    #
+    # \param self   Pointer to the object
+    # \param types  Iterable of packet types (see packet_ids()), or None for all types
+    # \param start  Earliest elapsed time (ms) to select, or None for no limit
+    # \param end    Latest elapsed time (ms) to select, or None for no limit
+    # \return NumPy array of PACKET_INDEX_DTYPE for the selected packets, in file order (see mask() for details)
+    def select(self, types=None, start=None, end=None) -> np.ndarray:
+        return self.index[self.mask(types, start, end)]
+
+    ## Read the bytes of the packet (header and payload) at a given offset in the file
+    #
+    # \param self   Pointer to the object
+    # \param offset Byte offset of the packet header in the file
+    # \return Tuple of packet ID, and bytes of the packet as stored in the file (header and payload)
+    def raw_packet(self, offset: int):
+        self.file.seek(offset)
+        header = self.file.read(packet_header.size)
+        (pkt_id, pkt_len) = packet_header.unpack(header)
+        return pkt_id, header + self.file.read(pkt_len)
+
+    ## Read and decode the packet at a given offset in the file
+    #
+    # \param self   Pointer to the object
+    # \param offset Byte offset of the packet header in the file
+    # \return DataPacket-derived object for the packet, or None if it is of unknown type or can't be decoded
+    def read_packet(self, offset: int):
+        pkt_id, data = self.raw_packet(offset)
+        packet_class = PACKET_REGISTRY.get(pkt_id)
+        if packet_class is None:
+            print(f"Unknown packet with ID {pkt_id} at byte offset {offset} in input stream; ignored.")
+            return None
+        try:
+            return packet_class(buffer=data[packet_header.size:])
+        except struct.error as e:
+            if self.strict_mode:
+                raise PacketTranscriptionError(str(e)) from e
+            print(f"WARNING: Unable to read packet with ID {pkt_id} and name '{PacketTypes(pkt_id).name}' at byte "
+                  f"offset {offset} of file '{self.path}' due to error: '{str(e)}'. Ignoring as strict_mode is False.")
+            return None
+
+    ## Read the NMEA0183 sentence names of SerialString packets, without decoding the packets
+    #
+    # The name is characters 3-5 of the sentence (e.g., b'GGA' from b'$GPGGA,...'), and is read directly from the
+    # file through a memory map, in blocks to keep the temporary arrays bounded.  Sentences too short to have a full
+    # name give the characters that they do have (as for slicing the data of the decoded packet).
+    #
+    # \param self       Pointer to the object
+    # \param positions  NumPy array of positions in the index of SerialString packets
+    # \param block      Number of packets to read at a time
+    # \return Tuple of the list of distinct names (as bytes), and a NumPy array with the position in the list of the
+    #         name of each packet
+    def sentence_names(self, positions: np.ndarray, block: int = 65536) -> Tuple[List[bytes], np.ndarray]:
+        offsets = self.index['offset'].astype(np.int64)
+        file_size = os.fstat(self.file.fileno()).st_size
+        ends = np.append(offsets[1:], file_size)[positions]
+        starts = offsets[positions] + packet_header.size + _length_word.size + 3
+        available = np.clip(ends - starts, 0, 3)
+        codes = available.astype(np.uint32) << 24
+        if len(positions) > 0:
+            columns = np.arange(3, dtype=np.int64)
+            with mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                raw = np.frombuffer(mapped, dtype=np.uint8)
+                for base in range(0, len(starts), block):
+                    chars = raw[np.minimum(starts[base:base + block, None] + columns, file_size - 1)].astype(np.uint32)
+                    chars[columns >= available[base:base + block, None]] = 0
+                    codes[base:base + block] |= chars[:, 0] | (chars[:, 1] << 8) | (chars[:, 2] << 16)
+                del raw
+        unique, inverse = np.unique(codes, return_inverse=True)
+        names = [bytes((code >> (8*k)) & 0xFF for k in range(code >> 24)) for code in unique.tolist()]
+        return names, inverse.reshape(-1)
+
+    ## Copy packets to an output file verbatim, without decoding them
+    #
+    # Runs of packets that are adjacent in the input file are copied as a single byte range.
+    #
+    # \param self       Pointer to the object
+    # \param positions  NumPy array of (increasing) positions in the index of the packets to copy
+    # \param output     File object, opened for binary writes
+    # \param block      Maximum number of bytes to copy at a time
+    def copy_packets(self, positions: np.ndarray, output, block: int = 1024*1024) -> None:
+        if len(positions) == 0:
+            return
+        run_starts = np.concatenate(([0], np.flatnonzero(np.diff(positions) != 1) + 1))
+        run_ends = np.append(run_starts[1:], len(positions))
+        for first, last in zip(positions[run_starts], positions[run_ends - 1]):
+            begin = int(self.index['offset'][first])
+            if last + 1 < len(self.index):
+                end = int(self.index['offset'][last + 1])
+            else:
+                _, data = self.raw_packet(int(self.index['offset'][last]))
+                end = int(self.index['offset'][last]) + len(data)
+            self.file.seek(begin)
+            while begin < end:
+                data = self.file.read(min(block, end - begin))
+                if len(data) == 0:
+                    break
+                output.write(data)
+                begin += len(data)
+
+    ## Generate the decoded packets selected by type and/or elapsed time
+    #
+    # \param self   Pointer to the object
+    # \param types  Iterable of packet types (see packet_ids()), or None for all types
+    # \param start  Earliest elapsed time (ms) to select, or None for no limit
+    # \param end    Latest elapsed time (ms) to select, or None for no limit
+    # \return Generator of DataPacket-derived objects, in file order
+    def packets(self, types=None, start=None, end=None):
+        for offset in self.select(types, start, end)['offset']:
+            pkt = self.read_packet(int(offset))
+            if pkt is not None:
+                yield pkt
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+## Exception used to report a block-indexed container that is malformed or corrupt
+class ContainerFormatError(Exception):
+    pass
+
+## Block-indexed, compressed container for archiving WIBL files
+#
+# The container holds the packets of a WIBL file exactly as they appear in the original, grouped into blocks that
+# are compressed independently.  It starts with a header (magic bytes, format version, and compression codec), which
+# is followed by the blocks.  Each block has a header with the number of packets in the block, the range of elapsed
+# times of the packets in it that carry one, the uncompressed and compressed sizes, and the CRC32 of the uncompressed
+# data.  An index of the blocks follows the last block, and a trailer at the end of the file records where the index
+# starts.  The index allows blocks to be selected by elapsed time and decoded independently (see BlockReader), while
+# the block headers allow the container to be read sequentially from a stream (see decompressed_stream()), so that
+# the PacketFactory reads it like any other WIBL file.
+CONTAINER_MAGIC = COMPRESSION_MAGIC['block']
+## Version of the container format
+CONTAINER_VERSION = 1
+## Default target size (uncompressed bytes) of each block in the container
+DEFAULT_BLOCK_SIZE = 1024*1024
+## Compression codecs for the blocks, by name, giving the codec ID recorded in the container header
+BLOCK_CODECS: Dict[str, int] = {
+    'zlib': 1,
+    'xz': 2
+}
+## Compression and decompression functions for each codec ID
+_BLOCK_CODEC_FUNCTIONS = {
+    1: (zlib.compress, zlib.decompress),
+    2: (lzma.compress, lzma.decompress)
+}
+
+_container_header = struct.Struct('<8sHH')          # Magic, version, codec ID
+_BLOCK_MAGIC = b'WBLK'
+_block_header = struct.Struct('<4sIIIIII')          # Magic, packets, start elapsed, end elapsed, raw size, size, CRC32
+_BLOCK_INDEX_MAGIC = b'WIDX'
+_block_index_header = struct.Struct('<4sI')         # Magic, number of blocks
+_TRAILER_MAGIC = b'WIBLBEND'
+_container_trailer = struct.Struct('<Q8s')          # Byte offset of the block index, magic
+
+## Sentinel elapsed time range for blocks that have no packets with an elapsed time (start > end)
+_UNTIMED_RANGE = (0xFFFFFFFF, 0)
+
+## NumPy dtype for the entries of the block index of a container
+#
+# For each block, this records the byte offset of its header in the container and of its first packet in the
+# uncompressed data, along with the contents of its header.  Blocks in which no packet carries an elapsed time have
+# start > end.
+BLOCK_INDEX_DTYPE = [('offset', '<u8'), ('raw_offset', '<u8'), ('packets', '<u4'), ('start', '<u4'), ('end', '<u4'),
+                     ('raw_size', '<u4'), ('size', '<u4'), ('crc', '<u4')]
+
+## Read the header of a block-indexed container, and determine the codec used for its blocks
+#
+# \param file   File object positioned at the start of the container
+# \return Codec ID for the blocks in the container
+def _read_container_header(file) -> int:
+    buffer = file.read(_container_header.size)
+    if len(buffer) < _container_header.size:
+        raise ContainerFormatError('container header is truncated')
+    (magic, version, codec) = _container_header.unpack(buffer)
+    if magic != CONTAINER_MAGIC:
+        raise ContainerFormatError('not a block-indexed WIBL container')
+    if version > CONTAINER_VERSION:
+        raise ContainerFormatError(f'container version {version} is not supported')
+    if codec not in _BLOCK_CODEC_FUNCTIONS:
+        raise ContainerFormatError(f'unknown block codec {codec}')
+    return codec
+
+## Decompress the data for a block and check its size and CRC
+#
+# \param codec      Codec ID for the block
+# \param data       Compressed data for the block
+# \param raw_size   Expected size of the uncompressed data
+# \param crc        Expected CRC32 of the uncompressed data
+# \return Uncompressed data for the block
+def _decode_block(codec: int, data: bytes, raw_size: int, crc: int) -> bytes:
+    try:
+        rtn = _BLOCK_CODEC_FUNCTIONS[codec][1](data)
+    except (zlib.error, lzma.LZMAError) as e:
+        raise ContainerFormatError(f'block failed to decompress: {str(e)}') from e
+    if len(rtn) != raw_size or zlib.crc32(rtn) != crc:
+        raise ContainerFormatError('block failed size or CRC check')
+    return rtn
+
+## Write a block-indexed container
+#
+# Packets can be added either as DataPacket-derived objects, which are accumulated until there is (at least) a block's
+# worth of data, or as pre-formed blocks of packet data (e.g., a range of bytes from a WIBL file).  The index and
+# trailer are written when the writer is closed; the file itself is left open.
+class BlockWriter:
+    ## Initialise the writer, and write the container header
+    #
+    # \param self       Pointer to the object
+    # \param file       Open file object, which must be opened for binary writes
+    # \param codec      Name of the compression codec to use for the blocks (a key in BLOCK_CODECS)
+    # \param block_size Target size (uncompressed bytes) for the blocks
+    def __init__(self, file, *,
+                 codec: str = 'zlib',
+                 block_size: int = DEFAULT_BLOCK_SIZE):
+        if codec not in BLOCK_CODECS:
+            raise ContainerFormatError(f'unknown block codec {codec}')
+        self.file = file
+        self.codec = BLOCK_CODECS[codec]
+        self.block_size = block_size
+        self._blocks: List[tuple] = []
+        self._offset = _container_header.size
+        self._raw_offset = 0
+        self._buffer = io.BytesIO()
+        self._count = 0
+        (self._start, self._end) = _UNTIMED_RANGE
+        self.file.write(_container_header.pack(CONTAINER_MAGIC, CONTAINER_VERSION, self.codec))
+
+    ## Add a packet to the container
+    #
+    # \param self   Pointer to the object
+    # \param pkt    DataPacket-derived object to add
+    def write_packet(self, pkt: DataPacket) -> None:
+        pkt.serialise(self._buffer)
+        self._count += 1
+        if has_elapsed_time(pkt.id()):
+            elapsed = int(pkt.elapsed)
+            self._start = min(self._start, elapsed)
+            self._end = max(self._end, elapsed)
+        if self._buffer.tell() >= self.block_size:
+            self._flush()
+
+    ## Add a block of packet data to the container
+    #
+    # Any packets added with write_packet() are written out in a block of their own first, so that the order of the
+    # packets is preserved.
+    #
+    # \param self   Pointer to the object
+    # \param data   Bytes of the packets (headers and payloads) in the block
+    # \param count  Number of packets in the block
+    # \param start  Earliest elapsed time of packets in the block, or None if none of them carries one
+    # \param end    Latest elapsed time of packets in the block, or None if none of them carries one
+    def write_block(self, data: bytes, count: int, start: Optional[int] = None, end: Optional[int] = None) -> None:
+        self._flush()
+        if start is None or end is None:
+            (start, end) = _UNTIMED_RANGE
+        compressed = _BLOCK_CODEC_FUNCTIONS[self.codec][0](data)
+        crc = zlib.crc32(data)
+        self.file.write(_block_header.pack(_BLOCK_MAGIC, count, start, end, len(data), len(compressed), crc))
+        self.file.write(compressed)
+        self._blocks.append((self._offset, self._raw_offset, count, start, end, len(data), len(compressed), crc))
+        self._offset += _block_header.size + len(compressed)
+        self._raw_offset += len(data)
+
+    def _flush(self) -> None:
+        if self._count == 0:
+            return
+        data = self._buffer.getvalue()
+        (count, start, end) = (self._count, self._start, self._end)
+        self._buffer = io.BytesIO()
+        self._count = 0
+        (self._start, self._end) = _UNTIMED_RANGE
+        self.write_block(data, count, start, end)
+
+    ## Write any outstanding packets, followed by the block index and trailer
+    #
+    # \param self   Pointer to the object
+    # \return NumPy array of BLOCK_INDEX_DTYPE for the blocks written
+    def close(self) -> np.ndarray:
+        self._flush()
+        index = np.array(self._blocks, dtype=BLOCK_INDEX_DTYPE)
+        self.file.write(_block_index_header.pack(_BLOCK_INDEX_MAGIC, len(index)))
+        self.file.write(index.tobytes())
+        self.file.write(_container_trailer.pack(self._offset, _TRAILER_MAGIC))
+        return index
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+## Sequential reader for the packet data in a block-indexed container
+#
+# This decodes the blocks in turn as data is read, so that only one block is held in memory at a time, and
+# provides the concatenated packet data (i.e., the original WIBL file) as a raw, unseekable stream.  The block index
+# at the end of the container is not used, so that the container can be read from a stream.
+class _BlockStream(io.RawIOBase):
+    def __init__(self, file):
+        self._file = file
+        self._codec = _read_container_header(file)
+        self._data = b''
+        self._position = 0
+        self._offset = 0
+        self._done = False
+
+    def readable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._offset
+
+    def readinto(self, b) -> int:
+        while self._position >= len(self._data):
+            if self._done:
+                return 0
+            self._next_block()
+        n = min(len(b), len(self._data) - self._position)
+        b[:n] = self._data[self._position:self._position + n]
+        self._position += n
+        self._offset += n
+        return n
+
+    def _next_block(self) -> None:
+        self._data = b''
+        self._position = 0
+        header = self._file.read(_block_header.size)
+        if header[:len(_BLOCK_INDEX_MAGIC)] == _BLOCK_INDEX_MAGIC:
+            self._done = True
+            return
+        if len(header) < _block_header.size:
+            raise ContainerFormatError('block header is truncated')
+        (magic, _, _, _, raw_size, size, crc) = _block_header.unpack(header)
+        if magic != _BLOCK_MAGIC:
+            raise ContainerFormatError('bad block header')
+        self._data = _decode_block(self._codec, self._file.read(size), raw_size, crc)
+
+## Random-access reader for block-indexed containers
+#
+# This reads the block index from the end of the container so that blocks can be selected by elapsed time and read
+# (and checked) independently of each other, including decompressing them in parallel.
+class BlockReader:
+    ## Initialise the reader by opening the container and reading its block index
+    #
+    # \param self           Pointer to the object
+    # \param path           Filename of the container
+    # \param strict_mode    If True, raise exception if a packet can't be decoded. If False, print a warning message.
+    def __init__(self, path, *, strict_mode: bool = False):
+        ## Filename of the container
+        self.path = str(path)
+        self.strict_mode = strict_mode
+        self.file = open(path, 'rb')
+        try:
+            ## Codec ID for the blocks in the container
+            self.codec = _read_container_header(self.file)
+            ## Index of all blocks in the container (NumPy array of BLOCK_INDEX_DTYPE)
+            self.index = self._read_block_index()
+        except (ContainerFormatError, struct.error, ValueError) as e:
+            self.file.close()
+            raise ContainerFormatError(f"container '{self.path}' is malformed: {str(e)}") from e
+
+    def _read_block_index(self) -> np.ndarray:
+        self.file.seek(-_container_trailer.size, io.SEEK_END)
+        (index_offset, magic) = _container_trailer.unpack(self.file.read(_container_trailer.size))
+        if magic != _TRAILER_MAGIC:
+            raise ContainerFormatError('container trailer not found (is the container truncated?)')
+        self.file.seek(index_offset)
+        (magic, n_blocks) = _block_index_header.unpack(self.file.read(_block_index_header.size))
+        if magic != _BLOCK_INDEX_MAGIC:
+            raise ContainerFormatError('bad block index header')
+        dtype = np.dtype(BLOCK_INDEX_DTYPE)
+        return np.frombuffer(self.file.read(n_blocks * dtype.itemsize), dtype=dtype, count=n_blocks)
+
+    ## Determine which blocks might hold packets with elapsed times in a given range
+    #
+    # \param self   Pointer to the object
+    # \param start  Earliest elapsed time (ms) to select, or None for no limit
+    # \param end    Latest elapsed time (ms) to select, or None for no limit
+    # \return NumPy array of the positions in the block index of the blocks selected
+    def select(self, start=None, end=None) -> np.ndarray:
+        selected = np.ones(len(self.index), dtype=bool)
+        if start is not None or end is not None:
+            selected &= self.index['start'] <= self.index['end']
+            if start is not None:
+                selected &= self.index['end'] >= start
+            if end is not None:
+                selected &= self.index['start'] <= end
+        return np.flatnonzero(selected)
+
+    ## Read, decompress, and check the packet data for a block
+    #
+    # \param self       Pointer to the object
+    # \param position   Position of the block in the block index
+    # \return Bytes of the packets (headers and payloads) in the block
+    def read_block(self, position: int) -> bytes:
+        return self.read_blocks([position])[0]
+
+    ## Read, decompress, and check the packet data for a number of blocks, optionally in parallel
+    #
+    # The compressed data is read sequentially, and then the blocks are decompressed in a pool of threads (both
+    # zlib and lzma release the GIL while decompressing).
+    #
+    # \param self       Pointer to the object
+    # \param positions  Positions of the blocks in the block index
+    # \param workers    Number of threads to use to decompress the blocks
+    # \return List of bytes of the packets in each block, in the same order as the positions
+    def read_blocks(self, positions, workers: int = 1) -> List[bytes]:
+        entries = [self.index[int(p)] for p in positions]
+        compressed = []
+        for entry in entries:
+            self.file.seek(int(entry['offset']) + _block_header.size)
+            compressed.append(self.file.read(int(entry['size'])))
+        args = ([self.codec] * len(entries), compressed,
+                [int(e['raw_size']) for e in entries], [int(e['crc']) for e in entries])
+        if workers > 1 and len(entries) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(_decode_block, *args))
+        return list(map(_decode_block, *args))
+
+    ## Generate the decoded packets selected by type and/or elapsed time
+    #
+    # This has the same semantics as IndexedPacketReader.packets(), but only the blocks that might hold packets in the
+    # elapsed time range are read.
+    #
+    # \param self   Pointer to the object
+    # \param types  Iterable of packet types (see packet_ids()), or None for all types
+    # \param start  Earliest elapsed time (ms) to select, or None for no limit
+    # \param end    Latest elapsed time (ms) to select, or None for no limit
+    # \return Generator of DataPacket-derived objects, in file order
+    def packets(self, types=None, start=None, end=None):
+        windowed = start is not None or end is not None
+        for position in self.select(start, end):
+            source = PacketFactory(io.BytesIO(self.read_block(position)), strict_mode=self.strict_mode)
+            for pkt in source.iter_packets(types):
+                if windowed:
+                    if not has_elapsed_time(pkt.id()):
+                        continue
+                    if (start is not None and pkt.elapsed < start) or (end is not None and pkt.elapsed > end):
+                        continue
+                yield pkt
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+## Repack a WIBL file into a block-indexed container
+#
+# The file is divided into blocks at packet boundaries (using the packet index; see build_index()), so that the
+# original file can be recovered exactly with unpack_file().  Any bytes at the end of the file that don't make up a
+# complete packet are kept in the last block.
+#
+# \param input      Filename of the WIBL file to repack
+# \param output     Filename for the container
+# \param codec      Name of the compression codec to use for the blocks (a key in BLOCK_CODECS)
+# \param block_size Target size (uncompressed bytes) for the blocks
+# \return NumPy array of BLOCK_INDEX_DTYPE for the blocks written
+def pack_file(input, output, *, codec: str = 'zlib', block_size: int = DEFAULT_BLOCK_SIZE) -> np.ndarray:
+    index = build_index(input)
+    offsets = index['offset'].astype(np.int64)
+    timed = np.isin(index['id'], list(_ELAPSED_OFFSETS))
+    with open(input, 'rb') as f, open(output, 'wb') as o:
+        file_size = os.fstat(f.fileno()).st_size
+        # Position in the packet index of the first packet of each block
+        firsts = np.unique(np.searchsorted(offsets, np.arange(0, max(file_size, 1), block_size)))
+        firsts = firsts[firsts < len(offsets)]
+        lasts = np.append(firsts[1:], len(offsets))
+        writer = BlockWriter(o, codec=codec, block_size=block_size)
+        if len(offsets) == 0 and file_size > 0:
+            writer.write_block(f.read(), 0)
+        for first, last in zip(firsts, lasts):
+            begin = int(offsets[first])
+            end = int(offsets[last]) if last < len(offsets) else file_size
+            f.seek(begin)
+            elapsed = index['elapsed'][first:last][timed[first:last]]
+            if len(elapsed) > 0:
+                writer.write_block(f.read(end - begin), int(last - first), int(elapsed.min()), int(elapsed.max()))
+            else:
+                writer.write_block(f.read(end - begin), int(last - first))
+        return writer.close()
+
+## Recover the original WIBL file from a block-indexed (or otherwise compressed) file
+#
+# \param input      Filename of the container
+# \param output     Filename for the WIBL file
+def unpack_file(input, output) -> None:
+    with open(input, 'rb') as f, open(output, 'wb') as o:
+        shutil.copyfileobj(decompressed_stream(f), o)
@@ -0,0 +1,276 @@
+## \file nmea0183.py
+# \brief Lightweight parser for the NMEA0183 sentences used in timestamping WIBL data
+#
+# Each NMEA0183 string recorded by the logger has to be parsed to find the reference times, positions,
+# depths, and other values used in the timestamping.  The general-purpose parser in pynmea2 constructs a
+# full object for each sentence (through a regular expression), and signals problems through exceptions,
+# which dominates the cost of processing a file with a lot of NMEA0183 data.  The parser here handles
+# only the sentences that are used (GGA, GLL, ZDA, RMC, DBT, DPT, HDT, MWD, and MTW), working directly on
+# the raw bytes of the sentence and returning just the numeric values required.  Anything that this
+# parser doesn't accept outright (other sentences, malformed or unusual strings, checksum errors, etc.)
+# is passed to pynmea2 instead, so that the results (including any exceptions raised for broken data) are
+# the same as if pynmea2 had been used for everything.
+#
+# Copyright 2026 Center for Coastal and Ocean Mapping & NOAA-UNH Joint
+# Hydrographic Center, University of New Hampshire.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+
+import datetime as dt
+import functools
+import operator
+from typing import Callable, Collection, Dict, List, Optional, Tuple
+
+import pynmea2 as nmea
+
+## Names of the NMEA0183 sentences that can be interpreted
+SENTENCES = ('GGA', 'GLL', 'ZDA', 'RMC', 'DBT', 'DPT', 'HDT', 'MWD', 'MTW')
+
+## Values that the parser returns for a sentence (see parse())
+Values = Tuple[Optional[float], ...]
+
+## Check whether a field is a plain decimal number (optional sign, digits, optional decimal point)
+#
+# \param field  Raw bytes of the field
+# \return True if the field can be converted with float() exactly as pynmea2 would convert it with Decimal()
+def _is_decimal(field: bytes) -> bool:
+    if field[:1] in (b'+', b'-'):
+        field = field[1:]
+    integer, _, fraction = field.partition(b'.')
+    return (integer.isdigit() or integer == b'') and (fraction.isdigit() or fraction == b'') \
+        and (integer != b'' or fraction != b'')
+
+## Convert an optional decimal field to a number
+#
+# \param field  Raw bytes of the field
+# \return Tuple of a flag that is False if the field isn't a plain decimal number, and the value (None if empty)
+def _decimal(field: bytes) -> Tuple[bool, Optional[float]]:
+    if field == b'':
+        return True, None
+    if not _is_decimal(field):
+        return False, None
+    return True, float(field)
+
+## Convert a NMEA0183 time of day (hhmmss.ss) and date to seconds since the epoch (UTC)
+#
+# \param time   Raw bytes of the time of day field
+# \param year   Year for the date
+# \param month  Month of the year
+# \param day    Day of the month
+# \return Seconds since the epoch, or None if the time or date are not valid
+def _epoch_seconds(time: bytes, year: int, month: int, day: int) -> Optional[float]:
+    fraction = time[6:]
+    if len(time) < 6 or not time[:6].isdigit() or (fraction != b'' and not _is_decimal(fraction)):
+        return None
+    microsecond = int(float(fraction)*1000000) if fraction != b'' else 0
+    try:
+        return dt.datetime(year, month, day, int(time[0:2]), int(time[2:4]), int(time[4:6]), microsecond,
+                           tzinfo=dt.timezone.utc).timestamp()
+    except (ValueError, OverflowError):
+        return None
+
+## Convert a NMEA0183 position (degrees and decimal minutes) with hemisphere to signed decimal degrees
+#
+# \param field      Raw bytes of the position field
+# \param hemisphere Raw bytes of the hemisphere field
+# \param positive   Hemisphere indicator for positive values (b'N' or b'E')
+# \param negative   Hemisphere indicator for negative values (b'S' or b'W')
+# \return Tuple of a flag that is False if the position isn't in the expected format, and the position
+def _coordinate(field: bytes, hemisphere: bytes, positive: bytes, negative: bytes) -> Tuple[bool, float]:
+    if field == b'' or field == b'0':
+        value = 0.
+    else:
+        point = field.find(b'.')
+        if point < 3 or not field[:point].isdigit() or not field[point+1:].isdigit():
+            return False, 0.
+        value = float(field[:point-2]) + float(field[point-2:])/60
+    if hemisphere == positive:
+        return True, value
+    if hemisphere == negative:
+        return True, -value
+    return True, 0.
+
+## Interpret the time from a ZDA sentence
+#
+# \param fields List of the raw bytes of the fields of the sentence
+# \return Tuple of the time in seconds since the epoch (or None if not set), or None if not interpretable
+def _zda(fields: List[bytes]) -> Optional[Values]:
+    if len(fields) < 4 or not (fields[1].isdigit() and fields[2].isdigit() and fields[3].isdigit()):
+        return None
+    year, month, day = int(fields[3]), int(fields[2]), int(fields[1])
+    try:
+        dt.date(year, month, day)
+    except ValueError:
+        return None
+    if fields[0] == b'':
+        return None,
+    seconds = _epoch_seconds(fields[0], year, month, day)
+    if seconds is None:
+        return None
+    return seconds,
+
+## Interpret the time from an RMC sentence
+#
+# \param fields List of the raw bytes of the fields of the sentence
+# \return Tuple of the time in seconds since the epoch (or None if not set), or None if not interpretable
+def _rmc(fields: List[bytes]) -> Optional[Values]:
+    time = fields[0]
+    date = fields[8] if len(fields) > 8 else b''
+    if time == b'' or date == b'':
+        return None,
+    if len(date) != 6 or not date.isdigit():
+        return None
+    year = int(date[4:6])
+    seconds = _epoch_seconds(time, year + (2000 if year < 69 else 1900), int(date[2:4]), int(date[0:2]))
+    if seconds is None:
+        return None
+    return seconds,
+
+## Build the interpreter for the position in a GGA or GLL sentence
+#
+# \param first  Index of the latitude field in the sentence (the hemisphere, longitude, etc. follow)
+# \return Function that converts the fields of the sentence to a tuple of (latitude, longitude)
+def _position(first: int) -> Callable[[List[bytes]], Optional[Values]]:
+    def interpret(fields: List[bytes]) -> Optional[Values]:
+        fields = fields[first:first+4] + [b'']*(first + 4 - len(fields))
+        lat_ok, lat = _coordinate(fields[0], fields[1], b'N', b'S')
+        lon_ok, lon = _coordinate(fields[2], fields[3], b'E', b'W')
+        if not (lat_ok and lon_ok):
+            return None
+        return lat, lon
+    return interpret
+
+## Build the interpreter for sentences providing decimal values
+#
+# If any of the fields is empty, all of the values are returned as None, since they are only used together.
+#
+# \param indices    Indices of the fields in the sentence to convert
+# \return Function that converts the fields of the sentence to a tuple of values
+def _decimals(*indices: int) -> Callable[[List[bytes]], Optional[Values]]:
+    def interpret(fields: List[bytes]) -> Optional[Values]:
+        values = []
+        for index in indices:
+            ok, value = _decimal(fields[index] if index < len(fields) else b'')
+            if value is None:
+                return (None,)*len(indices) if ok else None
+            values.append(value)
+        return tuple(values)
+    return interpret
+
+## Interpreters for the sentences, with the sentence name
+_INTERPRETERS: Dict[bytes, Tuple[str, Callable[[List[bytes]], Optional[Values]]]] = {
+    b'GGA': ('GGA', _position(1)),
+    b'GLL': ('GLL', _position(0)),
+    b'ZDA': ('ZDA', _zda),
+    b'RMC': ('RMC', _rmc),
+    b'DBT': ('DBT', _decimals(2)),
+    b'DPT': ('DPT', _decimals(0)),
+    b'HDT': ('HDT', _decimals(0)),
+    b'MWD': ('MWD', _decimals(0, 6)),
+    b'MTW': ('MTW', _decimals(0))
+}
+
+## Convert the value of a pynmea2 attribute as the timestamping code has always done
+def _float(value) -> Optional[float]:
+    return None if value is None else float(value)
+
+def _pynmea2_time(msg) -> Values:
+    if msg.datestamp is not None and msg.timestamp is not None:
+        return dt.datetime.combine(msg.datestamp, msg.timestamp).timestamp(),
+    return None,
+
+def _pynmea2_position(msg) -> Values:
+    if msg.latitude is not None and msg.longitude is not None:
+        return msg.latitude, msg.longitude
+    return None, None
+
+def _pynmea2_wind(msg) -> Values:
+    if msg.direction_true is not None and msg.wind_speed_meters is not None:
+        return float(msg.direction_true), float(msg.wind_speed_meters)
+    return None, None
+
+## Interpreters for sentences parsed by pynmea2, giving the same values as the interpreters above
+_PYNMEA2_INTERPRETERS: Dict[type, Tuple[str, Callable]] = {
+    nmea.GGA: ('GGA', _pynmea2_position),
+    nmea.GLL: ('GLL', _pynmea2_position),
+    nmea.ZDA: ('ZDA', _pynmea2_time),
+    nmea.RMC: ('RMC', _pynmea2_time),
+    nmea.DBT: ('DBT', lambda msg: (_float(msg.depth_meters),)),
+    nmea.DPT: ('DPT', lambda msg: (_float(msg.depth),)),
+    nmea.HDT: ('HDT', lambda msg: (_float(msg.heading),)),
+    nmea.MWD: ('MWD', _pynmea2_wind),
+    nmea.MTW: ('MTW', lambda msg: (_float(msg.temperature),))
+}
+
+## Attempt to parse a NMEA0183 sentence without using pynmea2
+#
+# The sentence is only accepted if it is a well-formed, checksummed, sentence from a talker (i.e., not proprietary)
+# of one of the types that can be interpreted, with fields in the expected formats.
+#
+# \param data       Raw bytes of the sentence
+# \param sentences  Names of the sentences to interpret
+# \return Tuple of (True, sentence name and values) if the sentence is to be interpreted, (True, None) if the sentence
+#         is valid but not one of those requested, or (False, None) if the sentence has to be parsed by pynmea2
+def _parse_fast(data: bytes, sentences: Collection[str]) -> Tuple[bool, Optional[Tuple[str, Values]]]:
+    star = data.find(b'*')
+    if data[:1] != b'$' or data[1:2] in (b'P', b'p') or star < 0 or data[star+3:].strip() != b'':
+        return False, None
+    body = data[1:star]
+    interpreter = _INTERPRETERS.get(body[2:5])
+    if interpreter is None or body[5:6] != b',' or not body[:2].isalnum() or not body.isascii():
+        return False, None
+    checksum = data[star+1:star+3]
+    try:
+        if len(checksum) != 2 or not checksum.isalnum() \
+                or int(checksum, 16) != functools.reduce(operator.xor, body, 0):
+            return False, None
+    except ValueError:
+        return False, None
+    name, interpret = interpreter
+    if name not in sentences:
+        return True, None
+    values = interpret(body[6:].split(b','))
+    if values is None:
+        return False, None
+    return True, (name, values)
+
+## Parse a NMEA0183 sentence, returning the values used for timestamping
+#
+# The values returned depend on the sentence: the real time in seconds since the epoch (UTC) for ZDA and RMC, the
+# latitude and longitude in decimal degrees for GGA and GLL, the depth in metres for DBT and DPT, the heading in
+# degrees for HDT, the wind direction in degrees and speed in metres/second for MWD, and the water temperature in
+# degrees Celsius for MTW.  Values that are not set in the sentence are None.  Sentences that can't be parsed
+# directly are parsed with pynmea2, and therefore raise the same exceptions as pynmea2 (or the conversion of its
+# results) would (e.g., pynmea2.ParseError, pynmea2.ChecksumError, TypeError, UnicodeDecodeError).
+#
+# \param data       Raw bytes of the sentence
+# \param sentences  Names of the sentences to interpret (a subset of SENTENCES); other sentences are still checked
+#                   for validity (raising exceptions as appropriate), but return None
+# \return Tuple of the sentence name and values, or None if the sentence isn't one of those requested
+def parse(data: bytes, sentences: Collection[str] = SENTENCES) -> Optional[Tuple[str, Values]]:
+    parsed, result = _parse_fast(data, sentences)
+    if parsed:
+        return result
+    msg = nmea.parse(data.decode('UTF-8'))
+    interpreter = _PYNMEA2_INTERPRETERS.get(type(msg))
+    if interpreter is None or interpreter[0] not in sentences:
+        return None
+    name, interpret = interpreter
+    return name, interpret(msg)
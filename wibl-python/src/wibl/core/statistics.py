@@ -28,8 +28,8 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
 # OR OTHER DEALINGS IN THE SOFTWARE.
 
-from dataclasses import dataclass
 from enum import Enum
+from typing import Any, Dict, List, Tuple
 
 
 ## Exception indicating that the caller asked for a packet type that is not being tracked
@@ -57,49 +57,80 @@ class PktFaults(Enum):
 class NoSuchFault(Exception):
     pass
 
+## Names of the counters in StatCounters, in index order: the observation count, then the faults in PktFaults order
+COUNTER_NAMES = ('observed', 'parse_fault', 'short_msg', 'decode_fault', 'attrib_fault', 'type_fault', 'chksum_fault')
+
+## Index of the observation count in StatCounters.counts
+OBSERVED = 0
+
+## Index in StatCounters.counts of the counter for each type of fault
+FAULT_INDEX: Dict[PktFaults, int] = {fault: fault.value + 1 for fault in PktFaults}
+
+## Generate a read-only property for one of the counters in StatCounters, by index
+def _counter(index: int) -> property:
+    return property(lambda self: self.counts[index], doc=f'Count of {COUNTER_NAMES[index]}')
+
 ## \class StatCounters
 #
 # Provide a data object to count the number of times that a packet is observed in the data stream, and
 # the count of faults observed when manipulating the packet (broken into a number of categories).  The
 # object provides methods to count the total number of faults, and to serialise the contents for reporting.
+#    The counts are held in a list indexed as for COUNTER_NAMES (see also OBSERVED and FAULT_INDEX), and the
+# total number of faults is maintained as they are counted, so that it doesn't have to be recomputed.
 
-@dataclass
 class StatCounters:
-    observed:       int = 0
-    parse_fault:    int = 0
-    short_msg:      int = 0
-    decode_fault:   int = 0
-    attrib_fault:   int = 0
-    type_fault:     int = 0
-    chksum_fault:   int = 0
+    __slots__ = ('counts', 'faults')
+
+    def __init__(self) -> None:
+        ## Counts of observations and each type of fault, indexed as for COUNTER_NAMES
+        self.counts: List[int] = [0] * len(COUNTER_NAMES)
+        ## Total number of faults of all types
+        self.faults: int = 0
+
+    observed = _counter(OBSERVED)
+    parse_fault = _counter(FAULT_INDEX[PktFaults.ParseFault])
+    short_msg = _counter(FAULT_INDEX[PktFaults.ShortMessage])
+    decode_fault = _counter(FAULT_INDEX[PktFaults.DecodeFault])
+    attrib_fault = _counter(FAULT_INDEX[PktFaults.AttributeFault])
+    type_fault = _counter(FAULT_INDEX[PktFaults.TypeFault])
+    chksum_fault = _counter(FAULT_INDEX[PktFaults.ChecksumFault])
 
     ## Count the number of times that the object has been observed in the datastream
-    def Observed(self) -> None:
-        self.observed += 1
-    
+    #
+    # \param count  Number of observations to add
+    def Observed(self, count: int = 1) -> None:
+        self.counts[OBSERVED] += count
+
+    ## Count a fault on the object
+    #
+    # \param index  Index of the fault counter (see FAULT_INDEX)
+    def AddFault(self, index: int) -> None:
+        self.counts[index] += 1
+        self.faults += 1
+
     ## Count the number of times an object has failed to parse correctly
     def ParseFault(self) -> None:
-        self.parse_fault += 1
+        self.AddFault(FAULT_INDEX[PktFaults.ParseFault])
     
     ## Count the number of times an object has come up short on the data expected
     def ShortMessage(self) -> None:
-        self.short_msg += 1
+        self.AddFault(FAULT_INDEX[PktFaults.ShortMessage])
 
     ## Count the number of times an object has failed to decode a bytes object into a string
     def DecodeFault(self) -> None:
-        self.decode_fault += 1
+        self.AddFault(FAULT_INDEX[PktFaults.DecodeFault])
     
     ## Count the number of times an object has thrown attribute errors during manipulation (usually a coding error)
     def AttributeFault(self) -> None:
-        self.attrib_fault += 1
+        self.AddFault(FAULT_INDEX[PktFaults.AttributeFault])
     
     ## Count the number of times an object has thrown type errors during manipulation (usually a coding error)
     def TypeFault(self) -> None:
-        self.type_fault += 1
+        self.AddFault(FAULT_INDEX[PktFaults.TypeFault])
     
     ## Count the number of times an object has failed a checksum verification
     def ChecksumFault(self) -> None:
-        self.chksum_fault += 1
+        self.AddFault(FAULT_INDEX[PktFaults.ChecksumFault])
 
     ## Count the total number of faults that have been seen on the object
     #
@@ -109,7 +140,32 @@ class StatCounters:
     #
     # \return Total number of faults recorded for this object
     def FaultCount(self) -> int:
-        return self.parse_fault + self.short_msg + self.decode_fault + self.attrib_fault + self.type_fault + self.chksum_fault
+        return self.faults
+
+    ## Add the counts from another set of counters into this one
+    #
+    # \param other  (StatCounters) Counters to add into this object
+    def merge(self, other: 'StatCounters') -> None:
+        counts = self.counts
+        for index, count in enumerate(other.counts):
+            counts[index] += count
+        self.faults += other.faults
+
+    ## Generate a dictionary of the counters, and the total number of faults
+    #
+    # \return Dictionary mapping the names in COUNTER_NAMES, and 'faults', to the counts
+    def to_dict(self) -> Dict[str, int]:
+        rtn = dict(zip(COUNTER_NAMES, self.counts))
+        rtn['faults'] = self.faults
+        return rtn
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, StatCounters):
+            return NotImplemented
+        return self.counts == other.counts
+
+    def __repr__(self) -> str:
+        return f'StatCounters({", ".join(f"{n}={c}" for n, c in zip(COUNTER_NAMES, self.counts))})'
 
     ## Generate a printable representation of the current object's information
     def __str__(self) -> str:
@@ -137,7 +193,9 @@ class PktStats:
     # \param fault_limit    Number of faults to report before suppressing output
     def __init__(self, fault_limit: int) -> None:
         self.fault_limit = fault_limit
-        self.packets = {}
+        self.packets: Dict[str, StatCounters] = {}
+        ## List of (start, end) byte ranges of the file skipped as corrupt (see LoggerFile.PacketFactory)
+        self.skipped: List[Tuple[int, int]] = []
     
     ## Ensure that the packet specified is in the dictionary of objects being tracked
     #
@@ -158,9 +216,12 @@ class PktStats:
     # if has not been done before.
     #
     # \param name   Name of the object to track
-    def Observed(self, name: str) -> None:
-        self.EnsureName(name)
-        self.packets[name].Observed()
+    # \param count  Number of observations to add (e.g., when counting packets from an index)
+    def Observed(self, name: str, count: int = 1) -> None:
+        counters = self.packets.get(name)
+        if counters is None:
+            counters = self.packets[name] = StatCounters()
+        counters.counts[OBSERVED] += count
 
     ## Increment the count for how many times a particular fault has been seen on the packet
     #
@@ -170,21 +231,14 @@ class PktStats:
     # \param name   Name of the object that caused the fault
     # \param fault  (PktFaults) Fault that the packet caused
     def Fault(self, name: str, fault: PktFaults) -> None:
-        self.EnsureName(name)
-        if fault == PktFaults.ParseFault:
-            self.packets[name].ParseFault()
-        elif fault == PktFaults.ShortMessage:
-            self.packets[name].ShortMessage()
-        elif fault == PktFaults.DecodeFault:
-            self.packets[name].DecodeFault()
-        elif fault == PktFaults.AttributeFault:
-            self.packets[name].AttributeFault()
-        elif fault == PktFaults.TypeFault:
-            self.packets[name].TypeFault()
-        elif fault == PktFaults.ChecksumFault:
-            self.packets[name].ChecksumFault()
-        else:
+        index = FAULT_INDEX.get(fault)
+        if index is None:
             raise NoSuchFault()
+        counters = self.packets.get(name)
+        if counters is None:
+            counters = self.packets[name] = StatCounters()
+        counters.counts[index] += 1
+        counters.faults += 1
 
     ## Determine whether the named packet has been seen in the data stream
     #
@@ -203,10 +257,7 @@ class PktStats:
     #
     # \return Count of all packets registered as seen in the data stream
     def TotalCount(self) -> int:
-        rtn = 0
-        for p in self.packets:
-            rtn += self.packets[p].observed
-        return rtn
+        return sum(counters.counts[OBSERVED] for counters in self.packets.values())
     
     ## Determine the total count of faults registered for a given packet
     #
@@ -216,14 +267,64 @@ class PktStats:
     # \param name   Name of the object to report on
     # \return Total number of faults registered for the given packet
     def FaultCount(self, name: str) -> int:
-        if name not in self.packets:
+        counters = self.packets.get(name)
+        if counters is None:
             raise NoSuchPacket()
-        return self.packets[name].FaultCount()
+        return counters.faults
     
+    ## Record a range of bytes that was skipped in the data stream as corrupt
+    #
+    # \param start  Byte offset of the start of the range skipped
+    # \param end    Byte offset of the end of the range skipped (i.e., of the next plausible packet)
+    def Skipped(self, start: int, end: int) -> None:
+        self.skipped.append((start, end))
+
+    ## Determine the total number of bytes skipped in the data stream as corrupt
+    #
+    # \return Total size of the byte ranges recorded by Skipped()
+    def SkippedBytes(self) -> int:
+        return sum(end - start for start, end in self.skipped)
+
+    ## Add the statistics from another tracker into this one
+    #
+    # This is used to combine statistics gathered separately on parts of a file (e.g., when decoding chunks of
+    # a file in parallel).  Packets are added to the dictionary in the order in which they are first seen in
+    # the other tracker, so merging the trackers for consecutive parts of a file in order gives the same result
+    # as tracking the whole file in one pass.  Merging is associative, so the statistics for the parts can be
+    # combined in any grouping (e.g., pairwise as the parts are finished, or with functools.reduce()), provided that
+    # the order of the parts is kept.
+    #
+    # \param other  (PktStats) Statistics to add into this object
+    # \return This object, with the statistics from \a other added
+    def merge(self, other: 'PktStats') -> 'PktStats':
+        for name, counters in other.packets.items():
+            mine = self.packets.get(name)
+            if mine is None:
+                mine = self.packets[name] = StatCounters()
+            mine.merge(counters)
+        self.skipped.extend(other.skipped)
+        return self
+
+    ## Generate a dictionary of the statistics, suitable for encoding as JSON (e.g., for reporting to the manager)
+    #
+    # \return Dictionary with the 'fault_limit', the counters for each packet (see StatCounters.to_dict()) in
+    #         'packets', the ranges of bytes in 'skipped', and the total 'skipped_bytes'
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'fault_limit': self.fault_limit,
+            'packets': {name: counters.to_dict() for name, counters in self.packets.items()},
+            'skipped': [[start, end] for start, end in self.skipped],
+            'skipped_bytes': self.SkippedBytes()
+        }
+
     ## Generate a printable representation of the statistics for all of the packets observed
     def __str__(self) -> str:
         n_sentences = len(self.packets)
         rtn = f'Packet Statistics ({n_sentences} unique seen):\n'
         for p in self.packets:
             rtn += f'\t{p:>17}: {self.packets[p]}\n'
+        if self.skipped:
+            rtn += f'Skipped {self.SkippedBytes()} bytes of corrupt data in {len(self.skipped)} ranges:\n'
+            for start, end in self.skipped:
+                rtn += f'\t[{start}, {end})\n'
         return rtn
@@ -35,17 +35,26 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
 # OR OTHER DEALINGS IN THE SOFTWARE.
 
-from typing import Dict, Any
-import datetime as dt
+from collections.abc import Mapping, MutableMapping
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+import itertools
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
 import pynmea2 as nmea
 
 import wibl.core.logger_file as LoggerFile
-from wibl.core.fileloader import TimeSource, load_file
+from wibl.core.fileloader import TimeSource, IncrementalReader, load_file, scan_file, stream_packets, \
+    StreamingUnavailable
 from wibl.core.fileloader import NoTimeSource as flNoTimeSource
 from wibl.core.algorithm import AlgorithmPhase, UnknownAlgorithm
 from wibl.core.algorithm.runner import run_algorithms
 from wibl.core import Lineage
+from wibl.core.instrumentation import stage
 from wibl.core.interpolation import InterpTable
+import wibl.core.nmea0183 as nmea0183
 from wibl.core.statistics import PktStats, PktFaults
 
 
@@ -61,6 +70,10 @@ class NewerDataFile(Exception):
 class NoTimeSource(Exception):
     pass
 
+## Exception to indicate that a channel requested from time_interpolation() is not known
+class UnknownChannel(Exception):
+    pass
+
 ## Construct an encoded integer representing a protocol version
 #
 # Create an encoded integer that represents a combined major/minor version
@@ -95,6 +108,359 @@ protocol_version_minor = 3
 ## Maximum protocol version understood by the code
 maximum_version = protocol_version(protocol_version_major, protocol_version_minor)
 
+## Number of seconds in a day, for converting NMEA2000 dates and times
+seconds_per_day = 24.0 * 60.0 * 60.0
+
+## Channel describes a dataset that can be extracted from a WIBL file, and where its observations come from
+#
+# Each channel has one or more variables, which are filled from the packets of the given classes (through a function
+# that extracts the values of the variables, in order, from a packet), and/or from the given NMEA0183 sentences (for
+# which the values provided by wibl.core.nmea0183.parse() are in the same order as the variables).
+@dataclass(eq=True, frozen=True)
+class Channel:
+    variables: Tuple[str, ...]
+    packets: Dict[type, Callable[[LoggerFile.DataPacket], Tuple]] = field(default_factory=dict)
+    sentences: Tuple[str, ...] = ()
+
+## Registry of the channels that can be extracted from a WIBL file, by the name used in the output
+CHANNELS: Dict[str, Channel] = {
+    'depth': Channel(('z',), {LoggerFile.Depth: lambda pkt: (pkt.depth,)}, ('DBT', 'DPT')),
+    'heading': Channel(('heading',), sentences=('HDT',)),
+    'watertemp': Channel(('temperature',), sentences=('MTW',)),
+    'wind': Channel(('direction', 'speed'), sentences=('MWD',)),
+    'attitude': Channel(('yaw', 'pitch', 'roll'), {LoggerFile.Attitude: lambda pkt: (pkt.yaw, pkt.pitch, pkt.roll)}),
+    'cog': Channel(('course', 'speed'),
+                   {LoggerFile.COG: lambda pkt: (pkt.courseOverGround, pkt.speedOverGround)}),
+    'environment': Channel(('temperature', 'humidity', 'pressure'),
+                           {LoggerFile.Environment: lambda pkt: (pkt.temperature, pkt.humidity, pkt.pressure)}),
+    'temperature': Channel(('temperature',), {LoggerFile.Temperature: lambda pkt: (pkt.temperature,)})
+}
+
+## Channels generated by time_interpolation() unless others are requested, in the order they appear in the output
+DEFAULT_CHANNELS = ('depth', 'heading', 'watertemp', 'wind')
+
+## Sources of real-world time for each TimeSource, as channels with the single variable 'ref'
+#
+# Packets for all of these sources are noted in the statistics, even if they're not the time source for the file.
+TIME_CHANNELS: Dict[TimeSource, Channel] = {
+    TimeSource.Time_SysTime: Channel(('ref',), {LoggerFile.SystemTime:
+                                                lambda pkt: (pkt.date * seconds_per_day + pkt.timestamp,)}),
+    TimeSource.Time_GNSS: Channel(('ref',), {LoggerFile.GNSS:
+                                             lambda pkt: (pkt.msg_date * seconds_per_day + pkt.msg_timestamp,)}),
+    TimeSource.Time_ZDA: Channel(('ref',), sentences=('ZDA',)),
+    TimeSource.Time_RMC: Channel(('ref',), sentences=('RMC',))
+}
+
+## Source of position information, used to position the observations in all channels
+POSITION_CHANNEL = Channel(('lat', 'lon'), {LoggerFile.GNSS: lambda pkt: (pkt.latitude, pkt.longitude)},
+                           ('GGA', 'GLL'))
+
+## Build the dispatch tables that route packets and NMEA0183 sentences to the interpolation tables that they feed
+#
+# \param channels   List of (Channel, InterpTable) pairs to be filled
+# \return Tuple of dictionaries mapping packet class, and NMEA0183 sentence name, to the list of (table, variables,
+#         extractor) and (table, variables) entries to be updated from them
+def _dispatch_tables(channels: List[Tuple[Channel, InterpTable]]) -> Tuple[Dict[type, List], Dict[str, List]]:
+    packet_feeds: Dict[type, List] = {}
+    sentence_feeds: Dict[str, List] = {}
+    for channel, table in channels:
+        for packet_class, extract in channel.packets.items():
+            packet_feeds.setdefault(packet_class, []).append((table, channel.variables, extract))
+        for sentence in channel.sentences:
+            sentence_feeds.setdefault(sentence, []).append((table, channel.variables))
+    return packet_feeds, sentence_feeds
+
+## Determine the channels to generate, from the names requested
+#
+# \param names  Names of the channels requested (from CHANNELS), or None for DEFAULT_CHANNELS
+# \return List of the names of the channels to generate, which always starts with 'depth'
+def _requested_channels(names: Optional[Iterable[str]]) -> List[str]:
+    if names is None:
+        return list(DEFAULT_CHANNELS)
+    channels = ['depth'] + [name for name in names if name != 'depth']
+    for name in channels:
+        if name not in CHANNELS:
+            raise UnknownChannel(name)
+    return channels
+
+## Build the dispatch tables for the time and position references and the channels to be generated
+#
+# As well as the tables from _dispatch_tables(), this generates the set of NMEA0183 sentences that only feed channels
+# that aren't being generated, so can be ignored.  Packets for all of the time sources are included in the packet
+# dispatch table (without feeding anything, unless they are for the time channel) so that they are noted in the
+# statistics.
+#
+# \param references List of (Channel, InterpTable) pairs for the time and position references
+# \param channels   Dictionary mapping the names of the channels to generate to their tables
+# \return Tuple of packet and sentence dispatch tables (see _dispatch_tables()), and the set of sentences to ignore
+def _channel_feeds(references: List[Tuple[Channel, InterpTable]],
+                   channels: Dict[str, InterpTable]) -> Tuple[Dict[type, List], Dict[str, List], FrozenSet[str]]:
+    packet_feeds, sentence_feeds = _dispatch_tables(references +
+                                                    [(CHANNELS[name], table) for name, table in channels.items()])
+    ignored = frozenset(sentence for channel in CHANNELS.values()
+                        for sentence in channel.sentences if sentence not in sentence_feeds)
+    for channel in TIME_CHANNELS.values():
+        for packet_class in channel.packets:
+            packet_feeds.setdefault(packet_class, [])
+    return packet_feeds, sentence_feeds, ignored
+
+## Handlers for informational packets, which provide the identification of the logger and metadata
+#
+# These don't need elapsed times, and update a dictionary of the information for the output.
+def _serialiser_version(pkt: LoggerFile.SerialiserVersion, info: Dict[str, Any]) -> None:
+    if protocol_version(pkt.major, pkt.minor) > maximum_version:
+        raise NewerDataFile()
+    info['loggerversion'] = f'{pkt.major}.{pkt.minor}/{pkt.nmea2000_version}/{pkt.nmea0183_version}'
+
+def _metadata(pkt: LoggerFile.Metadata, info: Dict[str, Any]) -> None:
+    info['loggername'] = pkt.logger_name
+    info['platform'] = pkt.ship_name
+
+def _json_metadata(pkt: LoggerFile.JSONMetadata, info: Dict[str, Any]) -> None:
+    info['metadata'] = pkt.metadata_element.decode('UTF-8')
+
+## Registry of the handlers for informational packets, by packet class
+INFO_HANDLERS: Dict[type, Callable[[LoggerFile.DataPacket, Dict[str, Any]], None]] = {
+    LoggerFile.SerialiserVersion: _serialiser_version,
+    LoggerFile.Metadata: _metadata,
+    LoggerFile.JSONMetadata: _json_metadata
+}
+
+## Generate the dictionary of information on the logger that is filled in by the INFO_HANDLERS
+def _logger_info() -> Dict[str, Any]:
+    return {
+        'loggername': None,     # Name of the logger (usually the identification)
+        'platform': None,       # Name of the platform doing the logging
+        'loggerversion': None,  # Versions of the serialiser, NMEA2000, and NMEA0183 code in the logger
+        'metadata': None        # Any JSON metadata string provided in the WIBL file
+    }
+
+## Parse a NMEA0183 string, and add its values to the interpolation tables that it feeds
+#
+# Faults in the string are noted in the statistics, and the string is otherwise ignored.
+#
+# \param pkt            (SerialString) Packet with the NMEA0183 string
+# \param elapsed        Elapsed time for the packet (corrected for any wrap-around of the counter)
+# \param sentence_feeds Dictionary mapping sentence name to the (table, variables) entries it feeds
+# \param stats          (PktStats) Statistics object in which to note observations and faults
+# \param verbose        Flag: set True to report faults
+# \param ignored        Names of sentences that are only noted in the statistics, without being parsed
+def _add_nmea_observations(pkt: LoggerFile.SerialString, elapsed: float, sentence_feeds: Dict[str, List],
+                           stats: PktStats, verbose: bool, ignored: FrozenSet[str] = frozenset()) -> None:
+    try:
+        pkt_name = pkt.data[3:6].decode('UTF-8')
+        stats.Observed(pkt_name)
+        if pkt_name in ignored:
+            return
+        data = pkt.data.decode('UTF-8')
+        if stats.FaultCount(pkt_name) == stats.fault_limit:
+            print(f'Warning: too many errors on packet {pkt_name}; supressing further reporting.')
+        if len(data) > 11:
+            try:
+                parsed = nmea0183.parse(pkt.data, sentence_feeds)
+                if parsed is not None and parsed[1][0] is not None:
+                    sentence, values = parsed
+                    for table, variables in sentence_feeds[sentence]:
+                        table.add_points(elapsed, variables, values)
+            except nmea.ParseError as e:
+                if verbose and stats.FaultCount(pkt_name) < stats.fault_limit:
+                    print(f'Parse error: {e}')
+                stats.Fault(pkt_name, PktFaults.ParseFault)
+            except AttributeError as e:
+                if verbose and stats.FaultCount(pkt_name) < stats.fault_limit:
+                    print(f'Attribute error: {e}')
+                stats.Fault(pkt_name, PktFaults.AttributeFault)
+            except TypeError as e:
+                if verbose and stats.FaultCount(pkt_name) < stats.fault_limit:
+                    print(f'Type error: {e}')
+                stats.Fault(pkt_name, PktFaults.TypeFault)
+            except nmea.ChecksumError as e:
+                if verbose and stats.FaultCount(pkt_name) < stats.fault_limit:
+                    print(f'Checksum error: {e}')
+                stats.Fault(pkt_name, PktFaults.ChecksumFault)
+        else:
+            # Packets have to be at least 11 characters to contain all of the mandatory elements.
+            # Usually a short packet is broken in some fashion, and should be ignored.
+            if verbose and stats.FaultCount(pkt_name) < stats.fault_limit:
+                print(f'Error: short message: {data}; ignoring.')
+            stats.Fault(pkt_name, PktFaults.ShortMessage)
+    except UnicodeDecodeError as e:
+        if verbose and stats.FaultCount(pkt_name) < stats.fault_limit:
+            print(f'Decode error: {e}')
+        stats.Fault(pkt_name, PktFaults.DecodeFault)
+
+## Note a packet in the statistics, and add its information or observations to the output
+#
+# \param pkt            Packet to process
+# \param elapsed        Elapsed time for the packet (corrected for any wrap-around of the counter), or None if it
+#                       doesn't have one
+# \param info           Dictionary of information on the logger, to be updated from informational packets
+# \param feeds          Tuple of packet and sentence dispatch tables, and sentences to ignore (see _channel_feeds())
+# \param stats          (PktStats) Statistics object in which to note observations and faults
+# \param verbose        Flag: set True to report faults
+def _observe_packet(pkt: LoggerFile.DataPacket, elapsed: Optional[float], info: Dict[str, Any],
+                    feeds: Tuple[Dict[type, List], Dict[str, List], FrozenSet[str]], stats: PktStats,
+                    verbose: bool) -> None:
+    # There are some informational packets in the file that we can handle even if they
+    # don't have assigned elapsed times; we deal with these first so that we can then
+    # safely ignore any packets that are not time-enabled.
+    packet_class = pkt.__class__
+    handler = INFO_HANDLERS.get(packet_class)
+    if handler is not None:
+        stats.Observed(pkt.name())
+        handler(pkt, info)
+
+    # After this point, any packet that we're interested in has to have an elapsed time assigned
+    if elapsed is None:
+        return
+
+    packet_feeds, sentence_feeds, ignored = feeds
+    tables = packet_feeds.get(packet_class)
+    if tables is not None:
+        stats.Observed(pkt.name())
+        for table, variables, extract in tables:
+            table.add_points(elapsed, variables, extract(pkt))
+    elif packet_class is LoggerFile.SerialString:
+        _add_nmea_observations(pkt, elapsed, sentence_feeds, stats, verbose, ignored)
+
+## Number of packets for which the elapsed times are unwrapped at a time (see _unwrapped_packets())
+UNWRAP_BLOCK = 65536
+
+## Unwrap the elapsed times of successive blocks of packets for laps of the logger's elapsed-time counter
+#
+# The elapsed times are unwrapped with LoggerFile.lap_offsets(), carrying the last elapsed time (as recorded) and
+# its offset from one block to the next, so that the packets can be unwrapped as they are read from the file.  This
+# assumes that the elapsed times in the file are sequential and monotonic (modulo the quantum), and will fail
+# mightily if they're not.
+class _ElapsedUnwrapper:
+    ## Constructor, with the range of the elapsed-time counter
+    #
+    # \param quantum    Maximum value that can be represented by the elapsed times in the packets
+    def __init__(self, quantum: int) -> None:
+        self.quantum = quantum
+        self.previous = 0   # Last elapsed time (as recorded) in the previous block
+        self.offset = 0     # Offset for laps of the counter added to the last elapsed time in the previous block
+
+    ## Unwrap the elapsed times of the next block of packets
+    #
+    # \param block  List of packets, in file order, following those in the previous block
+    # \return List of the unwrapped elapsed times for the packets, with None for packets without an elapsed time
+    def unwrap(self, block: List[LoggerFile.DataPacket]) -> List[Optional[float]]:
+        elapsed = [pkt.elapsed for pkt in block]
+        recorded = np.array([e for e in elapsed if e is not None])
+        offsets = LoggerFile.lap_offsets(recorded, self.quantum, self.previous, self.offset)
+        if len(recorded) > 0:
+            self.previous = recorded[-1]
+            self.offset = offsets[-1]
+        unwrapped = iter((recorded + offsets).tolist())
+        return [None if e is None else next(unwrapped) for e in elapsed]
+
+## Pair each packet with its elapsed time, unwrapped for any laps of the logger's elapsed-time counter
+#
+# Since the elapsed-time counter on the logger has limited range, it can wrap around during a long recording.  The
+# elapsed times are unwrapped (see _ElapsedUnwrapper) a block of packets at a time, so that this can be done as an
+# array operation without having to hold all of the packets in memory if they're being streamed from the file.
+#
+# \param packets    Iterable of packets, in file order
+# \param quantum    Maximum value that can be represented by the elapsed times in the packets
+# \return Generator of (packet, unwrapped elapsed time) pairs, with None for packets without an elapsed time
+def _unwrapped_packets(packets: Iterable[LoggerFile.DataPacket],
+                       quantum: int) -> Iterator[Tuple[LoggerFile.DataPacket, Optional[float]]]:
+    packets = iter(packets)
+    unwrapper = _ElapsedUnwrapper(quantum)
+    while True:
+        block = list(itertools.islice(packets, UNWRAP_BLOCK))
+        if len(block) == 0:
+            return
+        yield from zip(block, unwrapper.unwrap(block))
+
+## Channels in the output of time_interpolation() whose times and positions have still to be interpolated
+#
+# When the first of the channels needs its times and positions, all of the channels still pending are interpolated
+# against the reference tables together (see InterpTable.interpolate_many()), so that each table is only searched
+# once for the time points of all of the channels.
+class _PendingInterpolation:
+    ## Constructor, with the reference tables
+    #
+    # \param time_table     (InterpTable) Reference of elapsed time to real-world time, with variable 'ref'
+    # \param position_table (InterpTable) Reference of elapsed time to position, with variables 'lat' and 'lon'
+    def __init__(self, time_table: InterpTable, position_table: InterpTable) -> None:
+        self._time_table = time_table
+        self._position_table = position_table
+        self._channels: List[Tuple['ChannelData', np.ndarray]] = []
+
+    ## Add a channel to be interpolated
+    #
+    # \param channel    (ChannelData) Channel to fill in with times and positions
+    # \param timepoints NumPy array of the elapsed times of the observations in the channel
+    def add(self, channel: 'ChannelData', timepoints: np.ndarray) -> None:
+        self._channels.append((channel, timepoints))
+
+    ## Interpolate the times and positions of all of the channels pending, and fill them in
+    def run(self) -> None:
+        if not self._channels:
+            return
+        channels, timepoints = zip(*self._channels)
+        self._channels = []
+        with stage('interpolation') as interpolation_stage:
+            times = self._time_table.interpolate_many(['ref'], list(timepoints))
+            positions = self._position_table.interpolate_many(['lat', 'lon'], list(timepoints))
+            for channel, (t,), (lat, lon) in zip(channels, times, positions):
+                channel._fill(t, lat, lon)
+            interpolation_stage.count(sum(len(points) for points in timepoints))
+
+## Data for one channel in the output of time_interpolation(), interpolated for time and position on first access
+#
+# This behaves as a dictionary with the real-world time ('t') and position ('lat', 'lon') of each observation in
+# the channel, and the channel's variables.  The variables are available immediately, but the times and positions
+# are only interpolated from the reference tables when one of them is first used (or any entry is replaced or
+# removed), so that channels which are never looked at cost nothing beyond the observations themselves.  All of
+# the channels from a file share a _PendingInterpolation, so that they are interpolated together.
+class ChannelData(MutableMapping):
+    ## Constructor, with the table of observations for the channel
+    #
+    # \param table      (InterpTable) Observations for the channel
+    # \param variables  Names of the variables in \a table
+    # \param pending    (_PendingInterpolation) Channels to interpolate together, to which this channel is added
+    def __init__(self, table: InterpTable, variables: Iterable[str], pending: _PendingInterpolation) -> None:
+        self._pending: Optional[_PendingInterpolation] = pending
+        self._data: Dict[str, Any] = {'t': None, 'lat': None, 'lon': None}
+        for variable in variables:
+            self._data[variable] = np.array(table.var(variable))
+        pending.add(self, table.ind())
+
+    ## Fill in the interpolated real-world times and positions of the observations
+    def _fill(self, t: np.ndarray, lat: np.ndarray, lon: np.ndarray) -> None:
+        self._data['t'], self._data['lat'], self._data['lon'] = t, lat, lon
+        self._pending = None
+
+    ## Interpolate the real-world times and positions of the observations, if not already done
+    def _interpolate(self) -> None:
+        if self._pending is not None:
+            self._pending.run()
+
+    def __getitem__(self, key: str) -> Any:
+        if key in ('t', 'lat', 'lon'):
+            self._interpolate()
+        return self._data[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._interpolate()
+        self._data[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        self._interpolate()
+        del self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f'ChannelData({", ".join(self._data)})'
+
 ## Construct a dictionary of interpolated observation data from a given WIBL file
 #
 # This carries out the basic read-convert-preprocess operations for a WIBL binary file, loading in all
@@ -106,11 +472,24 @@ maximum_version = protocol_version(protocol_version_major, protocol_version_mino
 # is set to True, execution of any algorithms defined in WIBL file `filename` will be enabled for phases
 # `AlgorithmPhase.ON_LOAD` and `AlgorithmPhase.AFTER_TIME_INTERP`.
 #
+# In streaming mode, the packets are not loaded into memory.  Instead, a first pass over the file scans the packet
+# index to determine the time source and any algorithm requests, and a second pass reads the packets and feeds them
+# straight into the interpolation tables, so that the memory required is proportional to the output rather than the
+# size of the file.  Files that can't be streamed (compressed files, files being read with 'resync', or files that
+# request algorithms to run on load) are loaded into memory as usual.
+#
+# Each channel in the output is a ChannelData, in which the times and positions are only interpolated when first
+# used.  The channels to generate can be chosen with kwarg 'channels' (from those in CHANNELS); NMEA0183 sentences
+# that only feed channels that weren't requested are counted, but not parsed.  The 'depth' channel is always
+# generated, since the file has no useful data without it.
+#
 # \param filename               Local filename for the source WIBL file
 # \param elapsed_time_quantum   Maximum value that can be represented by the elapsed times in the packets
 # \param lineage                `wibl.core.Lineage` instance used to track any processing done on data from `filename`
 # \param kwargs                 Keyword dictionary for 'verbose' (bool), 'fault_limit' (int),
-#   'process_algorithms' (bool), and 'strict_mode' (bool)
+#   'process_algorithms' (bool), 'strict_mode' (bool), 'resync' (bool, skip corrupt
+#   data to the next plausible packet), 'streaming' (bool, read the file in two streaming passes rather than loading
+#   it into memory), and 'channels' (list of names of the channels to generate, default DEFAULT_CHANNELS)
 # \return Dictionary mapping identification names for the various datasets to the interpolated data arrays
 def time_interpolation(filename: str, lineage: Lineage, elapsed_time_quantum: int, **kwargs) -> Dict[str, Any]:
     verbose = False
@@ -126,12 +505,32 @@ def time_interpolation(filename: str, lineage: Lineage, elapsed_time_quantum: in
         strict_mode = kwargs['strict_mode']
     else:
         strict_mode = False
+    resync: bool = False
+    if 'resync' in kwargs:
+        resync = kwargs['resync']
+    streaming: bool = False
+    if 'streaming' in kwargs:
+        streaming = kwargs['streaming']
+    channels = _requested_channels(kwargs.get('channels'))
     
-    # Pull all of the packets out of the file, and fix up any preliminary problems
+    # Pull all of the packets out of the file (or set up to stream them), and fix up any preliminary problems
+    packets = None
     try:
-        stats, time_source, packets, algorithms = load_file(filename, lineage, verbose, fault_limit,
-                                                            process_algorithms=process_algorithms,
-                                                            strict_mode=strict_mode)
+        if streaming and not resync:
+            try:
+                stats, time_source, algorithms, needs_fixup = scan_file(filename, lineage, verbose, fault_limit,
+                                                                        process_algorithms=process_algorithms,
+                                                                        strict_mode=strict_mode)
+                packets = stream_packets(filename, time_source, stats, verbose,
+                                         strict_mode=strict_mode, fixup=needs_fixup)
+            except StreamingUnavailable as e:
+                if verbose:
+                    print(f'Unable to stream file ({e}); loading into memory.')
+        if packets is None:
+            stats, time_source, packets, algorithms = load_file(filename, lineage, verbose, fault_limit,
+                                                                process_algorithms=process_algorithms,
+                                                                strict_mode=strict_mode,
+                                                                resync=resync)
     except flNoTimeSource as e:
         if verbose:
             print(f'Failed to determine a valid time source from file: {e}')
@@ -144,196 +543,35 @@ def time_interpolation(filename: str, lineage: Lineage, elapsed_time_quantum: in
     if verbose:
         print(stats)
 
+    # Tables for each channel, and the time and position references, with the packets and sentences that feed them
     time_table = InterpTable(['ref',])              # Mapping of elapsed time to real-world time
     position_table = InterpTable(['lon', 'lat'])    # Mapping of elapsed time to position information
-    depth_table = InterpTable(['z',])               # Mapping of elapsed time to depth
-    hdg_table = InterpTable(['h',])                 # Mapping of elapsed time to heading information
-    wattemp_table = InterpTable(['temp',])          # Mapping of elapsed time to water temperature
-    wind_table = InterpTable(['dir', 'spd'])        # Mapping of elapsed time to wind direction and speed
-
-    logger_name = None      # Name of the logger (usually the identification)
-    platform_name = None    # Name of the platform doing the logging
-    metadata = None         # Any JSON metadata string provided in the WIBL file
-
-    seconds_per_day = 24.0 * 60.0 * 60.0
-
-    elapsed_offset = 0  # Estimate of the offset in milliseconds to add to elapsed times recorded (if we lap the counter)
-    last_elapsed = 0    # Marker for the last observed elapsed time (to check for lapping the counter)
+    tables = {name: InterpTable(list(CHANNELS[name].variables)) for name in channels}
+    feeds = _channel_feeds([(TIME_CHANNELS[time_source], time_table), (POSITION_CHANNEL, position_table)], tables)
+    info = _logger_info()
 
     stats = PktStats(fault_limit) # Reset statistics so that we don't double count on the second pass
     
-    for pkt in packets:
-        # There are some informational packets in the file that we can handle even if they
-        # don't have assigned elapsed times; we deal with these first so that we can then
-        # safely ignore any packets that are not time-enabled.
-        if isinstance(pkt, LoggerFile.SerialiserVersion):
-            stats.Observed(pkt.name())
-            if protocol_version(pkt.major, pkt.minor) > maximum_version:
-                raise NewerDataFile()
-            logger_version = f'{pkt.major}.{pkt.minor}/{pkt.nmea2000_version}/{pkt.nmea0183_version}'
-        if isinstance(pkt, LoggerFile.Metadata):
-            stats.Observed(pkt.name())
-            logger_name = pkt.logger_name
-            platform_name = pkt.ship_name
-        if isinstance(pkt, LoggerFile.JSONMetadata):
-            stats.Observed(pkt.name())
-            metadata = pkt.metadata_element.decode('UTF-8')
-        
-        # After this point, any packet that we're interested in has to have an elapsed time assigned
-        if pkt.elapsed is None:
-            continue
-
-        # We need to check that the elapsed ms counter hasn't wrapped around since
-        # the last packet.  If so, we need to increment the elapsed time base stamp.
-        # This method is very simple, and will fail mightily if the elapsed times in
-        # the log file are not sequential and monotonic (modulo the elapsed_time_quantum).
-        if pkt.elapsed < last_elapsed:
-            elapsed_offset = elapsed_offset + elapsed_time_quantum
-        last_elapsed = pkt.elapsed
-
-        if isinstance(pkt, LoggerFile.SystemTime):
-            stats.Observed(pkt.name())
-            if time_source == TimeSource.Time_SysTime:
-                time_table.add_point(pkt.elapsed + elapsed_offset, 'ref', pkt.date * seconds_per_day + pkt.timestamp)
-        if isinstance(pkt, LoggerFile.Depth):
-            stats.Observed(pkt.name())
-            depth_table.add_point(pkt.elapsed + elapsed_offset, 'z', pkt.depth)
-        if isinstance(pkt, LoggerFile.GNSS):
-            stats.Observed(pkt.name())
-            if time_source == TimeSource.Time_GNSS:
-                time_table.add_point(pkt.elapsed + elapsed_offset, 'ref', pkt.msg_date * seconds_per_day + pkt.msg_timestamp)
-            position_table.add_points(pkt.elapsed + elapsed_offset, ('lat', 'lon'), (pkt.latitude, pkt.longitude))
-        if isinstance(pkt, LoggerFile.SerialString):
-            try:
-                pkt_name = pkt.data[3:6].decode('UTF-8')
-                stats.Observed(pkt_name)
-                data = pkt.data.decode('UTF-8')
-                if stats.FaultCount(pkt_name) == stats.fault_limit:
-                    print(f'Warning: too many errors on packet {pkt_name}; supressing further reporting.')
-                if len(data) > 11:
-                    try:
-                        msg = nmea.parse(data)
-                        if isinstance(msg, nmea.ZDA) and time_source == TimeSource.Time_ZDA:
-                            if msg.datestamp is not None and msg.timestamp is not None:
-                                reftime = dt.datetime.combine(msg.datestamp, msg.timestamp)
-                                time_table.add_point(pkt.elapsed + elapsed_offset, 'ref', reftime.timestamp())
-                        if isinstance(msg, nmea.RMC) and time_source == TimeSource.Time_RMC:
-                            if msg.datestamp is not None and msg.timestamp is not None:
-                                reftime = dt.datetime.combine(msg.datestamp, msg.timestamp)
-                                time_table.add_point(pkt.elapsed + elapsed_offset, 'ref', reftime.timestamp())
-                        if isinstance(msg, nmea.GGA) or isinstance(msg, nmea.GLL):
-                            if msg.latitude is not None and msg.longitude is not None:
-                                position_table.add_points(pkt.elapsed + elapsed_offset, ('lat', 'lon'), (msg.latitude, msg.longitude))
-                        if isinstance(msg, nmea.DBT):
-                            if msg.depth_meters is not None:
-                                depth = float(msg.depth_meters)
-                                depth_table.add_point(pkt.elapsed + elapsed_offset, 'z', depth)
-                        if isinstance(msg, nmea.DPT):
-                            if msg.depth is not None:
-                                depth = float(msg.depth)
-                                depth_table.add_point(pkt.elapsed + elapsed_offset, 'z', depth)
-                        if isinstance(msg, nmea.HDT):
-                            if msg.heading is not None:
-                                heading = float(msg.heading)
-                                hdg_table.add_point(pkt.elapsed + elapsed_offset, 'h', heading)
-                        if isinstance(msg, nmea.MWD):
-                            if msg.direction_true is not None and msg.wind_speed_meters is not None:
-                                direction = float(msg.direction_true)
-                                speed = float(msg.wind_speed_meters)
-                                wind_table.add_points(pkt.elapsed + elapsed_offset, ('dir', 'spd'), (direction, speed))
-                        if isinstance(msg, nmea.MTW):
-                            if msg.temperature is not None:
-                                temp = float(msg.temperature)
-                                wattemp_table.add_point(pkt.elapsed + elapsed_offset, 'temp', temp)
-                    except nmea.ParseError as e:
-                        if verbose and stats.FaultCount(pkt_name) < stats.fault_limit:
-                            print(f'Parse error: {e}')
-                        stats.Fault(pkt_name, PktFaults.ParseFault)
-                        continue
-                    except AttributeError as e:
-                        if verbose and stats.FaultCount(pkt_name) < stats.fault_limit:
-                            print(f'Attribute error: {e}')
-                        stats.Fault(pkt_name, PktFaults.AttributeFault)
-                        continue
-                    except TypeError as e:
-                        if verbose and stats.FaultCount(pkt_name) < stats.fault_limit:
-                            print(f'Type error: {e}')
-                        stats.Fault(pkt_name, PktFaults.TypeFault)
-                        continue
-                    except nmea.ChecksumError as e:
-                        if verbose and stats.FaultCount(pkt_name) < stats.fault_limit:
-                            print(f'Checksum error: {e}')
-                        stats.Fault(pkt_name, PktFaults.ChecksumFault)
-                        continue
-                else:
-                    # Packets have to be at least 11 characters to contain all of the mandatory elements.
-                    # Usually a short packet is broken in some fashion, and should be ignored.
-                    if verbose and stats.FaultCount(pkt_name) < stats.fault_limit:
-                        print(f'Error: short message: {data}; ignoring.')
-                    stats.Fault(pkt_name, PktFaults.ShortMessage)
-            except UnicodeDecodeError as e:
-                if verbose and stats.FaultCount(pkt_name) < stats.fault_limit:
-                    print(f'Decode error: {e}')
-                stats.Fault(pkt_name, PktFaults.DecodeFault)
-                continue
+    with stage('interpolation_tables') as tables_stage:
+        for pkt, elapsed in _unwrapped_packets(packets, elapsed_time_quantum):
+            _observe_packet(pkt, elapsed, info, feeds, stats, verbose)
+        tables_stage.count(time_table.n_points() + position_table.n_points() +
+                           sum(table.n_points() for table in tables.values()))
     if verbose:
         print('Reference time table length = ', time_table.n_points())
         print('Position table length = ', position_table.n_points())
-        print('Depth observations = ', depth_table.n_points())
+        print('Depth observations = ', tables['depth'].n_points())
         print(stats)
 
-    if depth_table.n_points() < 1:
+    if tables['depth'].n_points() < 1:
         raise NoData()
         
-    # Finally, do the interpolations to generate the output data, and package it up as a dictionary for return
-    depth_timepoints = depth_table.ind()
-    z_times = time_table.interpolate(['ref'], depth_timepoints)[0]
-    z_lat, z_lon = position_table.interpolate(['lat', 'lon'], depth_timepoints)
-    
-    hdg_timepoints = hdg_table.ind()
-    hdg_times = time_table.interpolate(['ref'], hdg_timepoints)[0]
-    hdg_lat, hdg_lon = position_table.interpolate(['lat', 'lon'], hdg_timepoints)
-    
-    wt_timepoints = wattemp_table.ind()
-    wt_times = time_table.interpolate(['ref'], wt_timepoints)[0]
-    wt_lat, wt_lon = position_table.interpolate(['lat', 'lon'], wt_timepoints)
-    
-    wind_timepoints = wind_table.ind()
-    wind_times = time_table.interpolate(['ref'], wind_timepoints)[0]
-    wind_lat, wind_lon  = position_table.interpolate(['lat', 'lon'], wind_timepoints)
-
-    source_data = {
-        'loggername': logger_name,
-        'platform': platform_name,
-        'loggerversion': logger_version,
-        'metadata': metadata,
-        'algorithms': algorithms,
-        'depth' : {
-            't': z_times,
-            'lat': z_lat,
-            'lon': z_lon,
-            'z': depth_table.var('z')
-        },
-        'heading' : {
-            't': hdg_times,
-            'lat': hdg_lat,
-            'lon': hdg_lon,
-            'heading': hdg_table.var('h')
-        },
-        'watertemp' : {
-            't': wt_times,
-            'lat': wt_lat,
-            'lon': wt_lon,
-            'temperature': wattemp_table.var('temp')
-        },
-        'wind' : {
-            't': wind_times,
-            'lat': wind_lat,
-            'lon': wind_lon,
-            'direction': wind_table.var('dir'),
-            'speed': wind_table.var('spd')
-        }
-    }
+    # Finally, package up the output data as a dictionary for return; the channels are interpolated when first used
+    source_data = info
+    source_data['algorithms'] = algorithms
+    pending = _PendingInterpolation(time_table, position_table)
+    for name in channels:
+        source_data[name] = ChannelData(tables[name], CHANNELS[name].variables, pending)
 
     if process_algorithms:
         source_data = run_algorithms(source_data,
@@ -344,3 +582,312 @@ def time_interpolation(filename: str, lineage: Lineage, elapsed_time_quantum: in
                                      verbose)
 
     return source_data
+
+## Incremental time interpolation of a WIBL file that is still being written
+#
+# Rather than processing the whole file again each time that a logger adds data to it, this reads only the packets
+# added since the last update (see fileloader.IncrementalReader), and emits the observations for which the real-world
+# time and position are now fixed: that is, observations that are bracketed by reference time and position points
+# on both sides, so that no packet added later can change their interpolation.  The reference tables are trimmed of
+# points that are no longer needed, so that the work done over the life of the file is proportional to its size,
+# rather than to the number of updates times its size.  The observations emitted over all of the updates, followed
+# by flush() at the end of the recording, are the same as the channels that time_interpolation() generates for the
+# file (without running any algorithms).
+#
+# The object holds no open files, and can be saved with pickle between updates in order to resume later from the
+# byte offset in \a offset.  The same assumptions as for IncrementalReader apply.
+class IncrementalInterpolator:
+    ## Constructor, with the configuration for interpolation
+    #
+    # \param elapsed_time_quantum   Maximum value that can be represented by the elapsed times in the packets
+    # \param channels               List of names of the channels to generate (as for time_interpolation()), or None
+    #                               for DEFAULT_CHANNELS
+    # \param verbose                Flag: set True to report faults in the packets
+    # \param fault_limit            Limit on how many errors should be reported before suppressing and summarising
+    # \param strict_mode            If True, raise exception if an error is encountered loading a packet
+    def __init__(self, elapsed_time_quantum: int, *,
+                 channels: Optional[Iterable[str]] = None,
+                 verbose: bool = False,
+                 fault_limit: int = 10,
+                 strict_mode: bool = False) -> None:
+        self.channels = _requested_channels(channels)
+        self.verbose = verbose
+        ## Statistics on the packets interpolated so far (as time_interpolation() reports)
+        self.stats = PktStats(fault_limit)
+        ## Information on the logger, as in the output of time_interpolation()
+        self.info = _logger_info()
+        self._reader = IncrementalReader(verbose, fault_limit, strict_mode=strict_mode)
+        self._unwrapper = _ElapsedUnwrapper(elapsed_time_quantum)
+        self._time_table = InterpTable(['ref'])
+        self._position_table = InterpTable(['lat', 'lon'])
+        self._tables = {name: InterpTable(list(CHANNELS[name].variables)) for name in self.channels}
+        self._feeds = None
+
+    ## Byte offset in the file of the first packet that has not yet been read
+    @property
+    def offset(self) -> int:
+        return self._reader.offset
+
+    ## Source of real-world time for the file (None until it can be determined)
+    @property
+    def time_source(self) -> Optional[TimeSource]:
+        return self._reader.timesource
+
+    # The dispatch tables refer to the packet extractors in CHANNELS, which can't be pickled, so they're rebuilt
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state['_feeds'] = None
+        return state
+
+    ## Read the packets added to a WIBL file since the last update, and emit the observations now fixed
+    #
+    # \param filename   Name of the WIBL file being written
+    # \return Dictionary mapping the name of each channel to a dictionary of NumPy arrays of time ('t'), position
+    #         ('lat', 'lon') and the channel's variables for the observations emitted (which may be empty)
+    def update(self, filename: str) -> Dict[str, Dict[str, np.ndarray]]:
+        self._observe(self._reader.read(filename))
+        return self._emit(False)
+
+    ## Emit all of the observations still held, at the end of the recording
+    #
+    # Observations after the last reference time or position are given the last time or position, as in
+    # time_interpolation().  Observations are held until there is at least one reference time and position.
+    #
+    # \return Dictionary of the observations emitted for each channel, as for update()
+    def flush(self) -> Dict[str, Dict[str, np.ndarray]]:
+        self._observe(self._reader.finish())
+        return self._emit(True)
+
+    ## Add the packets read from the file to the tables
+    #
+    # \param packets    List of packets, in file order, with their elapsed times settled
+    def _observe(self, packets: List[LoggerFile.DataPacket]) -> None:
+        if len(packets) == 0:
+            return
+        if self._feeds is None:
+            self._feeds = _channel_feeds([(TIME_CHANNELS[self.time_source], self._time_table),
+                                          (POSITION_CHANNEL, self._position_table)], self._tables)
+        for pkt, elapsed in zip(packets, self._unwrapper.unwrap(packets)):
+            _observe_packet(pkt, elapsed, self.info, self._feeds, self.stats, self.verbose)
+
+    ## Interpolate the observations whose time and position are fixed, and trim the tables
+    #
+    # \param final  Flag: set True to emit all of the observations held, rather than only those with fixed times
+    # \return Dictionary of the observations emitted for each channel, as for update()
+    def _emit(self, final: bool) -> Dict[str, Dict[str, np.ndarray]]:
+        references = (self._time_table, self._position_table)
+        if min(table.n_points() for table in references) == 0:
+            limit = None
+        elif final:
+            limit = np.inf
+        else:
+            limit = min(table.ind()[-1] for table in references)
+
+        rtn = {}
+        for name, table in self._tables.items():
+            count = 0
+            if limit is not None:
+                beyond = np.flatnonzero(table.ind() >= limit)
+                count = int(beyond[0]) if len(beyond) > 0 else table.n_points()
+            data = {'t': np.empty(0), 'lat': np.empty(0), 'lon': np.empty(0)}
+            if count > 0:
+                timepoints = table.ind()[:count]
+                data['t'] = self._time_table.interpolate(['ref'], timepoints)[0]
+                data['lat'], data['lon'] = self._position_table.interpolate(['lat', 'lon'], timepoints)
+            for variable in CHANNELS[name].variables:
+                data[variable] = np.array(table.var(variable)[:count])
+            table.discard(count)
+            rtn[name] = data
+
+        # Reference points before the bracket of the earliest observation still held (or the last reference point,
+        # which brackets any observation still to come) aren't needed any more
+        for reference in references:
+            if reference.n_points() > 0:
+                ind = reference.ind()
+                start = min([ind[-1]] + [table.ind()[0] for table in self._tables.values() if table.n_points() > 0])
+                reference.discard(int(np.searchsorted(ind, start, side='right')) - 1)
+        return rtn
+
+## Error raised when processing one of the files in time_interpolation_many(), reported in place of its data
+#
+# The exception itself isn't returned, since it might not survive transfer back from the worker process.
+@dataclass(eq=True, frozen=True)
+class BatchError:
+    ## Name of the class of the exception raised (e.g., 'NoTimeSource', 'NoData', 'NewerDataFile')
+    kind: str
+    ## Text of the exception raised
+    message: str
+
+## Result of processing one of the files in time_interpolation_many()
+@dataclass
+class BatchResult:
+    ## Name of the WIBL file processed
+    filename: str
+    ## Record of the processing done on the data from the file
+    lineage: Lineage
+    ## Output of time_interpolation() for the file, with each channel as a plain dictionary, or None if it failed
+    data: Optional[Dict[str, Any]] = None
+    ## Description of the failure, or None if the file was processed
+    error: Optional[BatchError] = None
+
+## Exceptions from time_interpolation() that mean that a file can't be processed, reported per file in a batch
+_BATCH_ERRORS = (NoTimeSource, NoData, NewerDataFile, LoggerFile.PacketTranscriptionError, OSError)
+
+## Alignment (in bytes) of the arrays packed into a shared memory block
+_SHARED_ALIGNMENT = 64
+
+## Convert each channel in the output of time_interpolation() into a plain dictionary
+#
+# This interpolates the times and positions of any channels that haven't been used yet, so that the output no longer
+# depends on the interpolation tables.
+#
+# \param source_data    Output of time_interpolation()
+# \return Output of time_interpolation(), with each channel as a plain dictionary
+def materialise(source_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: dict(value) if isinstance(value, Mapping) else value for key, value in source_data.items()}
+
+## Separate the NumPy arrays in the output of time_interpolation() from the rest of the output
+#
+# The arrays in each channel (i.e., each mapping in the output) are removed, leaving a skeleton of the output with
+# each channel as a plain dictionary in which the arrays are replaced by None.  Arrays of Python objects are left in
+# the skeleton.
+#
+# \param source_data    Output of time_interpolation()
+# \return Tuple of the skeleton of the output, and a list of (key, variable, array) for the arrays removed
+def separate_arrays(source_data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Tuple[str, str, np.ndarray]]]:
+    skeleton: Dict[str, Any] = {}
+    arrays: List[Tuple[str, str, np.ndarray]] = []
+    for key, value in source_data.items():
+        if not isinstance(value, Mapping):
+            skeleton[key] = value
+            continue
+        skeleton[key] = {}
+        for variable, data in value.items():
+            if isinstance(data, np.ndarray) and not data.dtype.hasobject:
+                arrays.append((key, variable, data))
+                skeleton[key][variable] = None
+            else:
+                skeleton[key][variable] = data
+    return skeleton, arrays
+
+## Copy the arrays in the output of time_interpolation() into a shared memory block
+#
+# The arrays separated from the output by separate_arrays() are packed into a single shared memory block, so that
+# only the small skeleton and the layout of the block has to be pickled back from the worker process.  The block is
+# left for the caller to unlink.
+#
+# \param source_data    Output of time_interpolation()
+# \return Tuple of the name of the shared memory block (None if there are no arrays), its size in bytes, the layout
+#         as a list of (key, variable, dtype, shape, offset), and the skeleton of the output without the arrays
+def _to_shared_memory(source_data: Dict[str, Any]) -> Tuple[Optional[str], int, List[Tuple], Dict[str, Any]]:
+    skeleton, arrays = separate_arrays(source_data)
+    layout: List[Tuple] = []
+    size = 0
+    for key, variable, data in arrays:
+        layout.append((key, variable, data.dtype.str, data.shape, size))
+        size += -(-data.nbytes // _SHARED_ALIGNMENT) * _SHARED_ALIGNMENT
+    if size == 0:
+        return None, 0, layout, skeleton
+    block = shared_memory.SharedMemory(create=True, size=size)
+    try:
+        for (_, _, data), (_, _, dtype, shape, offset) in zip(arrays, layout):
+            np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)[...] = data
+    except BaseException:
+        block.close()
+        block.unlink()
+        raise
+    block.close()
+    return block.name, size, layout, skeleton
+
+## Rebuild the output of time_interpolation() from a shared memory block, and release the block
+#
+# The block is copied in one operation and then unlinked, so that the arrays don't depend on the block staying
+# available; the arrays returned are views into the copy.
+#
+# \param name       Name of the shared memory block (None if there are no arrays)
+# \param size       Size of the data in the block in bytes
+# \param layout     List of (key, variable, dtype, shape, offset) for the arrays in the block
+# \param skeleton   Output of time_interpolation() without the arrays
+# \return Output of time_interpolation(), with each channel as a dictionary
+def _from_shared_memory(name: Optional[str], size: int, layout: List[Tuple],
+                        skeleton: Dict[str, Any]) -> Dict[str, Any]:
+    if name is not None:
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            data = np.frombuffer(block.buf, dtype=np.uint8, count=size).copy()
+        finally:
+            block.close()
+            block.unlink()
+        for key, variable, dtype, shape, offset in layout:
+            count = int(np.prod(shape, dtype=np.int64))
+            skeleton[key][variable] = np.frombuffer(data, dtype=dtype, count=count, offset=offset).reshape(shape)
+    return skeleton
+
+## Run time_interpolation() on a file in a worker process, returning the output through shared memory
+#
+# \param filename               Local filename for the source WIBL file
+# \param elapsed_time_quantum   Maximum value that can be represented by the elapsed times in the packets
+# \param kwargs                 Keyword dictionary for time_interpolation()
+# \return Tuple of the shared memory description of the output (see _to_shared_memory(), or None if the file
+#         failed), the lineage for the file, and the error (or None if the file was processed)
+def _interpolation_worker(filename: str, elapsed_time_quantum: int, kwargs: Dict[str, Any]) -> \
+        Tuple[Optional[Tuple], Lineage, Optional[BatchError]]:
+    lineage = Lineage()
+    try:
+        source_data = time_interpolation(filename, lineage, elapsed_time_quantum, **kwargs)
+        return _to_shared_memory(source_data), lineage, None
+    except _BATCH_ERRORS as e:
+        return None, lineage, BatchError(type(e).__name__, str(e))
+
+## Construct the interpolated observation data for a number of WIBL files in parallel
+#
+# This runs time_interpolation() on each of the files, spreading the files over a pool of \a workers processes.  The
+# arrays in the output for each file are returned from the worker through a shared memory block rather than being
+# pickled.  With one worker, the files are processed in turn in this process.  Either way, each channel in the output
+# is a plain dictionary (see materialise()).  A file that can't be processed (raising NoTimeSource, NoData,
+# NewerDataFile, PacketTranscriptionError, or OSError) is reported with a BatchError in its result, rather than
+# stopping the batch; any other exception is raised as usual, since it indicates a problem with the call rather than
+# with the file.
+#
+# \param filenames              List of local filenames for the source WIBL files
+# \param elapsed_time_quantum   Maximum value that can be represented by the elapsed times in the packets
+# \param workers                Number of processes to use
+# \param kwargs                 Keyword dictionary for time_interpolation(), used for all files
+# \return List of BatchResult, in the same order as \a filenames
+def time_interpolation_many(filenames: Iterable[str], elapsed_time_quantum: int, *, workers: int = 1,
+                            **kwargs) -> List[BatchResult]:
+    filenames = list(filenames)
+    if workers <= 1:
+        rtn = []
+        for filename in filenames:
+            lineage = Lineage()
+            try:
+                data = materialise(time_interpolation(filename, lineage, elapsed_time_quantum, **kwargs))
+                rtn.append(BatchResult(filename, lineage, data=data))
+            except _BATCH_ERRORS as e:
+                rtn.append(BatchResult(filename, lineage, error=BatchError(type(e).__name__, str(e))))
+        return rtn
+
+    # The workers have to share this process's resource tracker, so that the shared memory blocks created by the
+    # workers are accounted as released once they're unlinked here (and cleaned up if this process fails)
+    resource_tracker.ensure_running()
+    rtn = []
+    failure: Optional[Exception] = None
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_interpolation_worker, filename, elapsed_time_quantum, kwargs)
+                   for filename in filenames]
+        for filename, future in zip(filenames, futures):
+            try:
+                shared, lineage, error = future.result()
+            except BrokenExecutor as e:
+                rtn.append(BatchResult(filename, Lineage(), error=BatchError(type(e).__name__, str(e))))
+                continue
+            except Exception as e:
+                # Raised once the shared memory blocks for the other files have been released
+                failure = failure or e
+                continue
+            data = None if shared is None else _from_shared_memory(*shared)
+            rtn.append(BatchResult(filename, lineage, data=data, error=error))
+    if failure is not None:
+        raise failure
+    return rtn
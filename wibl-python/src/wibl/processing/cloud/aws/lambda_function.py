@@ -32,6 +32,7 @@
 # OR OTHER DEALINGS IN THE SOFTWARE.
 
 import json
+from contextlib import nullcontext
 from typing import Dict, Any
 from datetime import datetime
 
@@ -44,6 +45,8 @@ import wibl.core.notification as nt
 from wibl.core.algorithm import UnknownAlgorithm
 from wibl.core import getenv, Lineage
 import wibl.core.timestamping as ts
+from wibl.core.cache import InterpolationCache
+import wibl.core.instrumentation as instrumentation
 import wibl.core.geojson_convert as gj
 from wibl.processing.cloud.aws import get_config_file
 from wibl_manager import ManagerInterface, MetadataType, WIBLMetadata, WIBLStatus
@@ -61,6 +64,17 @@ def read_local_event(event_file: str) -> Dict:
     return event
 
 
+def update_manager(manager: ManagerInterface, meta: WIBLMetadata) -> None:
+    """Send the metadata for an item to the REST management interface.  If the processing is being
+       profiled (see wibl.core.instrumentation), the statistics for each stage of the processing so far
+       are attached to the record as a log message, in JSON format.
+    """
+    profile = instrumentation.active_profile()
+    if profile is not None:
+        manager.logmsg(f'profile: {json.dumps(profile.to_dict())}')
+    manager.update(meta)
+
+
 def process_item(item: ds.DataItem, controller: ds.CloudController, notifier: nt.Notifier, config: Dict[str,Any]) -> bool:
     """Implement the business logic to translate the file from WIBL binary into a GeoJSON file.  The
        file with metadata in 'item' is pulled from object store using 'controller.obtain()', run through
@@ -90,10 +104,21 @@ def process_item(item: ds.DataItem, controller: ds.CloudController, notifier: nt
     try:
         if verbose:
             print(f'Attempting file read/time interpolation on {local_file} ...')
-        source_data = ts.time_interpolation(local_file, lineage, config['elapsed_time_quantum'],
-                                            verbose=verbose,
-                                            fault_limit=config['fault_limit'],
-                                            strict_mode=strict_mode)
+        cache = None
+        interpolate = ts.time_interpolation
+        if config['cache_dir']:
+            cache = InterpolationCache(config['cache_dir'], config['cache_size_mb'] * 1024 * 1024)
+            interpolate = cache.time_interpolation
+        source_data = interpolate(local_file, lineage, config['elapsed_time_quantum'],
+                                  verbose=verbose,
+                                  fault_limit=config['fault_limit'],
+                                  strict_mode=strict_mode,
+                                  resync=config['resync'],
+                                  streaming=config['streaming'],
+                                  channels=['depth'])
+        if cache is not None and verbose:
+            print(f'Interpolation cache: {cache.hits} hit(s), {cache.misses} miss(es), '
+                  f'{cache.evictions} eviction(s).')
         meta.logger = source_data['loggername']
         meta.platform = source_data['platform']
         meta.observations = len(source_data['depth']['z'])
@@ -131,19 +156,19 @@ def process_item(item: ds.DataItem, controller: ds.CloudController, notifier: nt
         print(f"Error reading packet from WIBL file: {str(e)}")
     except ts.NoTimeSource:
         manager.logmsg(f'error: failed to convert data({local_file}): no time source known.')
-        manager.update(meta)
+        update_manager(manager, meta)
         return False
     except ts.NewerDataFile:
         manager.logmsg(f'error: failed to convert data({local_file}): file data format is newer than latest version known to code.')
-        manager.update(meta)
+        update_manager(manager, meta)
         return False
     except ts.NoData:
         manager.logmsg(f'error: failed to convert data({local_file}): no bathymetric data in file.')
-        manager.update(meta)
+        update_manager(manager, meta)
         return False
     except UnknownAlgorithm as e:
         manager.logmsg(f'error: failed to convert data({local_file}): {str(e)}')
-        manager.update(meta)
+        update_manager(manager, meta)
         return False
 
     if verbose:
@@ -152,7 +177,7 @@ def process_item(item: ds.DataItem, controller: ds.CloudController, notifier: nt
         submit_data = gj.translate(source_data, lineage, local_file, config)
     except UnknownAlgorithm as e:
         manager.logmsg(str(e))
-        manager.update(meta)
+        update_manager(manager, meta)
         print(f"Aborting processing due to error: {str(e)}")
         return False
 
@@ -166,7 +191,8 @@ def process_item(item: ds.DataItem, controller: ds.CloudController, notifier: nt
     if verbose:
         print('Converting GeoJSON to byte stream for transmission ...')
 
-    encoded_data = json.dumps(submit_data).encode('utf-8')
+    with instrumentation.stage('json_encode'):
+        encoded_data = json.dumps(submit_data).encode('utf-8')
     item.dest_size = len(encoded_data)
     if verbose:
         print('Attempting to send encoded data to S3 staging bucket ...')
@@ -175,7 +201,7 @@ def process_item(item: ds.DataItem, controller: ds.CloudController, notifier: nt
     meta.status = WIBLStatus.PROCESSING_SUCCESSFUL.value
     if verbose:
         print('Attempting to update status via manager...')
-    manager.update(meta)
+    update_manager(manager, meta)
     if verbose:
         print('Attempting to notify SNS')
     notifier.notify(item)
@@ -205,8 +231,9 @@ def lambda_handler(event, context):
     
     p = source.nextSource()
     while p is not None:
-        if not process_item(p, controller, notifier, config):
-            print(f'Abandoning processing of {p.source_key} due to errors.')
+        with instrumentation.profile(trace_memory=config['profile_memory']) if config['profile'] else nullcontext():
+            if not process_item(p, controller, notifier, config):
+                print(f'Abandoning processing of {p.source_key} due to errors.')
         p = source.nextSource()
 
     return {
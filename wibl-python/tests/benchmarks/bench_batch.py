@@ -0,0 +1,72 @@
+"""
+Benchmark of ``time_interpolation_many()`` against calling ``time_interpolation()`` for each file in turn, and
+against a process pool that returns each file's output pickled rather than through shared memory.
+
+``--files`` files of ``--hours`` of simulated data each are generated, and processed with ``--workers`` processes.
+The outputs of the three approaches are checked to be identical.  Run as ``python -m tests.benchmarks.bench_batch``.
+"""
+import argparse
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+import numpy as np
+
+import wibl.core.timestamping as ts
+from wibl.core import Lineage
+from wibl.simulator.data import DataGenerator, Engine, CLOCKS_PER_SEC
+from wibl.simulator.data.writer import MemoryWriter
+
+CHANNELS = ['depth', 'attitude', 'cog']
+
+
+def interpolate(filename: str) -> dict:
+    data = ts.time_interpolation(filename, Lineage(), 1 << 32, process_algorithms=False, channels=CHANNELS)
+    return {key: dict(value) if key in CHANNELS else value for key, value in data.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batch time interpolation of multiple files')
+    parser.add_argument('--files', type=int, default=16, help='Number of files to process')
+    parser.add_argument('--hours', type=float, default=1.0, help='Hours of simulated data in each file')
+    parser.add_argument('--workers', type=int, default=4, help='Number of worker processes')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filenames = []
+        for n in range(args.files):
+            engine = Engine(DataGenerator())
+            writer = MemoryWriter('UNHJHC-wibl-1', 'Benchmark')
+            now = 0
+            while now < args.hours * 3600 * CLOCKS_PER_SEC:
+                now = engine.step_engine(writer)
+            filenames.append(str(Path(tmpdir, f'file-{n}.wibl')))
+            Path(filenames[-1]).write_bytes(writer.getvalue())
+
+        start = time.perf_counter()
+        expected = [interpolate(filename) for filename in filenames]
+        serial = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            pickled = list(executor.map(interpolate, filenames))
+        pool = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = ts.time_interpolation_many(filenames, 1 << 32, workers=args.workers, process_algorithms=False,
+                                             channels=CHANNELS)
+        batch = time.perf_counter() - start
+
+    for e, p, r in zip(expected, pickled, results):
+        for channel in CHANNELS:
+            for key in e[channel]:
+                np.testing.assert_array_equal(e[channel][key], p[channel][key])
+                np.testing.assert_array_equal(e[channel][key], r.data[channel][key])
+    print(f'{args.files} files, {args.workers} workers: serial {serial:.2f} s, pickled pool {pool:.2f} s '
+          f'(speedup {serial / pool:.1f}), time_interpolation_many {batch:.2f} s (speedup {serial / batch:.1f})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark of repeat processing of a WIBL file through ``InterpolationCache`` against ``time_interpolation()``.
+
+A file of ``--hours`` of simulated data is generated, and processed ``--repeats`` times both directly and through
+the cache (the first call through the cache being a miss, which adds the entry).  The output from the cache is
+checked against the direct output.  Run as ``python -m tests.benchmarks.bench_cache``.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+import wibl.core.timestamping as ts
+from wibl.core import Lineage
+from wibl.core.cache import InterpolationCache
+from wibl.simulator.data import DataGenerator, Engine, CLOCKS_PER_SEC
+from wibl.simulator.data.writer import MemoryWriter
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the cache of time-interpolated data')
+    parser.add_argument('--hours', type=float, default=4.0, help='Hours of simulated data')
+    parser.add_argument('--repeats', type=int, default=5, help='Number of times to process the file')
+    args = parser.parse_args()
+
+    engine = Engine(DataGenerator())
+    writer = MemoryWriter('UNHJHC-wibl-1', 'Benchmark')
+    now = 0
+    while now < args.hours * 3600 * CLOCKS_PER_SEC:
+        now = engine.step_engine(writer)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = str(Path(tmpdir, 'file.wibl'))
+        Path(filename).write_bytes(writer.getvalue())
+        cache = InterpolationCache(Path(tmpdir, 'cache'), 1 << 30)
+
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            expected = ts.time_interpolation(filename, Lineage(), 1 << 32, channels=['depth'])
+            expected['depth']['t']
+        direct = (time.perf_counter() - start) / args.repeats
+
+        start = time.perf_counter()
+        cache.time_interpolation(filename, Lineage(), 1 << 32, channels=['depth'])
+        miss = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            result = cache.time_interpolation(filename, Lineage(), 1 << 32, channels=['depth'])
+        hit = (time.perf_counter() - start) / args.repeats
+        size = cache.size()
+
+    for key in expected['depth']:
+        np.testing.assert_array_equal(expected['depth'][key], result['depth'][key])
+    print(f'{len(expected["depth"]["z"]):,} depths: direct {direct:.3f} s, cache miss {miss:.3f} s, '
+          f'cache hit {hit:.4f} s (speedup {direct / hit:.0f}), entry {size / 1024:.0f} KiB')
+
+
+if __name__ == '__main__':
+    main()
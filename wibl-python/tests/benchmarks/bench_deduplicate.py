@@ -0,0 +1,71 @@
+"""
+Benchmark of the ``deduplicate`` algorithm against the previous implementation, which walked the depths in a Python
+loop comparing each with the last depth kept, and then indexed each of the arrays of the depth channel.
+
+The depth channel has ``--points`` points (default 10^7), with runs of repeated depths as from a repeater.  The
+old loop is timed on ``--loop-points`` points (since it takes a long time), and scaled up to the full size; the
+results of the two are checked to be identical on those points.  The time with a ``tolerance`` parameter, where each
+depth that isn't an exact repeat has to be compared in turn with the last depth kept, is also reported.  Run as
+``python -m tests.benchmarks.bench_deduplicate``.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from wibl.core import Lineage
+from wibl.core.algorithm.deduplicate import deduplicate_depth
+
+
+def loop_deduplicate(source: dict) -> dict:
+    current_depth = 0
+    d = []
+    for n in range(len(source['depth']['z'])):
+        if source['depth']['z'][n] != current_depth:
+            d.append(n)
+            current_depth = source['depth']['z'][n]
+    index = np.array(d)
+    for name in ('t', 'lat', 'lon', 'z'):
+        source['depth'][name] = source['depth'][name][index]
+    return source
+
+
+def make_source(points: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    z = np.repeat(rng.uniform(5.0, 50.0, points // 2), 2)[:points]
+    t = 1.6e9 + np.arange(points) * 0.1
+    return {'depth': {'t': t, 'lat': 43.0 + rng.normal(0, 1e-3, points), 'lon': -70.0 + rng.normal(0, 1e-3, points),
+                      'z': z}}
+
+
+def copy_source(source: dict) -> dict:
+    return {'depth': dict(source['depth'])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the deduplicate algorithm')
+    parser.add_argument('--points', type=int, default=10_000_000, help='Number of points in the depth channel')
+    parser.add_argument('--loop-points', type=int, default=1_000_000, help='Number of points for the old loop')
+    args = parser.parse_args()
+
+    source = make_source(args.points)
+    start = time.perf_counter()
+    deduplicate_depth(copy_source(source), '', Lineage(), False)
+    vectorised = time.perf_counter() - start
+    start = time.perf_counter()
+    deduplicate_depth(copy_source(source), 'tolerance=0.05', Lineage(), False)
+    tolerance = time.perf_counter() - start
+
+    sample = make_source(args.loop_points)
+    start = time.perf_counter()
+    expected = loop_deduplicate(copy_source(sample))
+    loop = (time.perf_counter() - start) * args.points / args.loop_points
+    result = deduplicate_depth(copy_source(sample), '', Lineage(), False)
+    for name in ('t', 'lat', 'lon', 'z'):
+        np.testing.assert_array_equal(expected['depth'][name], result['depth'][name])
+    print(f'{args.points:,} points: loop {loop:.2f} s (scaled from {args.loop_points:,}), '
+          f'vectorised {vectorised:.3f} s (speedup {loop / vectorised:.0f}); with tolerance {tolerance:.2f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark of the elapsed-time fixup in ``load_file()`` against the loop over the packets that it replaced.
+
+A list of ``--count`` packets is constructed in which ``--missing`` of the packets (at random) have no elapsed time,
+as for data from a TeamSurv or YDVR logger converted to WIBL, and the elapsed times are then fixed up with each
+approach, checking that the results are the same.  Run as ``python -m tests.benchmarks.bench_elapsed_fixup``.
+"""
+import argparse
+import random
+import time
+
+import wibl.core.logger_file as lf
+from wibl.core.fileloader import TimeSource, _fix_elapsed_times
+from wibl.core.statistics import PktStats
+
+
+def make_packets(count: int, missing: float, seed: int = 0):
+    rng = random.Random(seed)
+    elapsed = 0
+    packets = []
+    for _ in range(count):
+        elapsed += rng.randint(1, 300)
+        packets.append(lf.Depth(date=0, timestamp=0.0, elapsed_time=0 if rng.random() < missing else elapsed,
+                                depth=10.0, offset=0.0, range=100.0))
+    return packets
+
+
+def loop_fixup(packets) -> None:
+    oldest_position = None
+    for n in range(len(packets)):
+        if packets[n].elapsed == 0:
+            if n > 0 and packets[n-1].elapsed > 0:
+                oldest_position = n - 1
+        elif oldest_position is not None:
+            target_elapsed_time = (packets[oldest_position].elapsed + packets[n].elapsed)/2.0
+            for i in range(oldest_position + 1, n):
+                packets[i].elapsed = target_elapsed_time
+            oldest_position = None
+    for n in range(len(packets)):
+        if packets[n].elapsed == 0:
+            packets[n].elapsed = None
+
+
+def array_fixup(packets) -> None:
+    _fix_elapsed_times(packets, TimeSource.Time_SysTime, PktStats(10), False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the elapsed-time fixup in load_file()')
+    parser.add_argument('--count', type=int, default=1_000_000, help='Number of packets')
+    parser.add_argument('--missing', type=float, nargs='+', default=[0.1, 0.5, 0.9],
+                        help='Fractions of packets with no elapsed time')
+    args = parser.parse_args()
+
+    print(f'{"Missing":>8}  {"loop s":>8}  {"array s":>8}  {"speedup":>8}')
+    for missing in args.missing:
+        results = []
+        durations = []
+        for method in (loop_fixup, array_fixup):
+            packets = make_packets(args.count, missing)
+            start = time.perf_counter()
+            method(packets)
+            durations.append(time.perf_counter() - start)
+            results.append([pkt.elapsed for pkt in packets])
+        assert results[0] == results[1], 'fixup results differ'
+        print(f'{missing:8.2f}  {durations[0]:8.3f}  {durations[1]:8.3f}  {durations[0] / durations[1]:8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark of ``IncrementalInterpolator`` against reprocessing a growing WIBL file from the start with
+``time_interpolation()`` on each update.
+
+A file of ``--hours`` of simulated data is generated, and then written out in ``--updates`` roughly equal pieces (on
+packet boundaries, since ``time_interpolation()`` can't read a partly-written packet); after each piece, the soundings
+so far are generated both ways, and the total time for all of the updates is reported.  The
+soundings emitted incrementally are checked against those from the final reprocessing.  Run as
+``python -m tests.benchmarks.bench_incremental``.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+import wibl.core.logger_file as lf
+import wibl.core.timestamping as ts
+from wibl.core import Lineage
+from wibl.simulator.data import DataGenerator, Engine, CLOCKS_PER_SEC
+from wibl.simulator.data.writer import MemoryWriter
+
+
+def packet_boundaries(data: bytes) -> np.ndarray:
+    boundaries = [0]
+    while boundaries[-1] < len(data):
+        _, length = lf.packet_header.unpack_from(data, boundaries[-1])
+        boundaries.append(boundaries[-1] + lf.packet_header.size + length)
+    return np.array(boundaries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark incremental time interpolation of a growing file')
+    parser.add_argument('--hours', type=float, default=1.0, help='Hours of simulated data')
+    parser.add_argument('--updates', type=int, nargs='+', default=[10, 60], help='Number of updates of the file')
+    args = parser.parse_args()
+
+    engine = Engine(DataGenerator())
+    writer = MemoryWriter('UNHJHC-wibl-1', 'Benchmark')
+    now = 0
+    while now < args.hours * 3600 * CLOCKS_PER_SEC:
+        now = engine.step_engine(writer)
+    data = writer.getvalue()
+    boundaries = packet_boundaries(data)
+
+    print(f'{"updates":>8}  {"reprocess s":>11}  {"incremental s":>13}  {"speedup":>8}')
+    for updates in args.updates:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = str(Path(tmpdir, 'growing.wibl'))
+            interpolator = ts.IncrementalInterpolator(1 << 32, channels=['depth'])
+            emitted = []
+            reprocess = incremental = 0.0
+            targets = np.linspace(0, len(data), updates + 1)[1:]
+            for cut in boundaries[np.searchsorted(boundaries, targets)].tolist():
+                Path(filename).write_bytes(data[:cut])
+                start = time.perf_counter()
+                expected = ts.time_interpolation(filename, Lineage(), 1 << 32, process_algorithms=False,
+                                                 channels=['depth'])
+                expected['depth']['t']
+                reprocess += time.perf_counter() - start
+                start = time.perf_counter()
+                emitted.append(interpolator.update(filename)['depth'])
+                incremental += time.perf_counter() - start
+            emitted.append(interpolator.flush()['depth'])
+        for key in ('t', 'lat', 'lon', 'z'):
+            np.testing.assert_array_equal(expected['depth'][key], np.concatenate([d[key] for d in emitted]))
+        print(f'{updates:8d}  {reprocess:11.2f}  {incremental:13.2f}  {reprocess / incremental:8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark of ``InterpTable.interpolate_many()`` against calling ``InterpTable.interpolate()`` for each channel, as
+``time_interpolation()`` did before, when interpolating the time points of several channels against the reference
+time and position tables.
+
+The depth channel has ``--depths`` points, and the other channels ``--depths``/10 points each (with one channel
+empty); the reference tables have a point per second over the same span.  The results of the two approaches are
+checked to be identical.  Since ``np.interp()`` already searches efficiently for sorted points, the gain is mostly
+from fewer calls over the concatenated points, rather than from the search.  Run as
+``python -m tests.benchmarks.bench_interpolation``.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from wibl.core.interpolation import InterpTable
+
+
+def make_tables(depths: int, channels: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    duration = depths * 200.0
+    reference = np.arange(0.0, duration, 1000.0)
+    time_table = InterpTable(['ref'])
+    time_table.extend(reference, {'ref': 1.6e9 + reference / 1000.0})
+    position_table = InterpTable(['lat', 'lon'])
+    position_table.extend(reference, {'lat': 43.0 + rng.normal(0, 1e-3, len(reference)).cumsum(),
+                                      'lon': -70.0 + rng.normal(0, 1e-3, len(reference)).cumsum()})
+    timepoints = [np.sort(rng.uniform(0.0, duration, depths))]
+    timepoints += [np.sort(rng.uniform(0.0, duration, depths // 10)) for _ in range(channels - 2)]
+    timepoints.append(np.empty(0))
+    return time_table, position_table, timepoints
+
+
+def per_channel(time_table: InterpTable, position_table: InterpTable, timepoints):
+    return [(time_table.interpolate(['ref'], t), position_table.interpolate(['lat', 'lon'], t)) for t in timepoints]
+
+
+def batched(time_table: InterpTable, position_table: InterpTable, timepoints):
+    return list(zip(time_table.interpolate_many(['ref'], timepoints),
+                    position_table.interpolate_many(['lat', 'lon'], timepoints)))
+
+
+def best_time(interpolator, tables, repeats: int):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = interpolator(*tables)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batched interpolation of multiple channels')
+    parser.add_argument('--depths', type=int, default=1_000_000, help='Number of points in the depth channel')
+    parser.add_argument('--channels', type=int, default=8, help='Number of channels to interpolate')
+    parser.add_argument('--repeats', type=int, default=3, help='Repeats per measurement (best is reported)')
+    args = parser.parse_args()
+
+    tables = make_tables(args.depths, args.channels)
+    reference, expected = best_time(per_channel, tables, args.repeats)
+    fast, result = best_time(batched, tables, args.repeats)
+    for (e_t, e_pos), (r_t, r_pos) in zip(expected, result):
+        for e, r in zip(e_t + e_pos, r_t + r_pos):
+            np.testing.assert_array_equal(e, r)
+    print(f'{args.channels} channels, {args.depths:,} depths: per-channel {reference:.3f} s, '
+          f'batched {fast:.3f} s (speedup {reference / fast:.1f})')
+
+
+if __name__ == '__main__':
+    main()
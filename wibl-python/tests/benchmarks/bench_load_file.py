@@ -0,0 +1,85 @@
+"""
+Benchmark of ``load_file()`` wall-clock time, peak memory, and passes over the packets, with and without elapsed-time
+fixup.
+
+Two temporary files are written: ``--hours`` of simulated WIBL data (in which every packet has an elapsed time), and a
+NMEA0183-only file of ``--epochs`` seconds in which most packets have no elapsed time (as for data converted from
+another logger), so that the elapsed times have to be fixed up.  The number of passes is estimated as the number of
+reads of the elapsed time per packet.  Run as ``python -m tests.benchmarks.bench_load_file``.
+"""
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import wibl.core.fileloader as fileloader
+import wibl.core.logger_file as lf
+from wibl.core import Lineage
+from wibl.simulator.data import DataGenerator, Engine, CLOCKS_PER_SEC
+from wibl.simulator.data.writer import MemoryWriter
+
+from tests.fixtures import elapsed_fixup_packets, serialise_packets
+
+
+class ElapsedReadCounter:
+    """Count reads of the elapsed time of any packet, by wrapping the slot that holds it.  Every pass over the packets
+    reads each packet's elapsed time, so the number of reads per packet is the number of passes made."""
+    def __init__(self):
+        self.reads = 0
+        self.slot = lf.DataPacket.__dict__['elapsed']
+
+    def __enter__(self):
+        counter = self
+
+        def read(pkt):
+            counter.reads += 1
+            return counter.slot.__get__(pkt)
+
+        lf.DataPacket.elapsed = property(read, self.slot.__set__)
+        return self
+
+    def __exit__(self, *exc):
+        lf.DataPacket.elapsed = self.slot
+
+
+def measure(filename: str):
+    # The loader reports the faults in the fixup file, which would swamp the results
+    with ElapsedReadCounter() as counter, contextlib.redirect_stdout(io.StringIO()):
+        tracemalloc.start()
+        start = time.perf_counter()
+        _, _, packets, _ = fileloader.load_file(filename, Lineage(), False, 10)
+        duration = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return duration, peak, len(packets), counter.reads / len(packets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark passes and peak memory in load_file()')
+    parser.add_argument('--hours', type=float, default=1.0, help='Hours of simulated WIBL data')
+    parser.add_argument('--epochs', type=int, default=20000, help='Seconds of NMEA0183 data needing fixup')
+    args = parser.parse_args()
+
+    engine = Engine(DataGenerator())
+    writer = MemoryWriter('UNHJHC-wibl-1', 'Benchmark')
+    now = 0
+    while now < args.hours * 3600 * CLOCKS_PER_SEC:
+        now = engine.step_engine(writer)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = {
+            'no fixup': Path(tmpdir, 'simulated.wibl'),
+            'fixup': Path(tmpdir, 'fixup.wibl')
+        }
+        files['no fixup'].write_bytes(writer.getvalue())
+        files['fixup'].write_bytes(serialise_packets(elapsed_fixup_packets(args.epochs)))
+        print(f'{"File":>10}  {"packets":>8}  {"passes":>6}  {"seconds":>8}  {"peak MiB":>8}')
+        for label, path in files.items():
+            duration, peak, count, passes = measure(str(path))
+            print(f'{label:>10}  {count:8d}  {passes:6.2f}  {duration:8.2f}  {peak / 2**20:8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark of ``MappedPacketReader`` against ``PacketFactory`` for a pass that only needs elapsed times.
+
+A temporary file of ``--count`` packets of each type is written, and then read with each reader, touching only the
+elapsed time of each packet (as the elapsed-time fixup in ``load_file()`` does for most packets).  Run as
+``python -m tests.benchmarks.bench_mapped_reader``.
+"""
+import argparse
+import tempfile
+import time
+
+import wibl.core.logger_file as lf
+
+from tests.fixtures import sample_packets, serialise_packets
+
+
+def elapsed_pass(reader_class, path: str, repeats: int) -> float:
+    best = None
+    for _ in range(repeats):
+        with open(path, 'rb') as file:
+            start = time.perf_counter()
+            source = reader_class(file)
+            count = 0
+            while source.has_more():
+                pkt = source.next_packet()
+                if pkt is not None and pkt.elapsed >= 0:
+                    count += 1
+            elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return count / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark memory-mapped lazy reads against PacketFactory')
+    parser.add_argument('--count', type=int, default=20_000, help='Packets of each type in the test file')
+    parser.add_argument('--repeats', type=int, default=3, help='Repeats per reader (best is reported)')
+    args = parser.parse_args()
+
+    packets = list(sample_packets().values())
+    with tempfile.NamedTemporaryFile(suffix='.wibl') as file:
+        file.write(serialise_packets(packets * args.count))
+        file.flush()
+        print(f'{"Reader":>20}  {"packets/s":>12}')
+        for reader_class in (lf.PacketFactory, lf.MappedPacketReader):
+            print(f'{reader_class.__name__:>20}  {elapsed_pass(reader_class, file.name, args.repeats):12,.0f}')
+
+
+if __name__ == '__main__':
+    main()
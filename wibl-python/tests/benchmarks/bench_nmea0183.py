@@ -0,0 +1,76 @@
+"""
+Benchmark of the NMEA0183 parser in ``wibl.core.nmea0183`` against pynmea2, reported as sentences/s for each of
+the sentences interpreted, and as the wall-clock time of ``time_interpolation()`` for ``--hours`` of simulated data.
+
+For the end-to-end time, the pynmea2 figure is obtained by disabling the fast path so that every sentence goes to
+pynmea2, as it did before the parser was added.  Run as ``python -m tests.benchmarks.bench_nmea0183``.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+from wibl.core import Lineage, nmea0183
+import wibl.core.timestamping as ts
+from wibl.simulator.data import DataGenerator, Engine, CLOCKS_PER_SEC
+from wibl.simulator.data.writer import MemoryWriter
+
+from tests.fixtures import nmea_sentence
+from tests.unit.test_nmea0183 import SENTENCES, pynmea2_values
+
+
+def parse_rate(parser, data: bytes, count: int, repeats: int) -> float:
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(count):
+            parser(data)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return count / best
+
+
+def interpolation_time(filename: str, repeats: int) -> float:
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        ts.time_interpolation(filename, Lineage(), 1 << 32)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark NMEA0183 parsing against pynmea2')
+    parser.add_argument('--count', type=int, default=20_000, help='Sentences of each type to parse')
+    parser.add_argument('--hours', type=float, default=1.0, help='Hours of simulated WIBL data to timestamp')
+    parser.add_argument('--repeats', type=int, default=3, help='Repeats per measurement (best is reported)')
+    args = parser.parse_args()
+
+    print(f'{"Sentence":>8}  {"pynmea2/s":>10}  {"parser/s":>10}  {"speedup":>8}')
+    for body in SENTENCES:
+        data = nmea_sentence(body)
+        reference = parse_rate(pynmea2_values, data, args.count, args.repeats)
+        fast = parse_rate(nmea0183.parse, data, args.count, args.repeats)
+        print(f'{body[2:5]:>8}  {reference:10,.0f}  {fast:10,.0f}  {fast / reference:8.1f}')
+
+    engine = Engine(DataGenerator())
+    writer = MemoryWriter('UNHJHC-wibl-1', 'Benchmark')
+    now = 0
+    while now < args.hours * 3600 * CLOCKS_PER_SEC:
+        now = engine.step_engine(writer)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = str(Path(tmpdir, 'simulated.wibl'))
+        Path(filename).write_bytes(writer.getvalue())
+        with mock.patch.object(nmea0183, '_parse_fast', return_value=(False, None)):
+            reference = interpolation_time(filename, args.repeats)
+        fast = interpolation_time(filename, args.repeats)
+    print(f'time_interpolation() on {args.hours} h: pynmea2 {reference:.2f} s, parser {fast:.2f} s '
+          f'(speedup {reference / fast:.1f})')
+
+
+if __name__ == '__main__':
+    main()
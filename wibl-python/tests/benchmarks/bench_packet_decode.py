@@ -0,0 +1,44 @@
+"""
+Micro-benchmark for ``PacketFactory`` decode throughput, reported as packets/s for each packet type.
+
+Each packet type is serialised into an in-memory file of ``--count`` copies, which is then decoded in full
+through ``PacketFactory.next_packet()``.  Run as ``python -m tests.benchmarks.bench_packet_decode``.
+"""
+import argparse
+import io
+import time
+
+import wibl.core.logger_file as lf
+
+from tests.fixtures import sample_packets, serialise_packets
+
+
+def decode_rate(data: bytes, repeats: int) -> float:
+    best = None
+    for _ in range(repeats):
+        source = lf.PacketFactory(io.BytesIO(data))
+        start = time.perf_counter()
+        count = 0
+        while source.has_more():
+            if source.next_packet() is not None:
+                count += 1
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return count / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark PacketFactory decode rates per packet type')
+    parser.add_argument('--count', type=int, default=100_000, help='Packets of each type to decode')
+    parser.add_argument('--repeats', type=int, default=3, help='Repeats per type (best is reported)')
+    args = parser.parse_args()
+
+    print(f'{"Packet":>18}  {"packets/s":>12}')
+    for name, pkt in sample_packets().items():
+        data = serialise_packets([pkt] * args.count)
+        print(f'{name:>18}  {decode_rate(data, args.repeats):12,.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark of the per-packet operations on ``PktStats`` (``Observed()``, ``FaultCount()`` and ``Fault()``), in the
+pattern used while processing NMEA0183 strings, and of merging the statistics from a number of chunks of a file.
+
+``--packets`` packets are noted, spread over a typical mix of names, with one in ``--fault-every`` having a fault.
+The time per packet is reported.  Run as ``python -m tests.benchmarks.bench_statistics``.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from wibl.core.statistics import PktStats, PktFaults
+
+NAMES = ['GGA', 'ZDA', 'DBT', 'DPT', 'HDT', 'MTW', 'MWD', 'RMC', 'GLL', 'SystemTime', 'Depth', 'GNSS']
+FAULTS = list(PktFaults)
+
+
+def note_packets(names, faults) -> PktStats:
+    stats = PktStats(10)
+    for name, fault in zip(names, faults):
+        stats.Observed(name)
+        if stats.FaultCount(name) == stats.fault_limit:
+            pass
+        if fault is not None:
+            stats.Fault(name, fault)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark packet statistics')
+    parser.add_argument('--packets', type=int, default=2_000_000, help='Number of packets to note')
+    parser.add_argument('--fault-every', type=int, default=100, help='Interval between packets with faults')
+    parser.add_argument('--chunks', type=int, default=64, help='Number of chunks to merge')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    names = [NAMES[n] for n in rng.integers(0, len(NAMES), args.packets)]
+    faults = [FAULTS[n % len(FAULTS)] if n % args.fault_every == 0 else None for n in range(args.packets)]
+
+    start = time.perf_counter()
+    whole = note_packets(names, faults)
+    noting = time.perf_counter() - start
+
+    step = args.packets // args.chunks
+    parts = [note_packets(names[n:n + step], faults[n:n + step]) for n in range(0, args.packets, step)]
+    start = time.perf_counter()
+    merged = PktStats(10)
+    for part in parts:
+        merged.merge(part)
+    merging = time.perf_counter() - start
+    assert str(whole) == str(merged)
+    print(f'{args.packets:,} packets: {noting * 1e9 / args.packets:.0f} ns/packet; '
+          f'merging {len(parts)} chunks {merging * 1e6:.0f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Benchmark of peak memory and wall-clock time for ``time_interpolation()`` with and without streaming mode.
+
+A file of ``--hours`` of simulated data is generated, and then processed with the packets loaded into memory, and in
+streaming mode (where only the interpolation tables are held in memory).  Peak memory is measured with
+``tracemalloc``.  Run as ``python -m tests.benchmarks.bench_streaming --hours 1 4``.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import wibl.core.timestamping as ts
+from wibl.core import Lineage
+from wibl.simulator.data import DataGenerator, Engine, CLOCKS_PER_SEC
+from wibl.simulator.data.writer import MemoryWriter
+
+
+def measure(filename: str, streaming: bool):
+    tracemalloc.start()
+    start = time.perf_counter()
+    data = ts.time_interpolation(filename, Lineage(), 1 << 32, streaming=streaming)
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duration, peak, len(data['depth']['z'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark streaming mode in time_interpolation()')
+    parser.add_argument('--hours', type=float, nargs='+', default=[1.0, 2.0], help='Hours of simulated data')
+    args = parser.parse_args()
+
+    print(f'{"Hours":>6}  {"file MiB":>8}  {"mode":>9}  {"seconds":>8}  {"peak MiB":>8}  {"depths":>8}')
+    for hours in args.hours:
+        engine = Engine(DataGenerator())
+        writer = MemoryWriter('UNHJHC-wibl-1', 'Benchmark')
+        now = 0
+        while now < hours * 3600 * CLOCKS_PER_SEC:
+            now = engine.step_engine(writer)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = str(Path(tmpdir, 'simulated.wibl'))
+            Path(filename).write_bytes(writer.getvalue())
+            size = os.path.getsize(filename) / 2**20
+            for streaming in (False, True):
+                duration, peak, depths = measure(filename, streaming)
+                mode = 'streaming' if streaming else 'in-memory'
+                print(f'{hours:6.1f}  {size:8.1f}  {mode:>9}  {duration:8.2f}  {peak / 2**20:8.1f}  {depths:8d}')
+
+
+if __name__ == '__main__':
+    main()
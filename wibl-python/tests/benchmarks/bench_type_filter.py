@@ -0,0 +1,66 @@
+"""
+Benchmark of ``iter_packets(types=...)`` against reading every packet and filtering with ``isinstance()``.
+
+A temporary file of ``--count`` packets of each type is written, and then the motion packets (as plotted by
+``Tools/plot_motion_data.py``) are extracted from it with each approach.  Run as
+``python -m tests.benchmarks.bench_type_filter``.
+"""
+import argparse
+import tempfile
+import time
+
+import wibl.core.logger_file as lf
+
+from tests.fixtures import sample_packets, serialise_packets
+
+
+MOTION_TYPES = (lf.Motion, lf.RawIMU, lf.SensorScales)
+
+
+def decode_all(source) -> int:
+    count = 0
+    while source.has_more():
+        pkt = source.next_packet()
+        if pkt is not None and isinstance(pkt, MOTION_TYPES):
+            count += 1
+    return count
+
+
+def filtered(source) -> int:
+    count = 0
+    for _ in source.iter_packets(types=MOTION_TYPES):
+        count += 1
+    return count
+
+
+def best_time(method, reader_class, path: str, repeats: int) -> float:
+    best = None
+    for _ in range(repeats):
+        with open(path, 'rb') as file:
+            start = time.perf_counter()
+            method(reader_class(file))
+            elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark type-filtered packet iteration')
+    parser.add_argument('--count', type=int, default=20_000, help='Packets of each type in the test file')
+    parser.add_argument('--repeats', type=int, default=3, help='Repeats per method (best is reported)')
+    args = parser.parse_args()
+
+    packets = list(sample_packets().values())
+    with tempfile.NamedTemporaryFile(suffix='.wibl') as file:
+        file.write(serialise_packets(packets * args.count))
+        file.flush()
+        print(f'{"Reader":>20}  {"Method":>12}  {"time (s)":>10}')
+        for reader_class in (lf.PacketFactory, lf.MappedPacketReader):
+            for method in (decode_all, filtered):
+                print(f'{reader_class.__name__:>20}  {method.__name__:>12}  '
+                      f'{best_time(method, reader_class, file.name, args.repeats):10.3f}')
+
+
+if __name__ == '__main__':
+    main()
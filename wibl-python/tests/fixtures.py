@@ -1,10 +1,15 @@
+import datetime as dt
+import io
+import random
 import shutil
 from pathlib import Path
-from typing import IO, AnyStr, Union
+from typing import IO, AnyStr, Union, Dict, List
 import tempfile
 
 import pytest
 
+import wibl.core.logger_file as lf
+
 
 @pytest.fixture(scope="session")
 def data_path() -> Path:
@@ -31,3 +36,80 @@ def get_named_tempfile(dir: Union[Path, str], *, suffix=None, prefix=None) -> IO
                                        prefix=prefix,
                                        suffix=suffix,
                                        delete=False)
+
+
+def sample_packets() -> Dict[str, lf.DataPacket]:
+    """Construct one example packet of each type, keyed by the packet type name."""
+    return {
+        'SerialiserVersion': lf.SerialiserVersion(major=1, minor=3, n2000=(1, 0, 0), n0183=(1, 0, 0), imu=(1, 0, 0)),
+        'SystemTime': lf.SystemTime(date=19000, timestamp=3600.5, elapsed_time=123456, data_source=0),
+        'Attitude': lf.Attitude(date=19000, timestamp=3600.5, elapsed_time=123456, yaw=0.1, pitch=0.2, roll=0.3),
+        'Depth': lf.Depth(date=19000, timestamp=3600.5, elapsed_time=123456, depth=12.5, offset=0.5, range=200.0),
+        'COG': lf.COG(date=19000, timestamp=3600.5, elapsed_time=123456, cog=1.2, sog=4.5),
+        'GNSS': lf.GNSS(date=19000, timestamp=3600.5, elapsed_time=123456, msg_date=19000, msg_timestamp=3600.0,
+                        latitude=43.07, longitude=-70.71, altitude=-30.2, rx_type=0, rx_method=2, num_svs=12,
+                        horizontal_dop=0.9, position_dop=1.4, sep=-28.5, n_refs=1, refs_type=0, refs_id=402,
+                        correction_age=3.0),
+        'Environment': lf.Environment(date=19000, timestamp=3600.5, elapsed_time=123456, temp=290.0, temp_source=0,
+                                      humidity=55.0, humid_source=1, pressure=101325.0),
+        'Temperature': lf.Temperature(date=19000, timestamp=3600.5, elapsed_time=123456, temp=290.0, temp_source=0),
+        'Humidity': lf.Humidity(date=19000, timestamp=3600.5, elapsed_time=123456, humidity=55.0, humid_source=1),
+        'Pressure': lf.Pressure(date=19000, timestamp=3600.5, elapsed_time=123456, pressure=101325.0,
+                                press_source=0),
+        'SerialString': lf.SerialString(elapsed_time=123456,
+                                        payload=b'$GPGGA,120000.00,4304.2000,N,07042.6000,W,2,12,0.9,-30.2,M,-28.5,M,3.0,0402*67\r\n'),
+        'Motion': lf.Motion(elapsed_time=123456, accel=(0.1, 0.2, 9.8), gyro=(0.01, 0.02, 0.03), temp=25.0),
+        'Metadata': lf.Metadata(logger='UNHJHC-wibl-1', shipname='Gulf Surveyor'),
+        'AlgorithmRequest': lf.AlgorithmRequest(name='deduplicate', params=''),
+        'JSONMetadata': lf.JSONMetadata(meta='{"platform": {"type": "Ship", "length": 12.0}}'),
+        'NMEA0183Filter': lf.NMEA0183Filter(sentence='GGA'),
+        'RawIMU': lf.RawIMU(elapsed_time=123456, accel=(10, 20, 4000), gyro=(1, 2, 3), temp=250),
+    }
+
+
+def serialise_packets(packets: List[lf.DataPacket]) -> bytes:
+    """Serialise a list of packets into the bytes of a WIBL file."""
+    out = io.BytesIO()
+    for pkt in packets:
+        pkt.serialise(out)
+    return out.getvalue()
+
+
+def nmea_sentence(body: str) -> bytes:
+    """Construct a NMEA0183 sentence (with checksum and line ending) from the text between '$' and '*'."""
+    checksum = 0
+    for c in body.encode('ascii'):
+        checksum ^= c
+    return f'${body}*{checksum:02X}\r\n'.encode('ascii')
+
+
+def elapsed_fixup_packets(n_epochs: int, seed: int = 0) -> List[lf.DataPacket]:
+    """Construct the packets for a NMEA0183-only file, timed by ZDA, in which many of the packets have no elapsed
+    time (as happens when data from another logger is converted to WIBL), so that load_file() has to fix up the
+    elapsed times.  A few sentences are short, unparseable, or undecodable, to exercise the fault handling."""
+    rng = random.Random(seed)
+    packets: List[lf.DataPacket] = [
+        lf.SerialiserVersion(major=1, minor=3, n2000=(1, 0, 0), n0183=(1, 0, 0), imu=(1, 0, 0)),
+        lf.Metadata(logger='UNHJHC-wibl-1', shipname='Gulf Surveyor')
+    ]
+    start = dt.datetime(2024, 5, 1, 12, 0, 0)
+    elapsed = 1000
+    for epoch in range(n_epochs):
+        t = start + dt.timedelta(seconds=epoch)
+        sentences = [
+            nmea_sentence(f'GPZDA,{t:%H%M%S}.00,{t:%d},{t:%m},{t:%Y},00,00'),
+            nmea_sentence(f'GPGGA,{t:%H%M%S}.00,4304.{epoch % 10000:04d},N,07042.6000,W,2,12,0.9,-30.2,M,'
+                          f'-28.5,M,3.0,0402'),
+            nmea_sentence(f'SDDBT,{32.8 + epoch % 7:.1f},f,{10.0 + (epoch % 7) * 0.3:.2f},M,5.5,F')
+        ]
+        if epoch % 97 == 13:
+            sentences.append(b'$GPZDA*00\r\n')
+        if epoch % 89 == 7:
+            sentences.append(b'$GPZDA,12xx00.00,01,05,2024,00,00*00\r\n')
+        if epoch % 101 == 3:
+            sentences.append(b'$GP\xff\xfeA,garbage\r\n')
+        for sentence in sentences:
+            elapsed += rng.randint(1, 300)
+            stamp = 0 if rng.random() < 0.6 else elapsed
+            packets.append(lf.SerialString(elapsed_time=stamp, payload=sentence))
+    return packets
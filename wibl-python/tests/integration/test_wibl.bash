@@ -8,9 +8,16 @@ SCRIPT_DIR=$(realpath "$(dirname $0)")
 ## Define clean-up function
 function cleanup () {
   rm -f /tmp/test-wibl.bin
+  rm -f /tmp/test-wibl.bin.gz
   rm -f /tmp/test-wibl-buffer-constr.bin
   rm -f /tmp/test-wibl-inject.bin
+  rm -f /tmp/test-wibl-inject.wblk
   rm -f /tmp/test-wibl-inject.geojson
+  rm -f /tmp/test-wibl-window.bin
+  # Packet index sidecars written next to the files read with --start/--end
+  rm -f /tmp/test-wibl.bin.idx
+  rm -f /tmp/test-wibl-inject.bin.idx
+  rm -f /tmp/test-wibl-window.bin.idx
   docker compose -f "${SCRIPT_DIR}/docker-compose.yaml" down
 }
 trap cleanup EXIT
@@ -27,9 +34,24 @@ wibl datasim -f /tmp/test-wibl-buffer-constr.bin -d 3600 -s -b --use-buffer-cons
 ## Parse binary file into text output using `parsewibl`
 wibl parsewibl /tmp/test-wibl.bin
 
+## Parse a compressed copy of the binary file, which is decompressed as it is read
+gzip -c /tmp/test-wibl.bin > /tmp/test-wibl.bin.gz
+wibl parsewibl -s /tmp/test-wibl.bin.gz
+
 ## Add platform metadata to WIBL file using `editwibl`
 wibl editwibl -m tests/data/b12_v3_metadata_example.json /tmp/test-wibl.bin /tmp/test-wibl-inject.bin
 
+## Report just the metadata packets, and a window of data (using the packet index)
+wibl parsewibl -t Metadata -t JSONMetadata -t SerialiserVersion /tmp/test-wibl-inject.bin
+wibl parsewibl --start 60000 --end 120000 /tmp/test-wibl-inject.bin
+
+## Repack into a block-indexed container, and read a window of data from it using the block index
+wibl repack /tmp/test-wibl-inject.bin /tmp/test-wibl-inject.wblk
+wibl parsewibl --start 60000 --end 120000 /tmp/test-wibl-inject.wblk
+
+## Extract a window of data into a new WIBL file using `editwibl`
+wibl editwibl --start 60000 --end 120000 /tmp/test-wibl-inject.bin /tmp/test-wibl-window.bin
+
 ## Convert binary WIBL file into GeoJSON using `procwibl`
 wibl procwibl -c tests/data/configure.local.json /tmp/test-wibl-inject.bin /tmp/test-wibl-inject.geojson
 
@@ -1,11 +1,19 @@
+import tempfile
 import unittest
 from pathlib import Path
 
+import numpy as np
+
 from wibl import config_logger_service
 from wibl.core import Lineage
 import wibl.core.config as conf
 import wibl.core.timestamping as ts
 from wibl.core.algorithm import AlgorithmDescriptor, UnknownAlgorithm, AlgorithmPhase, runner
+from wibl.core.algorithm.deduplicate import deduplicate_depth, find_duplicates, non_duplicate_mask, \
+    parse_params
+import wibl.core.logger_file as lf
+
+from tests.fixtures import serialise_packets
 
 
 logger = config_logger_service()
@@ -55,6 +63,66 @@ class TestAlgorithms(unittest.TestCase):
         self.assertEqual('1.0.0', l['version'])
         self.assertEqual('Selected 234 non-duplicate depths from 277 in input.', l['comment'])
 
+    def test_algo_dedup_mask(self):
+        z = np.array([0.0, 5.0, 5.0, 5.02, 5.0, np.nan, np.nan, np.inf, np.inf, 6.0, 6.0])
+        t = np.array([0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 20.0])
+        # A leading zero depth is dropped, as are exact repeats (but NaN never repeats)
+        self.assertEqual([1, 3, 4, 5, 6, 7, 9], np.flatnonzero(non_duplicate_mask(z)).tolist())
+        self.assertEqual([1, 5, 6, 7, 9], np.flatnonzero(non_duplicate_mask(z, tolerance=0.05)).tolist())
+        self.assertEqual([1, 3, 4, 5, 6, 7, 9, 10],
+                         np.flatnonzero(non_duplicate_mask(z, t, time_gap=5.0)).tolist())
+        self.assertEqual(0, len(non_duplicate_mask(np.empty(0))))
+
+        # A slowly changing depth is kept each time it moves beyond the tolerance from the last depth kept
+        ramp = np.arange(10.0, 11.0, 0.01)
+        mask = non_duplicate_mask(ramp, tolerance=0.05)
+        self.assertGreater(mask.sum(), 15)
+        last_kept = np.maximum.accumulate(np.where(mask, np.arange(len(ramp)), 0))
+        np.testing.assert_array_less(0.05, np.diff(ramp[mask]))
+        self.assertTrue(np.all(ramp[~mask] - ramp[last_kept[~mask]] <= 0.05))
+
+        self.assertEqual({}, parse_params(''))
+        self.assertEqual({'tolerance': 0.05, 'time_gap': 5.0}, parse_params('tolerance=0.05, time_gap=5'))
+        with self.assertRaises(ValueError):
+            parse_params('tolerance=0.05,window=3')
+        with self.assertRaises(ValueError):
+            parse_params('tolerance=small')
+
+        # The times are only used if there's a time gap to check
+        self.assertEqual([1, 5, 6, 7, 9], find_duplicates({'depth': {'z': z}}, False, tolerance=0.05).tolist())
+
+        source = {'depth': {'t': t, 'lat': t + 40.0, 'lon': t - 70.0, 'z': z}}
+        lineage = Lineage()
+        result = deduplicate_depth(source, 'tolerance=0.05,time_gap=5', lineage, False)
+        for name, values in (('t', t), ('lat', t + 40.0), ('lon', t - 70.0), ('z', z)):
+            np.testing.assert_array_equal(values[[1, 5, 6, 7, 9, 10]], result['depth'][name])
+        self.assertEqual('tolerance=0.05,time_gap=5', lineage.lineage[0]['parameters'])
+        self.assertEqual('Selected 6 non-duplicate depths from 11 in input.', lineage.lineage[0]['comment'])
+
+    def test_algo_dedup_bad_params(self):
+        # Parameters that can't be used are ignored with a warning, and noted in the lineage, rather than stopping
+        # the file from being processed
+        with open(Path(self.fixtures_dir, 'test-algo-dedup.wibl'), 'rb') as f:
+            packets = [lf.AlgorithmRequest(name='deduplicate', params='tolerance=small,window=3')
+                       if isinstance(pkt, lf.AlgorithmRequest) else pkt
+                       for pkt in lf.PacketFactory(f).iter_packets()]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            local_file = str(Path(tmpdir, 'test-algo-dedup-bad-params.wibl'))
+            Path(local_file).write_bytes(serialise_packets(packets))
+            lineage = Lineage()
+            with self.assertLogs(logger, 'WARNING') as logs:
+                source_data = ts.time_interpolation(local_file, lineage, 1 << 32)
+            self.assertEqual(2, len(logs.output))
+            self.assertEqual(234, len(source_data['depth']['z']))
+            self.assertEqual('tolerance=small,window=3', lineage.lineage[0]['parameters'])
+            self.assertEqual("Selected 234 non-duplicate depths from 277 in input. Ignored parameters: "
+                             "Value 'small' for parameter 'tolerance' of algorithm deduplicate is not a number. "
+                             "Unknown parameter 'window' for algorithm deduplicate.", lineage.lineage[0]['comment'])
+
+            result, = ts.time_interpolation_many([local_file], 1 << 32)
+            self.assertIsNone(result.error)
+            self.assertEqual(234, len(result.data['depth']['z']))
+
     def test_algo_unknown(self):
         # Initialize
         config_file = Path(self.fixtures_dir, 'configure.local.json')
@@ -0,0 +1,150 @@
+import os
+import tempfile
+import unittest
+from collections.abc import Mapping
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import xmlrunner
+
+from wibl import config_logger_service
+from wibl.core import Lineage
+import wibl.core.timestamping as ts
+from wibl.core.cache import InterpolationCache
+from wibl.simulator.data import DataGenerator, Engine, CLOCKS_PER_SEC
+from wibl.simulator.data.writer import MemoryWriter
+
+from tests.fixtures import sample_packets, serialise_packets
+
+logger = config_logger_service()
+
+
+class TestInterpolationCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.fixtures_dir = Path(Path(__file__).parent.parent, 'data')
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmp_dir.name, 'cache')
+        engine = Engine(DataGenerator())
+        writer = MemoryWriter('UNHJHC-wibl-1', 'Test Platform')
+        now = 0
+        while now < 120 * CLOCKS_PER_SEC:
+            now = engine.step_engine(writer)
+        self.simulated = str(Path(self.tmp_dir.name, 'simulated.wibl'))
+        Path(self.simulated).write_bytes(writer.getvalue())
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def assertSameData(self, expected, result):
+        self.assertEqual(expected.keys(), result.keys())
+        for key in expected:
+            if isinstance(expected[key], Mapping):
+                self.assertSameData(expected[key], result[key])
+            elif isinstance(expected[key], np.ndarray):
+                np.testing.assert_array_equal(expected[key], result[key])
+                self.assertEqual(expected[key].dtype, result[key].dtype)
+            else:
+                self.assertEqual(expected[key], result[key])
+
+    def test_hit_and_miss(self):
+        cache = InterpolationCache(self.cache_dir, 1 << 30)
+        for filename in (self.simulated, str(Path(self.fixtures_dir, 'test-algo-dedup.wibl'))):
+            with self.subTest(filename=Path(filename).name):
+                lineage = Lineage()
+                expected = ts.time_interpolation(filename, lineage, 1 << 32, channels=['depth', 'cog'])
+                for _ in range(2):
+                    cached_lineage = Lineage()
+                    result = cache.time_interpolation(filename, cached_lineage, 1 << 32, channels=['depth', 'cog'])
+                    self.assertSameData(expected, result)
+                    # Hits and misses give the same type of output
+                    self.assertIs(dict, type(result['depth']))
+                    self.assertEqual([e['name'] for e in lineage.lineage],
+                                     [e['name'] for e in cached_lineage.lineage])
+        self.assertEqual((2, 2), (cache.hits, cache.misses))
+
+        # Repeat processing doesn't touch the file beyond hashing it
+        with mock.patch.object(ts, 'time_interpolation') as interpolation:
+            InterpolationCache(self.cache_dir, 1 << 30).time_interpolation(self.simulated, Lineage(), 1 << 32,
+                                                                           channels=['depth', 'cog'], verbose=True)
+            interpolation.assert_not_called()
+
+        # Exceptions are passed through, and nothing is cached
+        no_time = str(Path(self.tmp_dir.name, 'no-time.wibl'))
+        Path(no_time).write_bytes(serialise_packets([sample_packets()['Depth']]))
+        with self.assertRaises(ts.NoTimeSource):
+            cache.time_interpolation(no_time, Lineage(), 1 << 32)
+        self.assertEqual(2, len(list(self.cache_dir.glob('*.npz'))))
+
+    def test_key(self):
+        cache = InterpolationCache(self.cache_dir, 1 << 30)
+        key = cache.key(self.simulated, 1 << 32)
+        self.assertEqual(key, cache.key(self.simulated, 1 << 32, verbose=True, streaming=True))
+        self.assertEqual(key, cache.key(self.simulated, 1 << 32, channels=None, process_algorithms=True))
+        self.assertNotEqual(key, cache.key(self.simulated, 1 << 16))
+        self.assertNotEqual(key, cache.key(self.simulated, 1 << 32, channels=['depth']))
+        self.assertNotEqual(key, cache.key(self.simulated, 1 << 32, process_algorithms=False))
+        with mock.patch('wibl.core.cache.wiblversion', '0.0.0'):
+            self.assertNotEqual(key, cache.key(self.simulated, 1 << 32))
+        copy = str(Path(self.tmp_dir.name, 'copy.wibl'))
+        Path(copy).write_bytes(Path(self.simulated).read_bytes())
+        self.assertEqual(key, cache.key(copy, 1 << 32))
+        with open(copy, 'ab') as f:
+            f.write(b'\0')
+        self.assertNotEqual(key, cache.key(copy, 1 << 32))
+
+    def test_eviction(self):
+        cache = InterpolationCache(self.cache_dir, 1 << 30)
+        channels = [['depth'], ['depth', 'cog'], ['depth', 'attitude']]
+        for n, requested in enumerate(channels):
+            cache.time_interpolation(self.simulated, Lineage(), 1 << 32, channels=requested)
+            entry = Path(self.cache_dir, cache.key(self.simulated, 1 << 32, channels=requested) + '.npz')
+            os.utime(entry, (1000.0 + n, 1000.0 + n))
+        sizes = {tuple(requested): Path(self.cache_dir, cache.key(self.simulated, 1 << 32, channels=requested) +
+                                        '.npz').stat().st_size for requested in channels}
+        self.assertEqual(sum(sizes.values()), cache.size())
+
+        # Using the oldest entry makes it the most recently used, so the next oldest is evicted
+        cache.time_interpolation(self.simulated, Lineage(), 1 << 32, channels=['depth'])
+        cache.max_bytes = cache.size() - 1
+        cache.time_interpolation(self.simulated, Lineage(), 1 << 32, channels=['depth', 'heading'])
+        remaining = {path.name for path in self.cache_dir.glob('*.npz')}
+        self.assertNotIn(cache.key(self.simulated, 1 << 32, channels=['depth', 'cog']) + '.npz', remaining)
+        self.assertIn(cache.key(self.simulated, 1 << 32, channels=['depth']) + '.npz', remaining)
+        self.assertLessEqual(cache.size(), cache.max_bytes)
+        self.assertGreaterEqual(cache.evictions, 1)
+        self.assertEqual((1, 4), (cache.hits, cache.misses))
+
+    def test_unreadable_entry(self):
+        cache = InterpolationCache(self.cache_dir, 1 << 30)
+        entry = Path(self.cache_dir, cache.key(self.simulated, 1 << 32) + '.npz')
+        entry.write_bytes(b'not an archive')
+        result = cache.time_interpolation(self.simulated, Lineage(), 1 << 32)
+        self.assertEqual((0, 1), (cache.hits, cache.misses))
+        self.assertSameData(result, cache.time_interpolation(self.simulated, Lineage(), 1 << 32))
+        self.assertEqual(1, cache.hits)
+
+        # A truncated entry is removed, and replaced by the next miss
+        entry.write_bytes(entry.read_bytes()[:-100])
+        self.assertSameData(result, cache.time_interpolation(self.simulated, Lineage(), 1 << 32))
+        self.assertEqual((1, 2), (cache.hits, cache.misses))
+        self.assertSameData(result, cache.time_interpolation(self.simulated, Lineage(), 1 << 32))
+        self.assertEqual(2, cache.hits)
+
+    def test_write_failure(self):
+        cache = InterpolationCache(self.cache_dir, 1 << 30)
+        expected = ts.time_interpolation(self.simulated, Lineage(), 1 << 32)
+        with mock.patch('numpy.savez', side_effect=OSError(28, 'No space left on device')):
+            result = cache.time_interpolation(self.simulated, Lineage(), 1 << 32)
+        self.assertSameData(expected, result)
+        self.assertEqual([], list(self.cache_dir.iterdir()))
+        with mock.patch('tempfile.mkstemp', side_effect=PermissionError(13, 'Permission denied')):
+            self.assertSameData(expected, cache.time_interpolation(self.simulated, Lineage(), 1 << 32))
+        self.assertEqual((0, 2), (cache.hits, cache.misses))
+
+
+if __name__ == '__main__':
+    unittest.main(
+        testRunner=xmlrunner.XMLTestRunner(output='test-reports'),
+        failfast=False, buffer=False, catchbreak=False
+    )
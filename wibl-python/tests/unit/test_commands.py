@@ -0,0 +1,82 @@
+import gzip
+import tempfile
+import unittest
+from pathlib import Path
+
+import xmlrunner
+from click.testing import CliRunner
+
+from wibl import config_logger_service
+import wibl.core.logger_file as lf
+from wibl.command.edit_wibl_file import editwibl
+from wibl.command.parse_wibl_file import parsewibl
+from wibl.command.repack_wibl_file import repack
+
+from tests.fixtures import sample_packets, serialise_packets
+
+logger = config_logger_service()
+
+
+class TestCommands(unittest.TestCase):
+    def setUp(self) -> None:
+        packets = sample_packets()
+        self.timed = [lf.Depth(date=19000, timestamp=float(n), elapsed_time=1000 * n, depth=float(n), offset=0.0,
+                               range=200.0) for n in range(1, 11)]
+        self.header = [packets['SerialiserVersion'], packets['Metadata']]
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.input = Path(self.tmpdir.name, 'input.wibl')
+        self.input.write_bytes(serialise_packets(self.header + self.timed))
+        self.output = Path(self.tmpdir.name, 'output.wibl')
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_editwibl_metadata(self):
+        result = CliRunner().invoke(editwibl, ['-u', 'new-logger', '-s', 'New Ship', str(self.input),
+                                               str(self.output)])
+        self.assertEqual(0, result.exit_code, result.output)
+        metadata = lf.Metadata(logger='new-logger', shipname='New Ship')
+        self.assertEqual(serialise_packets([self.header[0], metadata] + self.timed), self.output.read_bytes())
+
+    def test_editwibl_window(self):
+        result = CliRunner().invoke(editwibl, ['--start', '4000', '--end', '6000', '--no-save-index',
+                                               str(self.input), str(self.output)])
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual(serialise_packets(self.header + self.timed[3:6]), self.output.read_bytes())
+        self.assertFalse(Path(lf.index_filename(self.input)).exists())
+
+    def test_parsewibl_selection(self):
+        result = CliRunner().invoke(parsewibl, ['-t', 'Depth', '--start', '9000', str(self.input)])
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertIn('Found 2 packets total', result.output)
+        self.assertTrue(Path(lf.index_filename(self.input)).exists())
+
+    def test_parsewibl_compressed(self):
+        compressed = Path(self.tmpdir.name, 'input.wibl.gz')
+        compressed.write_bytes(gzip.compress(self.input.read_bytes()))
+        result = CliRunner().invoke(parsewibl, ['-s', str(compressed)])
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertIn('Found 12 packets total', result.output)
+        result = CliRunner().invoke(parsewibl, ['-t', 'Depth', '--start', '9000', str(compressed)])
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertIn('Found 2 packets total', result.output)
+        self.assertFalse(Path(lf.index_filename(compressed)).exists())
+
+    def test_repack(self):
+        container = Path(self.tmpdir.name, 'input.wblk')
+        result = CliRunner().invoke(repack, ['-b', '1', str(self.input), str(container)])
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertIn('Wrote 12 packets', result.output)
+        result = CliRunner().invoke(parsewibl, ['-t', 'Depth', '--start', '9000', str(container)])
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertIn('Found 2 packets total', result.output)
+        result = CliRunner().invoke(repack, ['--unpack', str(container), str(self.output)])
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual(self.input.read_bytes(), self.output.read_bytes())
+
+
+if __name__ == '__main__':
+    unittest.main(
+        testRunner=xmlrunner.XMLTestRunner(output='test-reports'),
+        failfast=False, buffer=False, catchbreak=False
+    )
@@ -65,6 +65,13 @@ class TestConfig(unittest.TestCase):
         self.assertIsInstance(sub_config, Path)
         self.assertEqual(dummy_config_file, str(sub_config))
 
+    def test_read_config_defaults(self):
+        cfg = config.read_config(Path(Path(__file__).parent.parent, 'data', 'configure.local.json'))
+        self.assertEqual('', cfg['cache_dir'])
+        self.assertEqual(1024, cfg['cache_size_mb'])
+        self.assertFalse(cfg['profile'])
+        self.assertFalse(cfg['profile_memory'])
+
 
 if __name__ == '__main__':
     unittest.main(
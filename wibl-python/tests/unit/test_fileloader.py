@@ -0,0 +1,125 @@
+import pickle
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import xmlrunner
+
+from wibl import config_logger_service
+from wibl.core import Lineage
+from wibl.core.fileloader import load_file, IncrementalReader, StreamingUnavailable, TimeSource, \
+    _bracket_elapsed_times
+import wibl.core.logger_file as lf
+
+from tests.fixtures import elapsed_fixup_packets, nmea_sentence, serialise_packets
+
+logger = config_logger_service()
+
+
+def bracket_elapsed_times_loop(elapsed):
+    """Reference implementation of the bracketing of elapsed times, as a loop over the packets."""
+    elapsed = list(elapsed)
+    oldest_position = None
+    for n in range(len(elapsed)):
+        if elapsed[n] == 0:
+            if n > 0 and elapsed[n-1] > 0:
+                oldest_position = n - 1
+        elif oldest_position is not None:
+            target = (elapsed[oldest_position] + elapsed[n])/2.0
+            for i in range(oldest_position + 1, n):
+                elapsed[i] = target
+            oldest_position = None
+    return [None if e == 0 else e for e in elapsed]
+
+
+class TestFileLoader(unittest.TestCase):
+    def setUp(self) -> None:
+        self.fixtures_dir = Path(Path(__file__).parent.parent, 'data')
+
+    def assertSameLoad(self, expected, result):
+        stats, timesource, packets, algorithms = expected
+        r_stats, r_timesource, r_packets, r_algorithms = result
+        self.assertEqual(str(stats), str(r_stats))
+        self.assertEqual(timesource, r_timesource)
+        self.assertEqual(algorithms, r_algorithms)
+        self.assertEqual(len(packets), len(r_packets))
+        for pkt, r_pkt in zip(packets, r_packets):
+            self.assertIs(type(pkt), type(r_pkt))
+            self.assertEqual(str(pkt), str(r_pkt))
+
+    def test_load_file_elapsed_fixup(self):
+        zda = nmea_sentence('GPZDA,120000.00,01,05,2024,00,00')
+        dbt = nmea_sentence('SDDBT,32.8,f,10.00,M,5.5,F')
+        packets = [
+            lf.SerialString(elapsed_time=100, payload=zda),
+            lf.SerialString(elapsed_time=0, payload=dbt),
+            lf.SerialString(elapsed_time=0, payload=dbt),
+            lf.SerialString(elapsed_time=300, payload=zda),
+            lf.SerialString(elapsed_time=0, payload=dbt)
+        ]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = str(Path(tmpdir, 'fixup.wibl'))
+            Path(filename).write_bytes(serialise_packets(packets))
+            _, timesource, result, _ = load_file(filename, Lineage(), False, 10)
+        self.assertEqual(TimeSource.Time_ZDA, timesource)
+        # Bracketed packets get the mean of the neighbouring elapsed times; the trailing packet can't be bracketed
+        self.assertEqual([100, 200.0, 200.0, 300, None], [pkt.elapsed for pkt in result])
+
+    def test_load_file_elapsed_fixup_mapped(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = str(Path(tmpdir, 'fixup.wibl'))
+            Path(filename).write_bytes(serialise_packets(elapsed_fixup_packets(300)))
+            serial = load_file(filename, Lineage(), False, 10)
+            mapped = load_file(filename, Lineage(), False, 10, memory_map=True)
+        # Memory-mapped packets are decoded lazily, so only the elapsed times are compared
+        elapsed = [pkt.elapsed for pkt in serial[2]]
+        self.assertNotIn(0, elapsed)
+        self.assertEqual([pkt.elapsed for pkt in mapped[2]], elapsed)
+
+    def test_incremental_reader(self):
+        rng = random.Random(7)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = str(Path(tmpdir, 'fixup.wibl'))
+            growing = str(Path(tmpdir, 'growing.wibl'))
+            data = serialise_packets(elapsed_fixup_packets(300))
+            Path(filename).write_bytes(data)
+            expected = load_file(filename, Lineage(), False, 10)
+
+            reader = IncrementalReader(False, 10)
+            packets = []
+            for n, cut in enumerate(sorted(rng.sample(range(len(data)), 30)) + [len(data)]):
+                Path(growing).write_bytes(data[:cut])
+                if n % 10 == 5:
+                    reader = pickle.loads(pickle.dumps(reader))
+                packets += reader.read(growing)
+            packets += reader.finish()
+            self.assertSameLoad(expected, (reader.stats, reader.timesource, packets, expected[3]))
+
+            Path(growing).write_bytes(b'\x1f\x8b' + data)
+            with self.assertRaises(StreamingUnavailable):
+                IncrementalReader(False, 10).read(growing)
+
+    def test_bracket_elapsed_times(self):
+        rng = random.Random(42)
+        cases = [[], [0, 0], [5, 0, 0], [0, 0, 5], [-3, 0, 3], [4, 0, -4], [1, 0, 2, 0, 0, 3, 0]]
+        for _ in range(500):
+            length = rng.randint(1, 40)
+            cases.append([0 if rng.random() < 0.6 else rng.choice([rng.randint(1, 10000), -rng.randint(1, 100),
+                                                                   rng.uniform(-10, 10)])
+                          for _ in range(length)])
+        for case in cases:
+            elapsed = np.array(case, dtype=np.float64)
+            zero_index, target = _bracket_elapsed_times(elapsed)
+            result = list(case)
+            for n, value in zip(zero_index, target):
+                result[n] = None if np.isnan(value) else value
+            self.assertEqual(bracket_elapsed_times_loop(case), result, f'elapsed times {case}')
+
+
+if __name__ == '__main__':
+    unittest.main(
+        testRunner=xmlrunner.XMLTestRunner(output='test-reports'),
+        failfast=False, buffer=False, catchbreak=False
+    )
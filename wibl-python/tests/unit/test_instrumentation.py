@@ -0,0 +1,132 @@
+import json
+import tempfile
+import tracemalloc
+import unittest
+from pathlib import Path
+
+import numpy as np
+import xmlrunner
+
+from wibl import config_logger_service
+from wibl.core import Lineage
+import wibl.core.instrumentation as instrumentation
+import wibl.core.timestamping as ts
+from wibl.simulator.data import DataGenerator, Engine, CLOCKS_PER_SEC
+from wibl.simulator.data.writer import MemoryWriter
+
+from tests.fixtures import elapsed_fixup_packets, serialise_packets
+
+logger = config_logger_service()
+
+
+@instrumentation.stage('decorated')
+def allocate(n: int) -> int:
+    return len(np.ones(n, dtype=np.uint8))
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_inactive(self):
+        self.assertIsNone(instrumentation.active_profile())
+        with instrumentation.stage('ignored') as s:
+            s.count(10)
+        self.assertEqual(5, allocate(5))
+        self.assertIsNone(instrumentation.active_profile())
+
+    def test_stages(self):
+        with instrumentation.profile() as profile:
+            self.assertIs(profile, instrumentation.active_profile())
+            with instrumentation.stage('outer') as outer:
+                outer.count(3)
+                for _ in range(2):
+                    allocate(1 << 20)
+                with instrumentation.stage('inner') as inner:
+                    inner.count(4)
+                    sum(range(100000))
+            with self.assertRaises(RuntimeError):
+                with instrumentation.stage('failed'):
+                    raise RuntimeError()
+        self.assertIsNone(instrumentation.active_profile())
+        self.assertFalse(tracemalloc.is_tracing())
+
+        self.assertEqual(['decorated', 'inner', 'outer', 'failed'], list(profile.stages))
+        stages = profile.to_dict()
+        self.assertEqual(2, stages['decorated']['calls'])
+        self.assertEqual(1, stages['outer']['calls'])
+        self.assertEqual((3, 4), (stages['outer']['items'], stages['inner']['items']))
+        self.assertGreaterEqual(stages['decorated']['peak_memory'], 1 << 20)
+        self.assertLess(stages['inner']['peak_memory'], 1 << 20)
+        # The memory and time of the inner stages are included in the outer stage
+        self.assertGreaterEqual(stages['outer']['peak_memory'], 1 << 20)
+        self.assertGreaterEqual(stages['outer']['wall_time'],
+                                stages['inner']['wall_time'] + stages['decorated']['wall_time'])
+        self.assertEqual(1, stages['failed']['calls'])
+        json.dumps(stages)
+        self.assertIn('decorated', str(profile))
+
+    def test_without_memory(self):
+        with instrumentation.profile(trace_memory=False) as profile:
+            allocate(10)
+        self.assertIsNone(profile.stages['decorated'].peak_memory)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_time_interpolation_stages(self):
+        engine = Engine(DataGenerator())
+        writer = MemoryWriter('UNHJHC-wibl-1', 'Test Platform')
+        now = 0
+        while now < 60 * CLOCKS_PER_SEC:
+            now = engine.step_engine(writer)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = str(Path(tmpdir, 'simulated.wibl'))
+            Path(filename).write_bytes(writer.getvalue())
+            with instrumentation.profile(trace_memory=False) as profile:
+                data = ts.time_interpolation(filename, Lineage(), 1 << 32)
+                data['depth']['t']
+        self.assertEqual(['read', 'algorithms.on_load', 'elapsed_fixup', 'interpolation_tables',
+                          'algorithms.after_time_interp', 'interpolation'], list(profile.stages))
+        self.assertGreater(profile.stages['read'].items, 0)
+        # All of the channels are interpolated together when the first is used
+        self.assertEqual(1, profile.stages['interpolation'].calls)
+        self.assertEqual(sum(len(data[name]['t']) for name in ts.DEFAULT_CHANNELS),
+                         profile.stages['interpolation'].items)
+
+    def test_streaming_elapsed_fixup_stage(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = str(Path(tmpdir, 'fixup.wibl'))
+            Path(filename).write_bytes(serialise_packets(elapsed_fixup_packets(120)))
+            runs = []
+            for streaming in (False, True):
+                with instrumentation.profile(trace_memory=False) as profile:
+                    ts.time_interpolation(filename, Lineage(), 1 << 32, streaming=streaming)
+                self.assertIn('elapsed_fixup', profile.stages)
+                runs.append((profile.stages['elapsed_fixup'].calls, profile.stages['elapsed_fixup'].items))
+        # Streaming fixes up the packets one at a time, but reports a single run of the stage over all of them
+        self.assertEqual(1, runs[0][0])
+        self.assertGreater(runs[0][1], 0)
+        self.assertEqual(runs[0], runs[1])
+
+    def test_split_stage(self):
+        split = instrumentation.split_stage('inactive')
+        with split:
+            pass
+        split.finish()
+        with instrumentation.profile(trace_memory=False) as profile:
+            split = instrumentation.split_stage('split')
+            for _ in range(3):
+                with split:
+                    with instrumentation.stage('between'):
+                        pass
+                split.count(2)
+            self.assertNotIn('split', profile.stages)
+            split.finish()
+            split.finish()
+        self.assertEqual(['between', 'split'], list(profile.stages))
+        self.assertEqual(1, profile.stages['split'].calls)
+        self.assertEqual(6, profile.stages['split'].items)
+        self.assertGreaterEqual(profile.stages['split'].wall_time, 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main(
+        testRunner=xmlrunner.XMLTestRunner(output='test-reports'),
+        failfast=False, buffer=False, catchbreak=False
+    )
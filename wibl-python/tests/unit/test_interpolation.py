@@ -0,0 +1,132 @@
+import unittest
+
+import numpy as np
+import xmlrunner
+
+from wibl import config_logger_service
+from wibl.core.interpolation import InterpTable, NoSuchVariable, NotEnoughValues
+
+logger = config_logger_service()
+
+
+class TestInterpTable(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(17)
+        self.ind = np.cumsum(rng.uniform(0.5, 2.0, 5000))
+        self.x = rng.uniform(self.ind[0] - 10, self.ind[-1] + 10, 1000)
+        self.y = rng.normal(size=5000)
+        self.z = rng.normal(size=5000)
+
+    def test_add_points(self):
+        table = InterpTable(['y', 'z'])
+        for n, (i, y, z) in enumerate(zip(self.ind, self.y, self.z)):
+            table.add_points(i, ['y', 'z'], [y, z])
+            if n == 10:
+                # Arrays seen part-way through don't change as more points are added
+                partial = table.var('y')
+        self.assertEqual(len(self.ind), table.n_points())
+        np.testing.assert_array_equal(self.y[:11], partial)
+        np.testing.assert_array_equal(self.ind, table.ind())
+        np.testing.assert_array_equal(self.z, table.var('z'))
+        y, z = table.interpolate(['y', 'z'], self.x)
+        np.testing.assert_array_equal(np.interp(self.x, self.ind, self.y), y)
+        np.testing.assert_array_equal(np.interp(self.x, self.ind, self.z), z)
+
+    def test_extend(self):
+        table = InterpTable(['y', 'z'])
+        table.add_points(self.ind[0], ['y', 'z'], [self.y[0], self.z[0]])
+        table.extend(self.ind[1:100], {'y': self.y[1:100], 'z': self.z[1:100]})
+        table.extend(self.ind[100:].astype(np.float32).astype(np.float64).tolist(),
+                     {'y': self.y[100:], 'z': self.z[100:]})
+        reference = InterpTable(['y', 'z'])
+        for i, y, z in zip(self.ind[:100], self.y[:100], self.z[:100]):
+            reference.add_points(i, ['y', 'z'], [y, z])
+        for i, y, z in zip(self.ind[100:].astype(np.float32), self.y[100:], self.z[100:]):
+            reference.add_points(float(i), ['y', 'z'], [y, z])
+        self.assertEqual(reference.n_points(), table.n_points())
+        for var in ('y', 'z'):
+            np.testing.assert_array_equal(reference.var(var), table.var(var))
+        np.testing.assert_array_equal(reference.ind(), table.ind())
+
+    def test_cached_arrays(self):
+        table = InterpTable(['y'])
+        table.extend(self.ind[:10], {'y': self.y[:10]})
+        y = table.var('y')
+        self.assertIs(y, table.var('y'))
+        with self.assertRaises(ValueError):
+            y[0] = 0.0
+        table.add_point(self.ind[10], 'y', self.y[10])
+        self.assertIsNot(y, table.var('y'))
+        self.assertEqual(10, len(y))
+        np.testing.assert_array_equal(self.y[:11], table.var('y'))
+
+    def test_discard(self):
+        table = InterpTable(['y', 'z'])
+        table.extend(self.ind[:100], {'y': self.y[:100], 'z': self.z[:100]})
+        y = table.var('y')
+        table.discard(0)
+        self.assertIs(y, table.var('y'))
+        table.discard(40)
+        self.assertEqual(60, table.n_points())
+        np.testing.assert_array_equal(self.ind[40:100], table.ind())
+        np.testing.assert_array_equal(self.y[40:100], table.var('y'))
+        np.testing.assert_array_equal(self.z[40:100], table.var('z'))
+        table.discard(100)
+        self.assertEqual(0, table.n_points())
+
+    def test_interpolate_many(self):
+        table = InterpTable(['y', 'z'])
+        table.extend(self.ind, {'y': self.y, 'z': self.z})
+        # Include points exactly on, and either side of, the table's points, and an empty set of points
+        xs = [self.x[:300], np.empty(0), np.concatenate((self.ind[::7], self.x[300:])), self.ind[[0, -1]]]
+        result = table.interpolate_many(['y', 'z'], xs)
+        self.assertEqual(len(xs), len(result))
+        for x, values in zip(xs, result):
+            self.assertEqual(2, len(values))
+            for expected, actual in zip(table.interpolate(['y', 'z'], x), values):
+                np.testing.assert_array_equal(expected, actual)
+        self.assertEqual([[], []], [values.tolist() for values in table.interpolate_many(['y', 'z'], [[]])[0]])
+
+    def test_interpolate_many_special_cases(self):
+        # Repeated independent variable values, non-finite values, NaN points, unsorted and single-point tables
+        # should all give the same as np.interp()
+        ind = np.repeat(self.ind[:100], 2)
+        y = np.repeat(self.y[:100], 2)
+        y[[10, 11, 50]] = [np.inf, -np.inf, np.nan]
+        x = np.concatenate((ind, np.linspace(ind[0] - 1, ind[-1] + 1, 500)))
+        unsorted = self.ind[:100].copy()
+        unsorted[[20, 60]] = unsorted[[60, 20]]
+        for ind, y, x in ((ind, y, x), (ind, y, np.append(x, np.nan)), (unsorted, self.y[:100], x),
+                          (self.ind[:1], self.y[:1], x)):
+            table = InterpTable(['y'])
+            table.extend(ind, {'y': y})
+            np.testing.assert_array_equal(np.interp(x, ind, y), table.interpolate_many(['y'], [x])[0][0])
+
+    def test_errors(self):
+        table = InterpTable(['y'])
+        with self.assertRaises(NoSuchVariable):
+            table.add_point(0.0, 'z', 1.0)
+        with self.assertRaises(NoSuchVariable):
+            table.add_points(0.0, ['y', 'z'], [1.0, 2.0])
+        with self.assertRaises(NotEnoughValues):
+            table.add_points(0.0, ['y'], [1.0, 2.0])
+        with self.assertRaises(NoSuchVariable):
+            table.extend(self.ind, {'z': self.z})
+        with self.assertRaises(NotEnoughValues):
+            table.extend(self.ind, {'y': self.y[:-1]})
+        with self.assertRaises(NoSuchVariable):
+            table.var('z')
+        with self.assertRaises(NoSuchVariable):
+            table.interpolate(['z'], self.x)
+        with self.assertRaises(NoSuchVariable):
+            table.interpolate_many(['z'], [self.x])
+        # Failed calls don't leave partial data behind
+        self.assertEqual(0, table.n_points())
+        self.assertEqual(0, len(table.var('y')))
+
+
+if __name__ == '__main__':
+    unittest.main(
+        testRunner=xmlrunner.XMLTestRunner(output='test-reports'),
+        failfast=False, buffer=False, catchbreak=False
+    )
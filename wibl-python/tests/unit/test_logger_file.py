@@ -1,13 +1,43 @@
+import copy
+import gzip
+import io
+import lzma
+import pickle
+import random
+import struct
+import tempfile
+import tracemalloc
 import unittest
+from pathlib import Path
 
+import numpy as np
 import xmlrunner
 
 from wibl import config_logger_service
+from wibl.core import Lineage
 import wibl.core.logger_file as lf
+from wibl.core.fileloader import load_file
+from wibl.simulator.data import DataGenerator, Engine, CLOCKS_PER_SEC
+from wibl.simulator.data.writer import MemoryWriter
+
+from tests.fixtures import sample_packets, serialise_packets
 
 logger = config_logger_service()
 
 
+def unwrap_elapsed_loop(elapsed, quantum):
+    """Reference implementation of the unwrapping of elapsed times, as the loop in time_interpolation() used to be."""
+    elapsed_offset = 0
+    last_elapsed = 0
+    rtn = []
+    for e in elapsed:
+        if e < last_elapsed:
+            elapsed_offset = elapsed_offset + quantum
+        last_elapsed = e
+        rtn.append(e + elapsed_offset)
+    return rtn
+
+
 class TestLoggerFile(unittest.TestCase):
     def test_temp_to_celsius(self):
         self.assertAlmostEqual(-273.15, lf.temp_to_celsius(0))
@@ -21,6 +51,425 @@ class TestLoggerFile(unittest.TestCase):
         self.assertAlmostEqual(171.88733854, lf.angle_to_degs(3))
         self.assertAlmostEqual(401.07045659, lf.angle_to_degs(7))
 
+    def test_packet_registry(self):
+        # Every packet type in the file format must be decodable through the registry
+        for pkt_type in lf.PacketTypes:
+            self.assertIn(pkt_type.value, lf.PACKET_REGISTRY)
+            packet_class = lf.PACKET_REGISTRY[pkt_type.value]
+            if getattr(packet_class, 'layout', None) is not None:
+                self.assertIsInstance(packet_class.layout, struct.Struct)
+
+    def test_packet_factory_round_trip(self):
+        packets = sample_packets()
+        data = serialise_packets(list(packets.values()))
+        source = lf.PacketFactory(io.BytesIO(data), strict_mode=True)
+        decoded = []
+        while source.has_more():
+            pkt = source.next_packet()
+            if pkt is not None:
+                decoded.append(pkt)
+        self.assertEqual(len(packets), len(decoded))
+        for original, pkt in zip(packets.values(), decoded):
+            self.assertIs(type(original), type(pkt))
+            self.assertEqual(original.payload(), pkt.payload())
+
+    def test_packet_factory_truncated_packet(self):
+        data = serialise_packets([sample_packets()['Metadata']])
+        source = lf.PacketFactory(io.BytesIO(data[:-4]), strict_mode=True)
+        with self.assertRaises(lf.PacketTranscriptionError):
+            source.next_packet()
+
+    def test_iter_packets_by_type(self):
+        packets = sample_packets()
+        data = serialise_packets(list(packets.values()) * 2)
+        wanted = {lf.Depth, lf.PacketTypes.Motion, lf.PacketTypes.JSONMetadata.value}
+        expected = ['Depth', 'Motion', 'JSONMetadata'] * 2
+
+        class UnseekableBytesIO(io.BytesIO):
+            def seekable(self):
+                return False
+
+        for stream in (io.BytesIO(data), UnseekableBytesIO(data)):
+            source = lf.PacketFactory(stream, strict_mode=True)
+            selected = list(source.iter_packets(wanted))
+            self.assertEqual(expected, [p.name() for p in selected])
+            self.assertEqual(2 * len(packets), source.packets_read)
+            self.assertEqual(packets['Depth'].payload(), selected[0].payload())
+        self.assertEqual(2 * len(packets), len(list(lf.PacketFactory(io.BytesIO(data)).iter_packets())))
+
+        with tempfile.TemporaryFile() as file:
+            file.write(data)
+            file.flush()
+            with lf.MappedPacketReader(file, strict_mode=True) as source:
+                selected = list(source.iter_packets(wanted))
+                self.assertEqual(expected, [p.name() for p in selected])
+                self.assertEqual(2 * len(packets), source.packets_read)
+                self.assertEqual(packets['Motion'].payload(), selected[1].payload())
+
+    def test_packet_factory_compressed(self):
+        packets = sample_packets()
+        data = serialise_packets(list(packets.values()))
+        compressors = {'gzip': gzip.compress, 'xz': lzma.compress}
+        if lf.zstandard is not None:
+            compressors['zstd'] = lf.zstandard.ZstdCompressor().compress
+        self.assertIsNone(lf.compression_format(io.BytesIO(data)))
+        for name, compress in compressors.items():
+            stream = io.BytesIO(compress(data))
+            self.assertEqual(name, lf.compression_format(stream))
+            self.assertEqual(0, stream.tell())
+            decoded = list(lf.PacketFactory(stream, strict_mode=True).iter_packets())
+            self.assertEqual([p.payload() for p in packets.values()], [p.payload() for p in decoded], name)
+            # Streams that can't seek are detected by peeking at their buffer
+            raw = io.BufferedReader(io.BytesIO(compress(data)))
+            raw.seekable = lambda: False
+            self.assertEqual(name, lf.compression_format(raw))
+            selected = list(lf.PacketFactory(raw, strict_mode=True).iter_packets([lf.Depth]))
+            self.assertEqual(['Depth'], [p.name() for p in selected])
+
+    def test_load_file_compressed(self):
+        local_file = Path(Path(__file__).parent.parent, 'data', 'test-algo-dedup.wibl')
+        stats, timesource, packets, algorithms = load_file(str(local_file), Lineage(), False, 10)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            compressed = Path(tmpdir, 'test-algo-dedup.wibl.xz')
+            compressed.write_bytes(lzma.compress(local_file.read_bytes()))
+            self.assertTrue(lf.is_compressed(compressed))
+            c_stats, c_timesource, c_packets, c_algorithms = load_file(str(compressed), Lineage(), False, 10,
+                                                                       memory_map=True)
+        self.assertEqual(str(stats), str(c_stats))
+        self.assertEqual(timesource, c_timesource)
+        self.assertEqual(algorithms, c_algorithms)
+        self.assertEqual([str(p) for p in packets], [str(p) for p in c_packets])
+
+    def test_block_container(self):
+        packets = sample_packets()
+        timed = [lf.Depth(date=19000, timestamp=float(n), elapsed_time=1000 * n, depth=float(n), offset=0.0,
+                          range=200.0) for n in range(1, 101)]
+        data = serialise_packets(list(packets.values()) + timed) + b'\x01\x02'
+        with tempfile.TemporaryDirectory() as tmpdir:
+            original = Path(tmpdir, 'original.wibl')
+            original.write_bytes(data)
+            for codec in lf.BLOCK_CODECS:
+                container = Path(tmpdir, f'container-{codec}.wibl')
+                index = lf.pack_file(original, container, codec=codec, block_size=512)
+                self.assertGreater(len(index), 2)
+                self.assertEqual(len(packets) + len(timed), index['packets'].sum())
+                self.assertEqual('block', lf.compression_format(io.BytesIO(container.read_bytes())))
+                # Lossless round trip, including the trailing partial packet
+                lf.unpack_file(container, Path(tmpdir, 'unpacked.wibl'))
+                self.assertEqual(data, Path(tmpdir, 'unpacked.wibl').read_bytes())
+                # The PacketFactory reads the container like the original file
+                with open(container, 'rb') as f:
+                    decoded = list(lf.PacketFactory(f, strict_mode=True).iter_packets())
+                self.assertEqual([p.payload() for p in list(packets.values()) + timed],
+                                 [p.payload() for p in decoded])
+                with lf.BlockReader(container, strict_mode=True) as reader:
+                    np.testing.assert_array_equal(index, reader.index)
+                    selected = reader.select(start=50000, end=52000)
+                    self.assertLess(len(selected), len(index))
+                    window = list(reader.packets([lf.Depth], start=50000, end=52000))
+                    self.assertEqual([50.0, 51.0, 52.0], [p.depth for p in window])
+                    self.assertEqual(data, b''.join(reader.read_blocks(range(len(index)), workers=2)))
+            # Corrupting a block is detected by the CRC check
+            corrupt = bytearray(container.read_bytes())
+            corrupt[int(index['offset'][1]) + 40] ^= 0xFF
+            container.write_bytes(bytes(corrupt))
+            with lf.BlockReader(container) as reader:
+                with self.assertRaises(lf.ContainerFormatError):
+                    reader.read_block(1)
+
+    def test_block_writer_packets(self):
+        packets = list(sample_packets().values())
+        out = io.BytesIO()
+        with lf.BlockWriter(out, block_size=256) as writer:
+            for pkt in packets:
+                writer.write_packet(pkt)
+        out.seek(0)
+        decoded = list(lf.PacketFactory(out, strict_mode=True).iter_packets())
+        self.assertEqual([p.payload() for p in packets], [p.payload() for p in decoded])
+
+    def test_resync(self):
+        packets = list(sample_packets().values())
+        rng = np.random.default_rng(42)
+        garbage = [rng.integers(0, 256, 37, dtype=np.uint8).tobytes(),
+                   struct.pack('<II', 3, 0x7FFFFFFF) + b'\xAA' * 20,    # Known ID, implausible length
+                   bytes(300),                                          # Zero-filled sectors
+                   b'\x05']                                             # Single inserted byte
+        data = b''
+        expected_skips = []
+        for n, pkt in enumerate(packets):
+            if n % 4 == 2:
+                junk = garbage[(n // 4) % len(garbage)]
+                expected_skips.append((len(data), len(data) + len(junk)))
+                data += junk
+            data += serialise_packets([pkt])
+        self.assertEqual(len(packets), len(list(lf.PacketFactory(io.BytesIO(serialise_packets(packets)),
+                                                                 resync=True).iter_packets())))
+
+        def check(source):
+            decoded = list(source.iter_packets())
+            self.assertEqual([p.payload() for p in packets], [p.payload() for p in decoded])
+            self.assertEqual(expected_skips, source.skipped)
+
+        check(lf.PacketFactory(io.BytesIO(data), strict_mode=True, resync=True))
+        check(lf.PacketFactory(io.BytesIO(gzip.compress(data)), strict_mode=True, resync=True))
+        with tempfile.TemporaryFile() as file:
+            file.write(data)
+            file.flush()
+            with lf.MappedPacketReader(file, strict_mode=True, resync=True) as source:
+                check(source)
+        # Without resynchronisation, the corrupt data derails the reader
+        self.assertLess(len(list(lf.PacketFactory(io.BytesIO(data)).iter_packets())), len(packets))
+
+    def test_find_packet_header(self):
+        pkt = serialise_packets([lf.Depth(date=19000, timestamp=1.0, elapsed_time=1000, depth=1.0, offset=0.0,
+                                          range=200.0)])
+        self.assertEqual(5, lf.find_packet_header(b'\x01' * 5 + pkt + pkt))
+        self.assertIsNone(lf.find_packet_header(bytes(64)))
+        # A plausible header that is not followed by another plausible header is rejected
+        fake = struct.pack('<II', 3, 38) + bytes(38) + b'\xFF' * 8
+        self.assertEqual(len(fake), lf.find_packet_header(fake + pkt + pkt))
+        self.assertTrue(lf.plausible_header(3, 38))
+        self.assertFalse(lf.plausible_header(3, 39))
+        self.assertFalse(lf.plausible_header(99, 38))
+
+    def test_load_file_resync(self):
+        local_file = Path(Path(__file__).parent.parent, 'data', 'test-algo-dedup.wibl')
+        stats, timesource, packets, algorithms = load_file(str(local_file), Lineage(), False, 10)
+        data = local_file.read_bytes()
+        offsets = lf.build_index(local_file)['offset']
+        cut = int(offsets[len(offsets) // 2])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            damaged = Path(tmpdir, 'damaged.wibl')
+            damaged.write_bytes(data[:cut] + b'\xde\xad\xbe\xef' * 100 + data[cut:])
+            r_stats, r_timesource, r_packets, r_algorithms = load_file(str(damaged), Lineage(), False, 10,
+                                                                       resync=True)
+        self.assertEqual([(cut, cut + 400)], r_stats.skipped)
+        self.assertEqual([str(p) for p in packets], [str(p) for p in r_packets])
+
+    def test_mapped_reader_round_trip(self):
+        packets = sample_packets()
+        data = serialise_packets(list(packets.values()))
+        with tempfile.TemporaryFile() as file:
+            file.write(data)
+            file.flush()
+            with lf.MappedPacketReader(file, strict_mode=True) as source:
+                views = list(source)
+                self.assertEqual(len(packets), len(views))
+                for original, view in zip(packets.values(), views):
+                    self.assertIsInstance(view, type(original))
+                    self.assertEqual(original.id(), view.id())
+                    self.assertEqual(original.name(), view.name())
+                    # Elapsed time comes straight from the payload, without decoding the packet
+                    self.assertEqual(original.elapsed, view.elapsed)
+                    self.assertFalse(view.is_decoded())
+                    self.assertEqual(original.payload(), view.raw_payload())
+                    self.assertEqual(original.payload(), view.payload())
+                    self.assertTrue(view.is_decoded())
+                depth = views[list(packets).index('Depth')]
+                self.assertEqual(12.5, depth.depth)
+                depth.elapsed = 42
+                self.assertEqual(42, depth.elapsed)
+
+    def test_mapped_reader_copy_and_pickle(self):
+        packets = sample_packets()
+        with tempfile.TemporaryFile() as file:
+            file.write(serialise_packets(list(packets.values())))
+            file.flush()
+            with lf.MappedPacketReader(file, strict_mode=True) as source:
+                views = list(source)
+            for original, view in zip(packets.values(), views):
+                for duplicate in (copy.copy(view), copy.deepcopy(view), pickle.loads(pickle.dumps(view))):
+                    # The copies are the decoded packets, independent of the memory map
+                    self.assertIs(type(original), type(duplicate))
+                    self.assertEqual(original.payload(), duplicate.payload())
+                    self.assertEqual(original.elapsed, duplicate.elapsed)
+
+    def test_mapped_reader_truncated_packet(self):
+        data = serialise_packets([sample_packets()['Metadata']])
+        with tempfile.TemporaryFile() as file:
+            file.write(data[:-4])
+            file.flush()
+            with lf.MappedPacketReader(file, strict_mode=True) as source:
+                with self.assertRaises(lf.PacketTranscriptionError):
+                    source.next_packet()
+
+    def test_load_file_memory_map(self):
+        local_file = str(Path(Path(__file__).parent.parent, 'data', 'test-algo-dedup.wibl'))
+        stats, timesource, packets, algorithms = load_file(local_file, Lineage(), False, 10)
+        m_stats, m_timesource, m_packets, m_algorithms = load_file(local_file, Lineage(), False, 10,
+                                                                   memory_map=True)
+        self.assertEqual(str(stats), str(m_stats))
+        self.assertEqual(timesource, m_timesource)
+        self.assertEqual(algorithms, m_algorithms)
+        self.assertEqual(len(packets), len(m_packets))
+        for pkt, view in zip(packets, m_packets):
+            self.assertIs(type(pkt), view.__class__)
+            self.assertEqual(pkt.elapsed, view.elapsed)
+            self.assertEqual(str(pkt), str(view))
+
+    def test_load_columnar(self):
+        packets = list(sample_packets().values())
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = Path(tmpdir, 'columnar.wibl')
+            filename.write_bytes(serialise_packets(packets * 3))
+            columns = lf.load_columnar(filename)
+        index = columns['index']
+        self.assertEqual(3 * len(packets), len(index))
+        np.testing.assert_array_equal(np.tile([p.id() for p in packets], 3), index['id'])
+        np.testing.assert_array_equal(np.tile([p.elapsed for p in packets], 3), index['elapsed'])
+        for pkt in packets:
+            packet_class = type(pkt)
+            if getattr(packet_class, 'layout_fields', None) is None:
+                self.assertNotIn(lf.PacketTypes(pkt.id()).name, columns)
+                continue
+            table = columns[lf.PacketTypes(pkt.id()).name]
+            self.assertEqual(3, len(table))
+            # Each row must re-serialise to the same payload as the packet object
+            for row in table:
+                self.assertEqual(pkt.payload(), packet_class.layout.pack(*row.tolist()))
+
+    def test_load_columnar_matches_factory(self):
+        local_file = str(Path(Path(__file__).parent.parent, 'data', 'test-algo-dedup.wibl'))
+        columns = lf.load_columnar(local_file)
+        with open(local_file, 'rb') as file:
+            source = lf.PacketFactory(file, strict_mode=True)
+            depths = []
+            while source.has_more():
+                pkt = source.next_packet()
+                if isinstance(pkt, lf.Depth):
+                    depths.append((pkt.elapsed, pkt.depth))
+        depth = columns['Depth']
+        np.testing.assert_array_equal([d[0] for d in depths], depth['elapsed'])
+        np.testing.assert_array_equal([d[1] for d in depths], depth['depth'])
+
+    def test_unwrap_elapsed(self):
+        rng = random.Random(16)
+        for _ in range(500):
+            quantum = rng.choice([10, 1000, 1 << 32])
+            length = rng.randint(0, 200)
+            if rng.random() < 0.5:
+                elapsed = np.array([rng.randrange(quantum) for _ in range(length)], dtype=np.uint32)
+            else:
+                elapsed = np.array([rng.uniform(0, quantum) for _ in range(length)])
+            expected = unwrap_elapsed_loop(elapsed.tolist(), quantum)
+            result = lf.unwrap_elapsed(elapsed, quantum)
+            self.assertEqual(np.int64 if elapsed.dtype == np.uint32 else np.float64, result.dtype)
+            self.assertEqual(expected, result.tolist())
+            # Unwrapping in blocks, carrying over the last elapsed time and offset, gives the same result
+            blocks = []
+            previous, offset = 0, 0
+            cuts = sorted(rng.sample(range(length + 1), min(length + 1, 5)))
+            for start, end in zip([0] + cuts, cuts + [length]):
+                offsets = lf.lap_offsets(elapsed[start:end], quantum, previous, offset)
+                if len(offsets) > 0:
+                    previous, offset = elapsed[end - 1], offsets[-1]
+                blocks += (elapsed[start:end] + offsets).tolist()
+            self.assertEqual(expected, blocks)
+        # Sequences that are already in order are not changed, and each decrease is a lap
+        np.testing.assert_array_equal([1, 2, 3], lf.unwrap_elapsed(np.array([1, 2, 3]), 10))
+        np.testing.assert_array_equal([5, 10, 12, 13, 21], lf.unwrap_elapsed(np.array([5, 10, 2, 3, 1]), 10))
+
+    def test_load_columnar_unwrapped(self):
+        packets = list(sample_packets().values()) * 5
+        rng = random.Random(16)
+        elapsed = 0
+        for pkt in packets:
+            if lf.has_elapsed_time(pkt.id()):
+                elapsed = (elapsed + rng.randint(1, 400)) % 1000
+                pkt.elapsed = elapsed
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = Path(tmpdir, 'columnar.wibl')
+            filename.write_bytes(serialise_packets(packets))
+            recorded = lf.load_columnar(filename)
+            columns = lf.load_columnar(filename, elapsed_time_quantum=1000)
+        has_elapsed = np.array([lf.has_elapsed_time(pkt.id()) for pkt in packets])
+        expected = np.zeros(len(packets), dtype=np.int64)
+        expected[has_elapsed] = unwrap_elapsed_loop(recorded['index']['elapsed'][has_elapsed].tolist(), 1000)
+        self.assertEqual(np.int64, columns['index'].dtype['elapsed'])
+        np.testing.assert_array_equal(expected, columns['index']['elapsed'])
+        np.testing.assert_array_equal(recorded['index']['offset'], columns['index']['offset'])
+        for name, table in recorded.items():
+            if name == 'index':
+                continue
+            selected = recorded['index']['id'] == lf.PacketTypes[name].value
+            np.testing.assert_array_equal(expected[selected], columns[name]['elapsed'])
+            for field in table.dtype.names:
+                if field != 'elapsed':
+                    np.testing.assert_array_equal(table[field], columns[name][field])
+
+    def test_packets_have_no_instance_dict(self):
+        for name, pkt in sample_packets().items():
+            self.assertFalse(hasattr(pkt, '__dict__'), f'{name} has a per-instance __dict__')
+            decoded = lf.PACKET_REGISTRY[pkt.id()](buffer=pkt.payload())
+            self.assertFalse(hasattr(decoded, '__dict__'), f'{name} has a per-instance __dict__')
+
+    def test_packet_memory_footprint(self):
+        # Simulate an hour of logging, and measure the memory used to hold all of the decoded packets; the
+        # packet mix (and therefore the cost per packet) is the same for a full day, which is projected from this.
+        engine = Engine(DataGenerator())
+        writer = MemoryWriter('UNHJHC-wibl-1', 'Test Platform')
+        now = 0
+        while now < 3600 * CLOCKS_PER_SEC:
+            now = engine.step_engine(writer)
+        data = writer.getvalue()
+
+        tracemalloc.start()
+        try:
+            start_size, _ = tracemalloc.get_traced_memory()
+            source = lf.PacketFactory(io.BytesIO(data))
+            packets = []
+            while source.has_more():
+                pkt = source.next_packet()
+                if pkt is not None:
+                    packets.append(pkt)
+            end_size, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        bytes_per_packet = (end_size - start_size) / len(packets)
+        logger.info(f'Decoded packets use {bytes_per_packet:.1f} bytes/packet; a simulated 24-hour file of '
+                    f'{24 * len(packets)} packets would use {24 * (end_size - start_size) / 1e6:.1f} MB')
+        # The footprint depends on the interpreter version, so it is only reported; what keeps it down is that
+        # none of the packets decoded carries a per-instance __dict__.
+        self.assertEqual(set(), {type(pkt).__name__ for pkt in packets if hasattr(pkt, '__dict__')})
+
+    def test_packet_index_sidecar(self):
+        packets = list(sample_packets().values())
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = Path(tmpdir, 'indexed.wibl')
+            filename.write_bytes(serialise_packets(packets))
+            self.assertIsNone(lf.read_index(filename))
+            index = lf.load_index(filename)
+            self.assertTrue(Path(lf.index_filename(filename)).exists())
+            np.testing.assert_array_equal(index, lf.read_index(filename))
+            np.testing.assert_array_equal([p.id() for p in packets], index['id'])
+            np.testing.assert_array_equal([p.elapsed for p in packets], index['elapsed'])
+            np.testing.assert_array_equal(index, lf.load_columnar(filename)['index'])
+            # Appending to the file makes the sidecar out of date
+            with open(filename, 'ab') as f:
+                packets[0].serialise(f)
+            self.assertIsNone(lf.read_index(filename))
+            self.assertEqual(len(packets) + 1, len(lf.load_index(filename)))
+
+    def test_indexed_reader_selection(self):
+        packets = sample_packets()
+        timed = [lf.Depth(date=19000, timestamp=float(n), elapsed_time=1000 * n, depth=float(n), offset=0.0,
+                          range=200.0) for n in range(1, 11)]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = Path(tmpdir, 'indexed.wibl')
+            filename.write_bytes(serialise_packets([packets['SerialiserVersion'], packets['Metadata']] + timed +
+                                                   [packets['JSONMetadata']]))
+            with lf.IndexedPacketReader(filename, strict_mode=True, save_sidecar=False) as reader:
+                metadata = list(reader.packets([lf.Metadata, lf.PacketTypes.JSONMetadata]))
+                self.assertEqual([lf.Metadata, lf.JSONMetadata], [type(p) for p in metadata])
+                window = list(reader.packets(start=3000, end=5000))
+                self.assertEqual([3.0, 4.0, 5.0], [p.depth for p in window])
+                self.assertEqual(3 + 3, np.count_nonzero(reader.mask(start=3000, end=5000, include_untimed=True)))
+                out = io.BytesIO()
+                reader.copy_packets(np.flatnonzero(reader.mask(end=2000, include_untimed=True)), out)
+            self.assertFalse(Path(lf.index_filename(filename)).exists())
+        self.assertEqual(serialise_packets([packets['SerialiserVersion'], packets['Metadata']] + timed[:2] +
+                                           [packets['JSONMetadata']]), out.getvalue())
+
 
 if __name__ == '__main__':
     unittest.main(
@@ -0,0 +1,153 @@
+import datetime as dt
+import io
+import random
+import unittest
+from pathlib import Path
+
+import pynmea2 as nmea
+import xmlrunner
+
+from wibl import config_logger_service
+import wibl.core.logger_file as lf
+from wibl.core import nmea0183
+from wibl.simulator.data import DataGenerator, Engine, CLOCKS_PER_SEC
+from wibl.simulator.data.writer import MemoryWriter
+
+from tests.fixtures import elapsed_fixup_packets, nmea_sentence
+
+logger = config_logger_service()
+
+
+def pynmea2_values(data: bytes):
+    """Reference extraction of the values used in timestamping, using pynmea2 as time_interpolation() used to."""
+    msg = nmea.parse(data.decode('UTF-8'))
+    if isinstance(msg, (nmea.ZDA, nmea.RMC)):
+        if msg.datestamp is not None and msg.timestamp is not None:
+            return type(msg).__name__, (dt.datetime.combine(msg.datestamp, msg.timestamp).timestamp(),)
+        return type(msg).__name__, (None,)
+    if isinstance(msg, (nmea.GGA, nmea.GLL)):
+        return type(msg).__name__, (msg.latitude, msg.longitude)
+    for cls, attributes in ((nmea.DBT, ('depth_meters',)), (nmea.DPT, ('depth',)), (nmea.HDT, ('heading',)),
+                            (nmea.MWD, ('direction_true', 'wind_speed_meters')), (nmea.MTW, ('temperature',))):
+        if isinstance(msg, cls):
+            values = [getattr(msg, attribute) for attribute in attributes]
+            if any(value is None for value in values):
+                return cls.__name__, (None,)*len(values)
+            return cls.__name__, tuple(float(value) for value in values)
+    return None
+
+
+def outcome(parser, data: bytes):
+    try:
+        return 'values', parser(data)
+    except Exception as e:
+        return 'exception', type(e).__name__
+
+
+# One of each of the sentences interpreted, in the formats in which they're commonly seen
+SENTENCES = [
+    'GPGGA,123519,4807.038,N,01131.000,E,1,08,0.9,545.4,M,46.9,M,,',
+    'GNGGA,001043.00,4404.14036,N,12118.85961,W,1,12,0.98,1113.0,M,-21.3,M,,',
+    'GPGLL,4916.45,N,12311.12,W,225444,A',
+    'GPGLL,3751.65,S,14507.36,E',
+    'GPZDA,201530.00,04,07,2002,00,00',
+    'GPZDA,000000,01,01,1970,,',
+    'GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W',
+    'GPRMC,235959.999,A,4807.038,S,01131.000,W,022.4,084.4,311268,003.1,W,A',
+    'SDDBT,12.3,f,3.75,M,2.05,F',
+    'SDDPT,3.6,0.0',
+    'SDDPT,-.5,',
+    'HEHDT,274.07,T',
+    'WIMWD,10.1,T,10.1,M,12,N,6.2,M',
+    'YXMTW,17.75,C',
+    'YXMTW,+4.,C'
+]
+
+# Sentences that the fast path has to hand over to pynmea2, or that have empty or broken fields
+EDGE_CASES = [
+    b'$GPZDA,,,,,,*48\r\n', b'$GPZDA,120000,31,02,2020,,\r\n', b'$GPZDA,246000,01,01,2020,,*7C',
+    b'$GPZDA,1200,01,01,2020,,*4B', b'$GPZDA,120000.,01,01,2020,,*65', b'$GPZDA,120000,1,1,20,,*72',
+    b'$GPRMC,,V,,,,,,,,,,N*53', b'$GPRMC,123519,A,,,,,,,xx0394,,*55', b'$GPRMC,123519,A,,,,,,,320394,,*6D',
+    b'$GPGGA,,,,,,0,,,,,,,,*66', b'$GPGGA,1,2,3,4*00', b'$GPGGA,123519,48.07,N,01131.000,E*4A',
+    b'$GPGLL,4916.45,n,12311.12,w*6F', b'$SDDBT,,f,,M,,F*35', b'$SDDBT,1e3,f,3e2,M,,F*3F', b'$HEHDT,nan,T*1C',
+    b'$WIMWD,10,T,,M,,N,,M*2D', b'$WIMWD,,T,,M,,N,1,M*2C', b'  $SDDPT,3.6,0.0*52', b'$SDDPT,3.6,0.0*5c\r\n',
+    b'$SDDPT,3.6,0.0*52 trailing', b'$SDDPT,3.6,0.0', b'$sddpt,3.6,0.0*12', b'$PGRMZ,93,f,3*21',
+    b'$pgrmz,93,f,3*21', b'$GPVTG,054.7,T,034.4,M,005.5,N,010.2,K*48', b'$GPXYZ,1,2,3*00', b'$GPDPT,1*2,3*00',
+    b'$GPHDT,\xc3\xa9,T*00', b'$GPHDT,\xff\xfe,T*00', b'$GPDPT,1,2*+F', b'$GPDPT,1,2* F'
+]
+
+
+class TestNMEA0183(unittest.TestCase):
+    def setUp(self) -> None:
+        self.fixtures_dir = Path(Path(__file__).parent.parent, 'data')
+
+    def corpus(self):
+        """All of the NMEA0183 strings in the sample data files, the simulator, and the test fixtures."""
+        strings = []
+        for filename in sorted(self.fixtures_dir.glob('*.wibl')):
+            with open(filename, 'rb') as f:
+                strings += [pkt.data for pkt in lf.PacketFactory(f).iter_packets()
+                            if isinstance(pkt, lf.SerialString)]
+        engine = Engine(DataGenerator())
+        writer = MemoryWriter('UNHJHC-wibl-1', 'Test Platform')
+        now = 0
+        while now < 600 * CLOCKS_PER_SEC:
+            now = engine.step_engine(writer)
+        strings += [pkt.data for pkt in lf.PacketFactory(io.BytesIO(writer.getvalue())).iter_packets()
+                    if isinstance(pkt, lf.SerialString)]
+        strings += [pkt.data for pkt in elapsed_fixup_packets(200) if isinstance(pkt, lf.SerialString)]
+        strings += [nmea_sentence(body) for body in SENTENCES]
+        return strings
+
+    def test_corpus_parity(self):
+        corpus = self.corpus()
+        self.assertGreater(len(corpus), 1000)
+        for data in corpus:
+            with self.subTest(data=data):
+                expected = outcome(pynmea2_values, data)
+                self.assertEqual(expected, outcome(nmea0183.parse, data))
+                # Only the deliberately broken sentences in the fixtures should need pynmea2
+                if expected[0] == 'values':
+                    self.assertTrue(nmea0183._parse_fast(data, nmea0183.SENTENCES)[0])
+
+    def test_edge_case_parity(self):
+        for data in EDGE_CASES:
+            with self.subTest(data=data):
+                self.assertEqual(outcome(pynmea2_values, data), outcome(nmea0183.parse, data))
+
+    def test_mutation_parity(self):
+        # Randomly corrupted sentences, with and without recomputed checksums
+        rng = random.Random(14)
+        alphabet = '0123456789.,-+ABCDEFGMNSTWQabcPp* $\r\n'
+        for _ in range(20000):
+            body = list(rng.choice(SENTENCES))
+            for _ in range(rng.randint(1, 3)):
+                position = rng.randrange(len(body) + 1)
+                choice = rng.random()
+                if choice < 0.4 and position < len(body):
+                    body[position] = rng.choice(alphabet)
+                elif choice < 0.7:
+                    body.insert(position, rng.choice(alphabet))
+                elif position < len(body):
+                    del body[position]
+            data = nmea_sentence(''.join(body))
+            if rng.random() < 0.2:
+                data = data[:-4] + rng.choice(alphabet).encode('ascii') + data[-3:]
+            with self.subTest(data=data):
+                self.assertEqual(outcome(pynmea2_values, data), outcome(nmea0183.parse, data))
+
+    def test_requested_sentences(self):
+        zda = nmea_sentence('GPZDA,201530.00,04,07,2002,00,00')
+        self.assertEqual(('ZDA', (1025813730.0,)), nmea0183.parse(zda))
+        self.assertIsNone(nmea0183.parse(zda, ('DBT',)))
+        # Sentences that aren't requested are still checked
+        with self.assertRaises(nmea.ChecksumError):
+            nmea0183.parse(zda.replace(b'*', b'0*'), ('DBT',))
+        self.assertIsNone(nmea0183.parse(nmea_sentence('GPVTG,054.7,T,034.4,M,005.5,N,010.2,K')))
+
+
+if __name__ == '__main__':
+    unittest.main(
+        testRunner=xmlrunner.XMLTestRunner(output='test-reports'),
+        failfast=False, buffer=False, catchbreak=False
+    )
@@ -0,0 +1,104 @@
+import functools
+import json
+import unittest
+
+import xmlrunner
+
+from wibl import config_logger_service
+from wibl.core.statistics import NoSuchFault, NoSuchPacket, PktStats, PktFaults
+
+logger = config_logger_service()
+
+
+class TestStatistics(unittest.TestCase):
+    def test_merge(self):
+        events = [('GGA', None), ('Depth', None), ('GGA', PktFaults.ParseFault), ('ZDA', None),
+                  ('Depth', PktFaults.ShortMessage), ('GGA', None), ('MTW', PktFaults.ChecksumFault)]
+        whole = PktStats(10)
+        first = PktStats(10)
+        second = PktStats(10)
+        for n, (name, fault) in enumerate(events):
+            for stats in (whole, first if n < 3 else second):
+                if fault is None:
+                    stats.Observed(name)
+                else:
+                    stats.Fault(name, fault)
+        merged = PktStats(10)
+        merged.merge(first)
+        merged.merge(second)
+        self.assertEqual(str(whole), str(merged))
+        self.assertEqual(whole.TotalCount(), merged.TotalCount())
+        self.assertEqual(1, merged.FaultCount('GGA'))
+        self.assertEqual(1, merged.FaultCount('MTW'))
+
+    def test_skipped(self):
+        first = PktStats(10)
+        second = PktStats(10)
+        first.Skipped(100, 140)
+        second.Skipped(2000, 2001)
+        self.assertNotIn('Skipped', str(PktStats(10)))
+        first.merge(second)
+        self.assertEqual([(100, 140), (2000, 2001)], first.skipped)
+        self.assertEqual(41, first.SkippedBytes())
+        self.assertIn('Skipped 41 bytes of corrupt data in 2 ranges', str(first))
+
+    def test_faults(self):
+        stats = PktStats(10)
+        for n, fault in enumerate(PktFaults):
+            for _ in range(n + 1):
+                stats.Fault('GGA', fault)
+        stats.Observed('GGA', 5)
+        counters = stats.packets['GGA']
+        self.assertEqual((5, 1, 2, 3, 4, 5, 6), (counters.observed, counters.parse_fault, counters.short_msg,
+                                                 counters.decode_fault, counters.attrib_fault, counters.type_fault,
+                                                 counters.chksum_fault))
+        self.assertEqual(21, stats.FaultCount('GGA'))
+        self.assertEqual(21, counters.FaultCount())
+        counters.ChecksumFault()
+        self.assertEqual((7, 22), (counters.chksum_fault, stats.FaultCount('GGA')))
+        with self.assertRaises(NoSuchFault):
+            stats.Fault('GGA', 'ParseFault')
+        with self.assertRaises(NoSuchPacket):
+            stats.FaultCount('ZDA')
+        self.assertFalse(stats.Seen('ZDA'))
+
+    def test_merge_associative(self):
+        parts = []
+        for n in range(4):
+            stats = PktStats(10)
+            stats.Observed('GGA', n + 1)
+            stats.Observed(f'Part{n}')
+            stats.Fault('Depth' if n % 2 else 'ZDA', list(PktFaults)[n])
+            stats.Skipped(100 * n, 100 * n + n + 1)
+            parts.append(stats)
+
+        def combine(*stats):
+            return functools.reduce(PktStats.merge, stats, PktStats(10))
+
+        left = combine(combine(parts[0], parts[1]), parts[2], parts[3])
+        right = combine(parts[0], combine(parts[1], combine(parts[2], parts[3])))
+        self.assertEqual(left.to_dict(), right.to_dict())
+        self.assertEqual(str(left), str(right))
+        self.assertEqual(10, left.TotalCount() - 4)
+
+    def test_to_dict(self):
+        stats = PktStats(7)
+        stats.Observed('GGA', 3)
+        stats.Fault('GGA', PktFaults.ChecksumFault)
+        stats.Skipped(10, 15)
+        expected = {
+            'fault_limit': 7,
+            'packets': {'GGA': {'observed': 3, 'parse_fault': 0, 'short_msg': 0, 'decode_fault': 0,
+                                'attrib_fault': 0, 'type_fault': 0, 'chksum_fault': 1, 'faults': 1}},
+            'skipped': [[10, 15]],
+            'skipped_bytes': 5
+        }
+        self.assertEqual(expected, stats.to_dict())
+        self.assertEqual(expected, json.loads(json.dumps(stats.to_dict())))
+
+
+if __name__ == '__main__':
+    unittest.main(
+        testRunner=xmlrunner.XMLTestRunner(output='test-reports'),
+        failfast=False, buffer=False, catchbreak=False
+    )
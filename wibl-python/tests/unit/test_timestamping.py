@@ -0,0 +1,274 @@
+import pickle
+import random
+import tempfile
+import unittest
+from collections.abc import Mapping
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import xmlrunner
+
+from wibl import config_logger_service
+from wibl.core import Lineage
+import wibl.core.logger_file as lf
+import wibl.core.timestamping as ts
+from wibl.core.statistics import PktStats
+from wibl.core.fileloader import load_file, scan_file, stream_packets
+from wibl.core.interpolation import InterpTable
+from wibl.simulator.data import DataGenerator, Engine, CLOCKS_PER_SEC
+from wibl.simulator.data.writer import MemoryWriter
+
+from tests.fixtures import elapsed_fixup_packets, nmea_sentence, sample_packets, serialise_packets
+
+logger = config_logger_service()
+
+
+class TestTimestamping(unittest.TestCase):
+    def setUp(self) -> None:
+        self.fixtures_dir = Path(Path(__file__).parent.parent, 'data')
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        engine = Engine(DataGenerator())
+        writer = MemoryWriter('UNHJHC-wibl-1', 'Test Platform')
+        now = 0
+        while now < 300 * CLOCKS_PER_SEC:
+            now = engine.step_engine(writer)
+        self.simulated = str(Path(self.tmp_dir.name, 'simulated.wibl'))
+        Path(self.simulated).write_bytes(writer.getvalue())
+        self.fixup = str(Path(self.tmp_dir.name, 'fixup.wibl'))
+        Path(self.fixup).write_bytes(serialise_packets(elapsed_fixup_packets(300)))
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def assertSameData(self, expected, result):
+        self.assertEqual(expected.keys(), result.keys())
+        for key in expected:
+            if isinstance(expected[key], Mapping):
+                self.assertSameData(expected[key], result[key])
+            elif isinstance(expected[key], np.ndarray):
+                np.testing.assert_array_equal(expected[key], result[key])
+            else:
+                self.assertEqual(expected[key], result[key])
+
+    def test_streaming_matches_in_memory(self):
+        for filename in (self.simulated, self.fixup, str(Path(self.fixtures_dir, 'test-algo-dedup.wibl'))):
+            with self.subTest(filename=Path(filename).name):
+                in_memory = ts.time_interpolation(filename, Lineage(), 1 << 32)
+                streamed = ts.time_interpolation(filename, Lineage(), 1 << 32, streaming=True)
+                self.assertSameData(in_memory, streamed)
+
+    def test_streaming_falls_back_to_loading(self):
+        # Algorithms to run on load need all of the packets in memory
+        filename = str(Path(self.fixtures_dir, 'test-algo-dedup-nodata.wibl'))
+        in_memory = ts.time_interpolation(filename, Lineage(), 1 << 32)
+        streamed = ts.time_interpolation(filename, Lineage(), 1 << 32, streaming=True)
+        self.assertSameData(in_memory, streamed)
+
+    def test_scan_file(self):
+        # Add some packets with undecodable NMEA0183 names, and sentences too short to have a name
+        with open(self.simulated, 'rb') as f:
+            packets = list(lf.PacketFactory(f).iter_packets())
+        packets[10:10] = [lf.SerialString(elapsed_time=1000, payload=b'$GP\xff\xfeA,1,2\r\n'),
+                          lf.SerialString(elapsed_time=1001, payload=b'$G'),
+                          lf.AlgorithmRequest(name='deduplicate', params='')]
+        filename = str(Path(self.tmp_dir.name, 'scan.wibl'))
+        Path(filename).write_bytes(serialise_packets(packets))
+
+        stats, timesource, packets, algorithms = load_file(filename, Lineage(), False, 10)
+        s_stats, s_timesource, s_algorithms, needs_fixup = scan_file(filename, Lineage(), False, 10)
+        self.assertEqual(str(stats), str(s_stats))
+        self.assertEqual(timesource, s_timesource)
+        self.assertEqual(algorithms, s_algorithms)
+
+        streamed = list(stream_packets(filename, s_timesource, s_stats, False, fixup=needs_fixup))
+        self.assertEqual([str(pkt) for pkt in packets], [str(pkt) for pkt in streamed])
+
+    def test_elapsed_counter_laps(self):
+        # Wrap the elapsed times of the simulated data around a short counter: the result should be the same as for
+        # the original data (the packets are never more than a lap apart, and the quantum is chosen so that none
+        # lands exactly on zero, which would read as a missing elapsed time)
+        with open(self.simulated, 'rb') as f:
+            packets = list(lf.PacketFactory(f).iter_packets())
+        timed = [pkt for pkt in packets if lf.has_elapsed_time(pkt.id()) and pkt.elapsed > 0]
+        quantum = 60013
+        while any(pkt.elapsed % quantum == 0 for pkt in timed):
+            quantum += 1
+        for pkt in timed:
+            pkt.elapsed = pkt.elapsed % quantum
+        wrapped = str(Path(self.tmp_dir.name, 'wrapped.wibl'))
+        Path(wrapped).write_bytes(serialise_packets(packets))
+
+        expected = ts.time_interpolation(self.simulated, Lineage(), 1 << 32)
+        self.assertSameData(expected, ts.time_interpolation(wrapped, Lineage(), quantum))
+        self.assertSameData(expected, ts.time_interpolation(wrapped, Lineage(), quantum, streaming=True))
+        # Laps of the counter carry over between the blocks in which the elapsed times are unwrapped
+        with mock.patch.object(ts, 'UNWRAP_BLOCK', 7):
+            self.assertSameData(expected, ts.time_interpolation(wrapped, Lineage(), quantum))
+
+    def test_channel_dispatch(self):
+        tables = {name: InterpTable(list(channel.variables)) for name, channel in ts.CHANNELS.items()}
+        packet_feeds, sentence_feeds = ts._dispatch_tables([(ts.CHANNELS[name], tables[name]) for name in tables])
+        packets = sample_packets()
+        for pkt in packets.values():
+            for table, variables, extract in packet_feeds.get(pkt.__class__, []):
+                table.add_points(pkt.elapsed, variables, extract(pkt))
+        self.assertEqual([packets['Depth'].depth], tables['depth'].var('z').tolist())
+        self.assertEqual([packets['Attitude'].roll], tables['attitude'].var('roll').tolist())
+        self.assertEqual([packets['COG'].speedOverGround], tables['cog'].var('speed').tolist())
+        self.assertEqual([packets['Environment'].pressure], tables['environment'].var('pressure').tolist())
+        self.assertEqual([packets['Temperature'].temperature], tables['temperature'].var('temperature').tolist())
+        # Only the channels requested are fed
+        packet_feeds, sentence_feeds = ts._dispatch_tables([(ts.CHANNELS['depth'], tables['depth'])])
+        self.assertEqual({lf.Depth}, set(packet_feeds))
+        self.assertEqual({'DBT', 'DPT'}, set(sentence_feeds))
+
+        stats = PktStats(10)
+        ts._add_nmea_observations(lf.SerialString(elapsed_time=1000, payload=nmea_sentence('SDDPT,3.6,0.0')),
+                                  2000, sentence_feeds, stats, False)
+        ts._add_nmea_observations(lf.SerialString(elapsed_time=1000, payload=nmea_sentence('HEHDT,274.07,T')),
+                                  2000, sentence_feeds, stats, False)
+        self.assertEqual([packets['Depth'].depth, 3.6], tables['depth'].var('z').tolist())
+        self.assertEqual([packets['Depth'].elapsed, 2000], tables['depth'].ind().tolist())
+        self.assertEqual(1, stats.packets['HDT'].observed)
+
+    def test_requested_channels(self):
+        expected = ts.time_interpolation(self.simulated, Lineage(), 1 << 32)
+        self.assertEqual(set(ts.DEFAULT_CHANNELS), {key for key in expected if isinstance(expected[key], Mapping)})
+        with mock.patch.object(ts.nmea0183, 'parse', wraps=ts.nmea0183.parse) as parse:
+            depth_only = ts.time_interpolation(self.simulated, Lineage(), 1 << 32, channels=['depth'])
+        self.assertSameData(expected['depth'], depth_only['depth'])
+        for name in ('heading', 'watertemp', 'wind'):
+            self.assertNotIn(name, depth_only)
+        # Sentences only used for the channels that weren't requested are never parsed
+        parsed = {call.args[0][3:6] for call in parse.call_args_list}
+        self.assertTrue(parsed)
+        self.assertFalse(parsed & {b'HDT', b'MTW', b'MWD'})
+
+        # Depth is always generated, and channels from NMEA2000 packets can be requested
+        result = ts.time_interpolation(self.simulated, Lineage(), 1 << 32, channels=['attitude'])
+        self.assertEqual(['depth', 'attitude'], [key for key in result if isinstance(result[key], Mapping)])
+        self.assertEqual(['t', 'lat', 'lon', 'yaw', 'pitch', 'roll'], list(result['attitude']))
+        with self.assertRaises(ts.UnknownChannel):
+            ts.time_interpolation(self.simulated, Lineage(), 1 << 32, channels=['depth', 'bathythermograph'])
+
+    def test_lazy_channels(self):
+        result = ts.time_interpolation(self.simulated, Lineage(), 1 << 32, process_algorithms=False)
+        interpolate_many = InterpTable.interpolate_many
+        calls = []
+        def counted(table, yvars, xs):
+            calls.append((yvars, len(xs)))
+            return interpolate_many(table, yvars, xs)
+        with mock.patch.object(InterpTable, 'interpolate_many', counted):
+            heading = result['heading']
+            self.assertEqual(['t', 'lat', 'lon', 'heading'], list(heading))
+            self.assertEqual([], calls)
+            self.assertEqual(len(heading['t']), len(heading['heading']))
+            # Times and positions are interpolated once, for all of the channels together
+            heading['lat'], heading['lon'], result['wind']['t']
+            self.assertEqual([(['ref'], len(ts.DEFAULT_CHANNELS)), (['lat', 'lon'], len(ts.DEFAULT_CHANNELS))], calls)
+        depth = result['depth']
+        timepoints = depth['t']
+        depth['t'] = timepoints[:10]
+        self.assertEqual(10, len(depth['t']))
+        self.assertEqual(len(timepoints), len(depth['lat']))
+
+    def assertIncrementalMatches(self, filename: str, quantum: int, **kwargs):
+        expected = ts.time_interpolation(filename, Lineage(), quantum, process_algorithms=False, **kwargs)
+        data = Path(filename).read_bytes()
+        growing = str(Path(self.tmp_dir.name, 'growing.wibl'))
+        interpolator = ts.IncrementalInterpolator(quantum, **kwargs)
+        emitted = {name: [] for name in interpolator.channels}
+        # Write the file in pieces that split packets at random, resuming from a saved state part way through
+        rng = random.Random(20)
+        cuts = sorted(rng.sample(range(1, len(data)), 40)) + [len(data)]
+        Path(growing).write_bytes(b'')
+        for n, cut in enumerate(cuts):
+            with open(growing, 'ab') as f:
+                f.write(data[Path(growing).stat().st_size:cut])
+            if n == 20:
+                interpolator = pickle.loads(pickle.dumps(interpolator))
+            for name, output in interpolator.update(growing).items():
+                emitted[name].append(output)
+            self.assertLessEqual(interpolator.offset, cut)
+        self.assertEqual(len(data), interpolator.offset)
+        for name, output in interpolator.flush().items():
+            emitted[name].append(output)
+
+        self.assertEqual(interpolator.channels, [key for key in expected if isinstance(expected[key], Mapping)])
+        for name, outputs in emitted.items():
+            self.assertSameData(dict(expected[name]),
+                                {key: np.concatenate([output[key] for output in outputs]) for key in outputs[0]})
+        for key in ('loggername', 'platform', 'loggerversion', 'metadata'):
+            self.assertEqual(expected[key], interpolator.info[key])
+        return emitted
+
+    def test_incremental_interpolation(self):
+        emitted = self.assertIncrementalMatches(self.simulated, 1 << 32)
+        # Observations are emitted as their reference brackets close, not all at the end
+        self.assertGreater(sum(len(output['z']) > 0 for output in emitted['depth']), 20)
+        self.assertLess(len(emitted['depth'][-1]['z']), 10)
+        self.assertIncrementalMatches(self.simulated, 1 << 32, channels=['attitude'])
+
+        # Laps of the elapsed-time counter are carried between updates
+        quantum = 60013
+        with open(self.simulated, 'rb') as f:
+            packets = list(lf.PacketFactory(f).iter_packets())
+        for pkt in packets:
+            if lf.has_elapsed_time(pkt.id()) and pkt.elapsed > 0:
+                pkt.elapsed = pkt.elapsed % quantum
+        wrapped = str(Path(self.tmp_dir.name, 'wrapped.wibl'))
+        Path(wrapped).write_bytes(serialise_packets(packets))
+        self.assertIncrementalMatches(wrapped, quantum)
+
+    def test_incremental_trims_tables(self):
+        interpolator = ts.IncrementalInterpolator(1 << 32)
+        data = Path(self.simulated).read_bytes()
+        growing = str(Path(self.tmp_dir.name, 'growing.wibl'))
+        for cut in range(0, len(data), 4096):
+            Path(growing).write_bytes(data[:cut])
+            interpolator.update(growing)
+            for table in (interpolator._time_table, interpolator._position_table):
+                self.assertLess(table.n_points(), 20)
+        self.assertEqual(ts.TimeSource.Time_SysTime, interpolator.time_source)
+        # Nothing is emitted until there are complete packets with time and position references
+        interpolator = ts.IncrementalInterpolator(1 << 32)
+        Path(growing).write_bytes(data[:5])
+        self.assertEqual(0, len(interpolator.update(growing)['depth']['z']))
+        self.assertEqual(0, interpolator.offset)
+
+    def test_time_interpolation_many(self):
+        garbage = str(Path(self.tmp_dir.name, 'garbage.wibl'))
+        Path(garbage).write_bytes(serialise_packets([sample_packets()['Depth']]))
+        packets = sample_packets()
+        packets['SerialiserVersion'] = lf.SerialiserVersion(major=99, minor=0, n2000=(1, 0, 0), n0183=(1, 0, 0),
+                                                            imu=(1, 0, 0))
+        newer = str(Path(self.tmp_dir.name, 'newer.wibl'))
+        Path(newer).write_bytes(serialise_packets(list(packets.values())))
+        filenames = [self.simulated, garbage, self.fixup, str(Path(self.fixtures_dir, 'test-algo-dedup.wibl')), newer]
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                results = ts.time_interpolation_many(filenames, 1 << 32, workers=workers, channels=['depth', 'cog'])
+                self.assertEqual(filenames, [result.filename for result in results])
+                for filename, result in zip(filenames, results):
+                    if filename in (garbage, newer):
+                        self.assertIsNone(result.data)
+                        continue
+                    self.assertIsNone(result.error)
+                    lineage = Lineage()
+                    expected = ts.time_interpolation(filename, lineage, 1 << 32, channels=['depth', 'cog'])
+                    self.assertSameData(expected, result.data)
+                    self.assertIs(dict, type(result.data['depth']))
+                    self.assertEqual(len(lineage.lineage), len(result.lineage.lineage))
+                self.assertEqual('NoTimeSource', results[1].error.kind)
+                self.assertEqual('NewerDataFile', results[4].error.kind)
+                # Errors in the call rather than the files are raised
+                with self.assertRaises(ts.UnknownChannel):
+                    ts.time_interpolation_many(filenames[:2], 1 << 32, workers=workers, channels=['sonar'])
+
+
+if __name__ == '__main__':
+    unittest.main(
+        testRunner=xmlrunner.XMLTestRunner(output='test-reports'),
+        failfast=False, buffer=False, catchbreak=False
+    )